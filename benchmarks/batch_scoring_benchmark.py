@@ -0,0 +1,52 @@
+"""كلفة تقييم العملات: حلقة لكل عملة مقابل التمريرة المجمعة (العملات × الشموع)
+    
+    python benchmarks/batch_scoring_benchmark.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_scanner.market_simulator import SyntheticMarket
+from market_scanner.ring_buffer import CandleWindow
+from market_scanner.opportunity_finder import OpportunityFinder
+
+LIMITS = {'1h': 100, '15m': 100, '5m': 50}
+
+def build_market_data(n_symbols, seed=3):
+    market = SyntheticMarket(seed=seed)
+    frames = {
+        interval: market.generate_candles(n_symbols, limit, interval=interval)
+        for interval, limit in LIMITS.items()
+    }
+    return {
+        f"SYM{i}USDT": {
+            interval: CandleWindow({column: (values if values.ndim == 1 else values[i]) for column, values in candles.items()})
+            for interval, candles in frames.items()
+        }
+        for i in range(n_symbols)
+    }
+
+def timed(function, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    finder = OpportunityFinder()
+    
+    for n_symbols in (10, 100, 500):
+        market_data = build_market_data(n_symbols)
+        
+        batch = finder.score_batch(market_data)
+        for symbol, data in market_data.items():
+            assert abs(batch[symbol]['score'] - finder.calculate_opportunity_score(data)) < 1e-12
+        
+        loop_ms = timed(lambda: [finder.calculate_opportunity_score(data) for data in market_data.values()])
+        batch_ms = timed(lambda: finder.score_batch(market_data))
+        print(f"{n_symbols:>4} symbols: per-symbol loop {loop_ms:8.1f}ms | batched {batch_ms:7.1f}ms")
+
+if __name__ == "__main__":
+    main()
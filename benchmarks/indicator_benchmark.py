@@ -0,0 +1,124 @@
+"""مقارنة مكتبة المؤشرات المشتركة مع التطبيقات السابقة
+
+يتحقق أولاً من تطابق المخرجات تماماً ثم يقيس الزمن:
+    python benchmarks/indicator_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantum_engine import indicators
+from quantum_engine.indicators import IndicatorCache
+from market_scanner.market_simulator import SyntheticMarket
+from market_scanner.ring_buffer import CandleWindow
+
+# ===== التطبيقات السابقة (مرجع المقارنة) =====
+
+def legacy_rsi(prices, period=14):
+    if len(prices) < period:
+        return np.array([50] * len(prices))
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    avg_gains = np.convolve(gains, np.ones(period)/period, mode='valid')
+    avg_losses = np.convolve(losses, np.ones(period)/period, mode='valid')
+    rs = avg_gains / (avg_losses + 1e-10)
+    rsi = 100 - (100 / (1 + rs))
+    return np.concatenate([np.array([50] * (len(prices) - len(rsi))), rsi])
+
+def legacy_macd(prices, fast=12, slow=26, signal=9):
+    if len(prices) < slow:
+        return np.array([0] * len(prices)), np.array([0] * len(prices))
+    exp1 = pd.Series(prices).ewm(span=fast).mean()
+    exp2 = pd.Series(prices).ewm(span=slow).mean()
+    macd = exp1 - exp2
+    macd_signal = macd.ewm(span=signal).mean()
+    return macd.values, macd_signal.values
+
+def legacy_stochastic(data, period=14):
+    if len(data) < period:
+        return np.array([50] * len(data))
+    lows = data['low'].rolling(period).min()
+    highs = data['high'].rolling(period).max()
+    stoch = 100 * (data['close'] - lows) / (highs - lows)
+    return stoch.fillna(50).values
+
+def legacy_volatility(data):
+    return data['close'].pct_change().std()
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main(n_symbols=50, n_bars=100, repeat=200):
+    market = SyntheticMarket(seed=7)
+    candles = market.generate_candles(n_symbols, n_bars, interval='15m')
+    windows = [
+        CandleWindow({column: (values if values.ndim == 1 else values[i]) for column, values in candles.items()})
+        for i in range(n_symbols)
+    ]
+    frames = [window.to_frame() for window in windows]
+    
+    # 1. التطابق
+    for window, frame in zip(windows, frames):
+        closes = np.asarray(window['close'])
+        assert np.array_equal(indicators.rsi(closes), legacy_rsi(closes))
+        for new, old in zip(indicators.macd(closes), legacy_macd(closes)):
+            assert np.array_equal(new, old)
+        assert np.array_equal(
+            indicators.stochastic(window['high'], window['low'], window['close']), legacy_stochastic(frame)
+        )
+        assert np.isclose(indicators.returns_volatility(closes), legacy_volatility(frame), rtol=1e-12)
+    print(f"✅ Outputs identical on {n_symbols} symbols × {n_bars} bars")
+    
+    # 2. الزمن لكل استدعاء
+    window, frame = windows[0], frames[0]
+    closes = np.asarray(window['close'])
+    rows = [
+        ('RSI', lambda: legacy_rsi(closes), lambda: indicators.rsi(closes)),
+        ('MACD', lambda: legacy_macd(closes), lambda: indicators.macd(closes)),
+        ('Stochastic', lambda: legacy_stochastic(frame),
+         lambda: indicators.stochastic(window['high'], window['low'], window['close'])),
+        ('Volatility', lambda: legacy_volatility(frame), lambda: indicators.returns_volatility(closes)),
+    ]
+    print(f"\n{'indicator':<12}{'legacy µs':>12}{'shared µs':>12}{'speedup':>10}")
+    for name, legacy, shared in rows:
+        old = timed(legacy, repeat)
+        new = timed(shared, repeat)
+        print(f"{name:<12}{old:>12.1f}{new:>12.1f}{old / new:>9.1f}x")
+    
+    # 3. دورة كاملة: كل مستهلك يطلب نفس المؤشرات (الماسح مرتين والمتعلم مرة)
+    def cycle(cache):
+        for i, base in enumerate(windows):
+            window = CandleWindow(base.columns, f"S{i}", '15m')
+            for _ in range(3):
+                indicators.window_rsi(window, cache=cache)
+                indicators.window_macd(window, cache=cache)
+                indicators.window_stochastic(window, cache=cache)
+                indicators.window_volatility(window, cache=cache)
+    
+    def legacy_cycle():
+        for window, frame in zip(windows, frames):
+            closes = np.asarray(window['close'])
+            for _ in range(3):
+                legacy_rsi(closes)
+                legacy_macd(closes)
+                legacy_stochastic(frame)
+                legacy_volatility(frame)
+    
+    cache = IndicatorCache()
+    repeat_cycles = max(repeat // 20, 3)
+    old = timed(legacy_cycle, repeat_cycles) / 1000
+    new = timed(lambda: (cache.clear(), cycle(cache)), repeat_cycles) / 1000
+    print(f"\nCycle ({n_symbols} symbols, 3 consumers): legacy {old:.2f}ms | shared+memoized {new:.2f}ms "
+          f"({old / new:.1f}x) | cache hit rate {cache.get_statistics()['hit_rate']:.0%}")
+
+if __name__ == "__main__":
+    main()
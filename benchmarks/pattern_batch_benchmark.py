@@ -0,0 +1,30 @@
+"""كلفة التعرف على الأنماط: recognize_patterns لكل عملة مقابل recognize_patterns_batch
+    
+    python benchmarks/pattern_batch_benchmark.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.batch_scoring_benchmark import build_market_data, timed
+from quantum_engine.deep_learner import QuantumDeepLearner
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        learner = QuantumDeepLearner(models_dir=directory)
+        
+        for n_symbols in (10, 100, 500):
+            market_data = build_market_data(n_symbols)
+            
+            batch = learner.recognize_patterns_batch(market_data)
+            for symbol, data in market_data.items():
+                assert batch[symbol] == learner.recognize_patterns(data), symbol
+            
+            loop_ms = timed(lambda: [learner.recognize_patterns(data) for data in market_data.values()])
+            batch_ms = timed(lambda: learner.recognize_patterns_batch(market_data))
+            print(f"{n_symbols:>4} symbols: per-symbol loop {loop_ms:8.1f}ms | batched {batch_ms:7.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""كلفة تحديث المؤشرات مع كل شمعة: تراكمي O(1) مقابل إعادة الحساب الكاملة
+    
+    python benchmarks/streaming_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantum_engine import indicators
+from quantum_engine.streaming_indicators import StreamingIndicatorSet
+from market_scanner.market_simulator import SyntheticMarket
+
+CANDLE_ORDER = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+def main(window=500, new_bars=500):
+    market = SyntheticMarket(seed=11)
+    generated = market.generate_candles(1, window + new_bars, interval='5m')
+    candles = {column: (values if values.ndim == 1 else values[0]) for column, values in generated.items()}
+    history = {column: values[:window] for column, values in candles.items()}
+    incoming = list(zip(*(candles[column][window:].tolist() for column in CANDLE_ORDER)))
+    
+    # 1. تحديث تراكمي لكل شمعة جديدة
+    streaming = StreamingIndicatorSet()
+    streaming.seed(history)
+    start = time.perf_counter()
+    for candle in incoming:
+        values = streaming.update(candle)
+    streaming_us = (time.perf_counter() - start) / new_bars * 1e6
+    
+    # 2. إعادة حساب النافذة كاملة لكل شمعة جديدة
+    start = time.perf_counter()
+    for end in range(window + 1, window + new_bars + 1):
+        closes = candles['close'][end - window:end]
+        indicators.rsi(closes)
+        macd, signal = indicators.macd(candles['close'][:end])
+        indicators.stochastic(candles['high'][end - window:end], candles['low'][end - window:end], closes)
+        indicators.returns_volatility(candles['close'][:end])
+    batch_us = (time.perf_counter() - start) / new_bars * 1e6
+    
+    # MACD والتقلب على كامل التاريخ يطابقان الحساب الكامل
+    assert values['macd'] == macd[-1] and values['macd_signal'] == signal[-1]
+    assert np.isclose(values['volatility'], indicators.returns_volatility(candles['close']), rtol=1e-9)
+    
+    # 3. معاينة الشمعة الجارية (snapshot/restore)
+    start = time.perf_counter()
+    for candle in incoming:
+        streaming.peek(candle)
+    peek_us = (time.perf_counter() - start) / new_bars * 1e6
+    
+    print(f"Per new bar ({window}-bar window): recompute {batch_us:.1f}µs | streaming {streaming_us:.1f}µs "
+          f"({batch_us / streaming_us:.0f}x) | forming-bar peek {peek_us:.1f}µs")
+
+if __name__ == "__main__":
+    main()
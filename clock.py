@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timedelta
+
+class SystemClock:
+    """الساعة الحقيقية (الافتراضي في التشغيل الحي)"""
+    
+    simulated = False
+    
+    def now(self):
+        return datetime.now()
+    
+    def time(self):
+        return time.time()
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock:
+    """ساعة محاكاة للإعادة التاريخية: الزمن يتقدم فقط بـ advance/set بدون نوم"""
+    
+    simulated = True
+    
+    def __init__(self, start):
+        self.current = start if isinstance(start, datetime) else datetime.fromtimestamp(start)
+    
+    def now(self):
+        return self.current
+    
+    def time(self):
+        return self.current.timestamp()
+    
+    def sleep(self, seconds):
+        self.advance(seconds)
+    
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+    
+    def set(self, moment):
+        self.current = moment if isinstance(moment, datetime) else datetime.fromtimestamp(moment)
+
+# الساعة العامة التي تقرأ منها كل الأنظمة
+market_clock = SystemClock()
+
+def get_clock():
+    return market_clock
+
+def set_clock(clock):
+    """استبدال الساعة العامة (مثلاً SimulatedClock أثناء الإعادة التاريخية)"""
+    global market_clock
+    market_clock = clock
+    return clock
+
+def now():
+    """الوقت الحالي كـ datetime حسب الساعة العامة"""
+    return market_clock.now()
+
+def timestamp():
+    """الوقت الحالي بالثواني منذ epoch حسب الساعة العامة"""
+    return market_clock.time()
+
+def sleep(seconds):
+    market_clock.sleep(seconds)
@@ -1,7 +1,8 @@
 import os
-from binance.client import Client
 import logging
 
+from execution_engine.exchange_client import ExchangeClient
+
 class QuantumConfig:
     def __init__(self):
         # إعدادات API
@@ -15,14 +16,57 @@ class QuantumConfig:
         self.cycle_interval = int(os.getenv('CYCLE_INTERVAL', '180'))
         self.max_trades_per_cycle = int(os.getenv('MAX_TRADES_PER_CYCLE', '3'))
         
+        # إعدادات المسح المتزامن
+        self.scan_mode = os.getenv('SCAN_MODE', 'concurrent')  # concurrent أو sequential
+        self.scan_concurrency = int(os.getenv('SCAN_CONCURRENCY', '8'))
+        self.scan_timeout = float(os.getenv('SCAN_TIMEOUT', '10'))  # ثوانٍ لكل عملة من بدء جلبها
+        self.scan_total_timeout = float(os.getenv('SCAN_TOTAL_TIMEOUT', '60'))  # سقف المسح كله بالثواني
+        
+        # طبقة الوصول للبورصة (حدود Binance: وزن الطلبات في الدقيقة والأوامر كل 10 ثوانٍ)
+        self.exchange_base_url = os.getenv('EXCHANGE_BASE_URL', '')  # مثلاً خادم المحاكاة المحلي
+        self.exchange_weight_limit = int(os.getenv('EXCHANGE_WEIGHT_LIMIT', '6000'))
+        self.exchange_order_limit = int(os.getenv('EXCHANGE_ORDER_LIMIT', '50'))
+        self.exchange_client = None
+        
         # إعدادات المخاطرة
         self.max_daily_loss = float(os.getenv('MAX_DAILY_LOSS', '0.03'))
         self.max_trade_loss = float(os.getenv('MAX_TRADE_LOSS', '0.015'))
         self.max_portfolio_risk = float(os.getenv('MAX_PORTFOLIO_RISK', '0.25'))
         
+        # مخزن الشموع المحلي
+        self.candle_store_dir = os.getenv('CANDLE_STORE_DIR', 'data/candles')
+        self.base_interval = os.getenv('BASE_INTERVAL', '5m')
+        self.resample_timeframes = os.getenv('RESAMPLE_TIMEFRAMES', 'true').lower() == 'true'
+        
+        # مصدر البيانات: rest (استعلام دوري) أو stream (بث لحظي)
+        self.data_mode = os.getenv('DATA_MODE', 'rest')
+        self.stream_source = os.getenv('STREAM_SOURCE', 'binance')  # binance أو local
+        self.stream_host = os.getenv('STREAM_HOST', '127.0.0.1')
+        self.stream_port = int(os.getenv('STREAM_PORT', '8765'))
+        self.stream_max_staleness = float(os.getenv('STREAM_MAX_STALENESS', '60'))
+        
+        # الذاكرة المؤقتة المشتركة لبيانات السوق
+        self.cache_max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '4096'))
+        self.price_cache_ttl = float(os.getenv('PRICE_CACHE_TTL', '10'))
+        self.candle_cache_ttl_fraction = float(os.getenv('CANDLE_CACHE_TTL_FRACTION', '0.1'))
+        
+        # محرك السوق الاصطناعي (بذرة ثابتة لنتائج قابلة للتكرار)
+        self.simulation_seed = int(os.getenv('SIMULATION_SEED', '42'))
+        
         # إعدادات التعلم
         self.learning_enabled = os.getenv('LEARNING_ENABLED', 'true').lower() == 'true'
         self.model_save_interval = int(os.getenv('MODEL_SAVE_INTERVAL', '20'))
+        self.learning_mode = os.getenv('LEARNING_MODE', 'background')  # background (خيط خلفي) أو inline
+        self.models_dir = os.getenv('MODELS_DIR', 'data/models')  # سجل المعرفة ونقاط النموذج وجدول التوقيعات
+        
+        # نطاق العملات: fixed (القائمة المستهدفة) أو usdt (كل أزواج USDT مع فلتر أولي)
+        self.symbol_universe = os.getenv('SYMBOL_UNIVERSE', 'fixed')
+        self.universe_shortlist_size = int(os.getenv('UNIVERSE_SHORTLIST_SIZE', '40'))
+        self.universe_min_quote_volume = float(os.getenv('UNIVERSE_MIN_QUOTE_VOLUME', '5000000'))
+        self.universe_max_spread = float(os.getenv('UNIVERSE_MAX_SPREAD', '0.002'))
+        self.universe_min_volatility = float(os.getenv('UNIVERSE_MIN_VOLATILITY', '0.01'))
+        self.universe_max_volatility = float(os.getenv('UNIVERSE_MAX_VOLATILITY', '0.25'))
+        self.universe_refresh_interval = float(os.getenv('UNIVERSE_REFRESH_INTERVAL', '900'))
         
         # العملات المستهدفة
         self.target_symbols = [
@@ -36,28 +80,31 @@ class QuantumConfig:
         print("🔧 Quantum Configuration Loaded")
     
     def get_client(self):
-        """إنشاء عميل Binance مع معالجة الأخطاء"""
+        """عميل البورصة المشترك (اتصالات مستمرة وجدولة وزن الطلبات) مع معالجة الأخطاء"""
+        if self.exchange_client is not None:
+            return self.exchange_client
+        
         try:
-            if not self.api_key or not self.api_secret:
+            if not self.exchange_base_url and (not self.api_key or not self.api_secret):
                 print("⚠️ API keys not provided - Running in simulation mode")
                 return None
             
-            if self.testnet:
-                client = Client(
-                    self.api_key, 
-                    self.api_secret,
-                    testnet=True
-                )
-                print("🔗 Connected to Binance Testnet")
-            else:
-                client = Client(self.api_key, self.api_secret)
-                print("🔗 Connected to Binance Live")
+            client = ExchangeClient(
+                self.api_key,
+                self.api_secret,
+                base_url=self.exchange_base_url or None,
+                testnet=self.testnet,
+                weight_limit_per_minute=self.exchange_weight_limit,
+                order_limit_per_10s=self.exchange_order_limit,
+                pool_size=max(self.scan_concurrency, 4)
+            )
             
-            # اختبار الاتصال
-            client.get_account()
-            print("✅ Binance connection validated")
+            # اختبار الاتصال بطلب خفيف (وزن 1) بدل get_account (وزن 20)
+            client.ping()
+            print(f"🔗 Connected to exchange at {client.base_url}")
+            self.exchange_client = client
             return client
-            
+        
         except Exception as e:
             print(f"❌ Binance connection failed: {e}")
             print("💡 Using simulation mode only")
@@ -82,6 +129,21 @@ class QuantumConfig:
         if self.cycle_interval < 60:
             errors.append("Cycle interval must be at least 60 seconds")
         
+        if self.scan_concurrency < 1:
+            errors.append("Scan concurrency must be at least 1")
+        
+        if self.scan_timeout <= 0 or self.scan_total_timeout <= 0:
+            errors.append("Scan timeouts must be positive")
+        
+        if self.data_mode not in ('rest', 'stream'):
+            errors.append("DATA_MODE must be 'rest' or 'stream'")
+        
+        if self.symbol_universe not in ('fixed', 'usdt'):
+            errors.append("SYMBOL_UNIVERSE must be 'fixed' or 'usdt'")
+        
+        if self.exchange_weight_limit < 1 or self.exchange_order_limit < 1:
+            errors.append("Exchange rate limits must be positive")
+        
         if self.max_daily_loss > 0.1:
             warnings.append("High daily loss limit configured")
         
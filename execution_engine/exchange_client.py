@@ -0,0 +1,304 @@
+import time
+import hmac
+import hashlib
+import threading
+from urllib.parse import urlencode
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# أوزان الطلبات حسب وثائق Binance Spot
+ENDPOINT_WEIGHTS = {
+    '/api/v3/ping': 1,
+    '/api/v3/time': 1,
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/klines': 2,
+    '/api/v3/ticker/price': 2,
+    '/api/v3/ticker/24hr': 2,
+    '/api/v3/ticker/bookTicker': 2,
+    '/api/v3/depth': 5,
+    '/api/v3/account': 20,
+    '/api/v3/order': 1
+}
+
+# أوزان الطلبات الشاملة لكل العملات (بدون symbol)
+BULK_ENDPOINT_WEIGHTS = {
+    '/api/v3/ticker/price': 4,
+    '/api/v3/ticker/24hr': 80,
+    '/api/v3/ticker/bookTicker': 4
+}
+
+class ExchangeAPIError(Exception):
+    """خطأ من واجهة البورصة"""
+    
+    def __init__(self, status_code, message, code=None):
+        super().__init__(f"[{status_code}] {message}")
+        self.status_code = status_code
+        self.code = code
+
+class TokenBucket:
+    """دلو رموز لتنظيم الوزن/العدد المسموح خلال نافذة زمنية"""
+    
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+    
+    def acquire(self, tokens=1, timeout=None):
+        """سحب رموز مع الانتظار حتى تتوفر (أو انتهاء المهلة)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.refill_per_second
+            
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+    
+    def limit_available(self, available):
+        """مواءمة الرصيد مع ما تبلغ به البورصة (مثل X-MBX-USED-WEIGHT-1M)"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, max(available, 0))
+    
+    @property
+    def available(self):
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+class ExchangeClient:
+    """طبقة وصول للبورصة باتصالات مستمرة وجدولة وزن الطلبات
+    
+    - جلسة HTTP واحدة بمجمع اتصالات يُعاد استخدامه
+    - دلو رموز لوزن الطلبات في الدقيقة ودلو آخر لعدد الأوامر
+    - تراجع قصير عند 429 مع احترام Retry-After، أما الحظر (418) أو الانتظار
+      الأطول من max_backoff_wait فيرفع ExchangeAPIError فوراً حتى يسلك
+      المستدعي المسار الاحتياطي بدل حجز خيطه طوال مدة الحظر
+    - دمج طلبات GET المتطابقة الجارية في طلب واحد
+    - نفس أسماء دوال python-binance المستخدمة في البوت
+    """
+    
+    LIVE_URL = 'https://api.binance.com'
+    TESTNET_URL = 'https://testnet.binance.vision'
+    
+    def __init__(self, api_key='', api_secret='', base_url=None, testnet=False,
+                 weight_limit_per_minute=6000, order_limit_per_10s=50, pool_size=16,
+                 max_retries=4, timeout=10, safety_margin=0.9, max_backoff_wait=5.0):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = (base_url or (self.TESTNET_URL if testnet else self.LIVE_URL)).rstrip('/')
+        self.weight_limit_per_minute = weight_limit_per_minute
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_backoff_wait = max_backoff_wait
+        
+        # نترك هامشاً تحت الحد الرسمي حتى لا نقترب من الحظر
+        weight_capacity = weight_limit_per_minute * safety_margin
+        self.weight_bucket = TokenBucket(weight_capacity, weight_capacity / 60)
+        self.order_bucket = TokenBucket(order_limit_per_10s * safety_margin, order_limit_per_10s * safety_margin / 10)
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if api_key:
+            self.session.headers['X-MBX-APIKEY'] = api_key
+        
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        self.banned_until = 0.0
+        self.ban_status = 429
+        
+        # العداد يُحدَّث من كل خيوط المسح والتنفيذ
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0, 'coalesced': 0, 'rate_limited': 0, 'banned': 0,
+            'retries': 0, 'errors': 0, 'used_weight': 0
+        }
+    
+    def count(self, name, amount=1):
+        """زيادة عداد إحصائي بأمان بين الخيوط"""
+        with self.stats_lock:
+            self.stats[name] += amount
+    
+    def request_weight(self, path, params):
+        """وزن الطلب حسب النقطة وما إذا كان شاملاً لكل العملات"""
+        if path in BULK_ENDPOINT_WEIGHTS and not params.get('symbol'):
+            return BULK_ENDPOINT_WEIGHTS[path]
+        return ENDPOINT_WEIGHTS.get(path, 1)
+    
+    def request(self, method, path, params=None, signed=False, is_order=False):
+        """إرسال طلب مع الجدولة والدمج والتراجع"""
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        
+        if method != 'GET' or signed:
+            return self._send(method, path, params, signed, is_order)
+        
+        # دمج الطلبات المتطابقة الجارية: أول طلب يُرسل والبقية تنتظر نتيجته
+        key = (path, tuple(sorted(params.items())))
+        with self.inflight_lock:
+            call = self.inflight.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self.inflight[key] = call
+            else:
+                self.count('coalesced')
+        
+        if not leader:
+            return call.result()
+        
+        try:
+            result = self._send(method, path, params, signed, is_order)
+            call.set_result(result)
+            return result
+        except Exception as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self.inflight_lock:
+                self.inflight.pop(key, None)
+    
+    def _send(self, method, path, params, signed, is_order):
+        """الإرسال الفعلي مع إعادة المحاولة"""
+        weight = self.request_weight(path, params)
+        backoff = 1.0
+        
+        for attempt in range(self.max_retries + 1):
+            # احترام الحظر المؤقت الذي أعلنته البورصة: انتظار قصير فقط، والأطول يُرفع للمستدعي
+            wait = self.banned_until - time.time()
+            if wait > self.max_backoff_wait:
+                raise ExchangeAPIError(self.ban_status, f"Exchange backoff active for {wait:.0f}s")
+            if wait > 0:
+                time.sleep(wait)
+            
+            self.weight_bucket.acquire(weight)
+            if is_order:
+                self.order_bucket.acquire(1)
+            
+            query = dict(params)
+            if signed:
+                query['timestamp'] = int(time.time() * 1000)
+                query['signature'] = hmac.new(
+                    self.api_secret.encode('utf-8'), urlencode(query).encode('utf-8'), hashlib.sha256
+                ).hexdigest()
+            
+            try:
+                self.count('requests')
+                response = self.session.request(method, self.base_url + path, params=query, timeout=self.timeout)
+            except requests.RequestException:
+                self.count('errors')
+                if attempt == self.max_retries:
+                    raise
+                self.count('retries')
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            
+            self.track_used_weight(response.headers)
+            
+            if response.status_code in (429, 418):
+                retry_after = float(response.headers.get('Retry-After', backoff))
+                banned = response.status_code == 418
+                with self.stats_lock:
+                    if time.time() + retry_after > self.banned_until:
+                        self.banned_until = time.time() + retry_after
+                        self.ban_status = response.status_code
+                    self.stats['banned' if banned else 'rate_limited'] += 1
+                print(f"⚠️ Exchange rate limit ({response.status_code}) - backing off {retry_after:.0f}s")
+                backoff = min(backoff * 2, 60)
+                # الحظر يستمر دقائق أو أياماً: لا يُنتظر داخل خيط المستدعي
+                if not banned and retry_after <= self.max_backoff_wait and attempt < self.max_retries:
+                    self.count('retries')
+                    continue
+            
+            elif response.status_code >= 500 and attempt < self.max_retries:
+                self.count('retries')
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            
+            if response.status_code >= 400:
+                self.count('errors')
+                try:
+                    payload = response.json()
+                except ValueError:
+                    payload = {'msg': response.text}
+                raise ExchangeAPIError(response.status_code, payload.get('msg', ''), payload.get('code'))
+            
+            return response.json()
+        
+        raise ExchangeAPIError(429, 'Rate limit retries exhausted')
+    
+    def track_used_weight(self, headers):
+        """مزامنة الدلو مع الوزن المستهلك الذي تعلنه البورصة"""
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('x-mbx-used-weight-1m')
+        if used is not None:
+            used = int(used)
+            with self.stats_lock:
+                self.stats['used_weight'] = used
+            self.weight_bucket.limit_available(self.weight_bucket.capacity - used)
+    
+    # ===== واجهة متوافقة مع python-binance =====
+    
+    def ping(self):
+        return self.request('GET', '/api/v3/ping')
+    
+    def get_server_time(self):
+        return self.request('GET', '/api/v3/time')
+    
+    def get_exchange_info(self):
+        return self.request('GET', '/api/v3/exchangeInfo')
+    
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        return self.request('GET', '/api/v3/klines', {
+            'symbol': symbol, 'interval': interval, 'limit': limit,
+            'startTime': startTime, 'endTime': endTime
+        })
+    
+    def get_symbol_ticker(self, symbol=None):
+        return self.request('GET', '/api/v3/ticker/price', {'symbol': symbol})
+    
+    def get_ticker(self, symbol=None):
+        return self.request('GET', '/api/v3/ticker/24hr', {'symbol': symbol})
+    
+    def get_orderbook_tickers(self, symbol=None):
+        return self.request('GET', '/api/v3/ticker/bookTicker', {'symbol': symbol})
+    
+    def get_account(self):
+        return self.request('GET', '/api/v3/account', signed=True)
+    
+    def create_order(self, **params):
+        return self.request('POST', '/api/v3/order', params, signed=True, is_order=True)
+    
+    def order_market_buy(self, symbol, quantity):
+        return self.create_order(symbol=symbol, side='BUY', type='MARKET', quantity=quantity)
+    
+    def order_market_sell(self, symbol, quantity):
+        return self.create_order(symbol=symbol, side='SELL', type='MARKET', quantity=quantity)
+    
+    def get_statistics(self):
+        """إحصائيات الطلبات والحدود"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'available_weight': self.weight_bucket.available,
+            'banned_for': max(self.banned_until - time.time(), 0)
+        }
+    
+    def close(self):
+        self.session.close()
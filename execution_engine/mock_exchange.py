@@ -0,0 +1,272 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from execution_engine.exchange_client import ENDPOINT_WEIGHTS, BULK_ENDPOINT_WEIGHTS
+from market_scanner.candle_store import interval_to_seconds
+from market_scanner.market_simulator import SyntheticMarket
+
+class MockExchangeHTTPServer(ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class MockExchangeServer:
+    """خادم REST محلي يحاكي Binance لاختبار طبقة الوصول للبورصة
+    
+    - نفس مسارات وصيغ ردود /api/v3 التي يستخدمها البوت
+    - محاسبة وزن الطلبات في الدقيقة مع ترويسة X-MBX-USED-WEIGHT-1M
+    - رد 429 مع Retry-After عند تجاوز الحد ثم 418 إن استمرت الطلبات
+    - شموع من SyntheticMarket ثابتة لكل (عملة، إطار) بين الطلبات
+    """
+    
+    def __init__(self, symbols=None, host='127.0.0.1', port=0, weight_limit=1200,
+                 latency=0.0, history_bars=1500, seed=42, ban_seconds=120):
+        self.symbols = list(symbols or [
+            'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'ADAUSDT',
+            'XRPUSDT', 'DOTUSDT', 'DOGEUSDT', 'MATICUSDT', 'AVAXUSDT'
+        ])
+        self.host = host
+        self.port = port
+        self.weight_limit = weight_limit
+        self.latency = latency
+        self.history_bars = history_bars
+        self.seed = seed
+        self.ban_seconds = ban_seconds
+        
+        self.series = {}
+        self.lock = threading.Lock()
+        self.window_start = 0
+        self.used_weight = 0
+        self.banned_until = 0.0
+        self.stats = {'requests': 0, 'rate_limited': 0, 'banned': 0, 'orders': 0}
+        
+        self.server = None
+        self.thread = None
+    
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+    
+    def start_price(self, symbol):
+        """سعر بداية ثابت لكل عملة"""
+        return 10 ** (1 + sum(map(ord, symbol)) % 4)
+    
+    def get_series(self, symbol, interval):
+        """سلسلة الشموع للعملة والإطار (تُولد مرة وتُمدد مع مرور الوقت)"""
+        interval_ms = interval_to_seconds(interval) * 1000
+        current_open = int(time.time() * 1000) // interval_ms * interval_ms
+        
+        with self.lock:
+            series = self.series.get((symbol, interval))
+            if series is None:
+                market = SyntheticMarket(seed=self.seed + sum(map(ord, symbol + interval)))
+                series = market.generate_series(
+                    self.history_bars, self.start_price(symbol), interval=interval,
+                    start_time=current_open - (self.history_bars - 1) * interval_ms
+                )
+                series['market'] = market
+                self.series[(symbol, interval)] = series
+            
+            last_ts = int(series['timestamp'][-1])
+            if last_ts < current_open:
+                count = (current_open - last_ts) // interval_ms
+                extension = series['market'].generate_series(
+                    count, float(series['close'][-1]), interval=interval, start_time=last_ts + interval_ms
+                )
+                for column, values in extension.items():
+                    series[column] = np.concatenate([series[column], values])
+            
+            return series
+    
+    def charge(self, path, params):
+        """احتساب وزن الطلب وإرجاع (الحالة، Retry-After)"""
+        weight = ENDPOINT_WEIGHTS.get(path, 1)
+        if path in BULK_ENDPOINT_WEIGHTS and 'symbol' not in params:
+            weight = BULK_ENDPOINT_WEIGHTS[path]
+        
+        with self.lock:
+            now = time.time()
+            self.stats['requests'] += 1
+            
+            if now < self.banned_until:
+                # طلبات أثناء الحظر تصعّد إلى 418 وتمدده
+                self.banned_until = now + self.ban_seconds * 2
+                self.stats['banned'] += 1
+                return 418, self.banned_until - now
+            
+            window_start = int(now // 60 * 60)
+            if window_start != self.window_start:
+                self.window_start = window_start
+                self.used_weight = 0
+            
+            self.used_weight += weight
+            if self.used_weight > self.weight_limit:
+                # مثل Binance: Retry-After حتى بداية الدقيقة التالية
+                self.banned_until = window_start + 60
+                self.stats['rate_limited'] += 1
+                return 429, self.banned_until - now
+            
+            return 200, 0
+    
+    def klines(self, params):
+        symbol = params['symbol']
+        interval = params['interval']
+        limit = min(int(params.get('limit', 500)), 1000)
+        series = self.get_series(symbol, interval)
+        timestamps = series['timestamp']
+        interval_ms = interval_to_seconds(interval) * 1000
+        
+        if 'startTime' in params:
+            start = int(np.searchsorted(timestamps, int(params['startTime'])))
+            end = min(start + limit, len(timestamps))
+        else:
+            end = len(timestamps)
+            start = max(end - limit, 0)
+        if 'endTime' in params:
+            end = min(end, int(np.searchsorted(timestamps, int(params['endTime']), side='right')))
+        
+        rows = []
+        for i in range(start, end):
+            ts = int(timestamps[i])
+            close = series['close'][i]
+            volume = series['volume'][i]
+            rows.append([
+                ts, f"{series['open'][i]:.8f}", f"{series['high'][i]:.8f}", f"{series['low'][i]:.8f}",
+                f"{close:.8f}", f"{volume:.8f}", ts + interval_ms - 1, f"{volume * close:.8f}",
+                int(volume), f"{volume / 2:.8f}", f"{volume * close / 2:.8f}", "0"
+            ])
+        return rows
+    
+    def ticker_24hr(self, symbol):
+        series = self.get_series(symbol, '5m')
+        day = {column: values[-288:] for column, values in series.items() if column != 'market'}
+        last = float(day['close'][-1])
+        first = float(day['open'][0])
+        return {
+            'symbol': symbol,
+            'priceChange': f"{last - first:.8f}",
+            'priceChangePercent': f"{(last / first - 1) * 100:.3f}",
+            'lastPrice': f"{last:.8f}",
+            'bidPrice': f"{last * 0.9999:.8f}",
+            'askPrice': f"{last * 1.0001:.8f}",
+            'openPrice': f"{first:.8f}",
+            'highPrice': f"{float(day['high'].max()):.8f}",
+            'lowPrice': f"{float(day['low'].min()):.8f}",
+            'volume': f"{float(day['volume'].sum()):.8f}",
+            'quoteVolume': f"{float((day['volume'] * day['close']).sum()):.8f}",
+            'openTime': int(day['timestamp'][0]),
+            'closeTime': int(day['timestamp'][-1]),
+            'count': int(day['volume'].sum())
+        }
+    
+    def handle(self, method, path, params):
+        """توجيه الطلب إلى الرد المناسب"""
+        if path == '/api/v3/ping':
+            return {}
+        
+        if path == '/api/v3/account':
+            return {'canTrade': True, 'balances': [{'asset': 'USDT', 'free': '10000.0', 'locked': '0.0'}]}
+        
+        if path == '/api/v3/time':
+            return {'serverTime': int(time.time() * 1000)}
+        
+        if path == '/api/v3/exchangeInfo':
+            return {'symbols': [
+                {'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:-4], 'quoteAsset': symbol[-4:]}
+                for symbol in self.symbols
+            ]}
+        
+        if path == '/api/v3/klines':
+            return self.klines(params)
+        
+        if path == '/api/v3/ticker/price':
+            if 'symbol' in params:
+                return {'symbol': params['symbol'], 'price': f"{float(self.get_series(params['symbol'], '5m')['close'][-1]):.8f}"}
+            return [{'symbol': symbol, 'price': f"{float(self.get_series(symbol, '5m')['close'][-1]):.8f}"} for symbol in self.symbols]
+        
+        if path == '/api/v3/ticker/24hr':
+            if 'symbol' in params:
+                return self.ticker_24hr(params['symbol'])
+            return [self.ticker_24hr(symbol) for symbol in self.symbols]
+        
+        if path == '/api/v3/order' and method == 'POST':
+            with self.lock:
+                self.stats['orders'] += 1
+                order_id = self.stats['orders']
+            price = float(self.get_series(params['symbol'], '5m')['close'][-1])
+            quantity = params.get('quantity', '0')
+            return {
+                'symbol': params['symbol'], 'orderId': order_id, 'status': 'FILLED',
+                'side': params.get('side'), 'type': params.get('type'), 'executedQty': quantity,
+                'fills': [{'price': f"{price:.8f}", 'qty': quantity}]
+            }
+        
+        return None
+    
+    def start(self):
+        """تشغيل الخادم في الخلفية"""
+        exchange = self
+        
+        class ExchangeHandler(BaseHTTPRequestHandler):
+            def respond(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-MBX-USED-WEIGHT-1M', str(exchange.used_weight))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def dispatch(self, method):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                
+                status, retry_after = exchange.charge(url.path, params)
+                if status != 200:
+                    self.respond(status, {'code': -1003, 'msg': 'Too many requests.'},
+                                 {'Retry-After': str(max(int(retry_after + 0.999), 1))})
+                    return
+                
+                if exchange.latency:
+                    time.sleep(exchange.latency)
+                
+                try:
+                    payload = exchange.handle(method, url.path, params)
+                except (KeyError, ValueError) as e:
+                    self.respond(400, {'code': -1102, 'msg': f"Invalid parameter: {e}"})
+                    return
+                
+                if payload is None:
+                    self.respond(404, {'code': -1000, 'msg': 'Unknown endpoint'})
+                else:
+                    self.respond(200, payload)
+            
+            def do_GET(self):
+                self.dispatch('GET')
+            
+            def do_POST(self):
+                self.dispatch('POST')
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = MockExchangeHTTPServer((self.host, self.port), ExchangeHandler)
+        self.port = self.server.server_address[1]
+        
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-exchange', daemon=True)
+        self.thread.start()
+        print(f"🧪 Mock exchange serving {len(self.symbols)} symbols on {self.base_url}")
+        return self.base_url
+    
+    def stop(self):
+        """إيقاف الخادم"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
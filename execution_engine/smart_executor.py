@@ -1,12 +1,26 @@
 import time
 import random
-from datetime import datetime
-import pandas as pd
 import numpy as np
 
+import clock
+from market_scanner.candle_store import CandleStore, candles_to_frame, interval_to_seconds
+from market_scanner.candle_resampler import TimeframeResampler
+from market_scanner.market_simulator import SyntheticMarket
+from market_scanner.market_cache import MarketDataCache
+
 class SmartExecutor:
-    def __init__(self, mode='paper_trading'):
+    def __init__(self, mode='paper_trading', candle_store=None, client=None, base_interval='5m',
+                 market_simulator=None, market_cache=None, live_price_max_age=60):
         self.mode = mode
+        self.client = client
+        self.market_cache = market_cache if market_cache is not None else MarketDataCache()
+        self.market_simulator = market_simulator if market_simulator is not None else SyntheticMarket()
+        self.candle_store = candle_store if candle_store is not None else CandleStore()
+        self.resampler = TimeframeResampler(self.candle_store, base_interval)
+        self.max_klines_per_request = 1000
+        # آخر سعر من البث مع وقت استلامه: يُستخدم فقط ما دام أحدث من live_price_max_age ثانية
+        self.live_prices = {}
+        self.live_price_max_age = live_price_max_age
         self.execution_history = []
         self.performance_metrics = {
             'success_rate': 0,
@@ -17,7 +31,7 @@ class SmartExecutor:
         
     def execute_trade(self, symbol, direction, amount, stop_loss, take_profit):
         """تنفيذ صفقة ذكي مع إدارة متقدمة"""
-        execution_start = datetime.now()
+        execution_start = time.perf_counter()
         
         try:
             # 1. التحضير للتنفيذ
@@ -43,9 +57,9 @@ class SmartExecutor:
                 )
             
             # 4. تسجيل التنفيذ
-            execution_time = (datetime.now() - execution_start).total_seconds()
+            execution_time = time.perf_counter() - execution_start
             execution_record = {
-                'timestamp': datetime.now(),
+                'timestamp': clock.now(),
                 'symbol': symbol,
                 'direction': direction,
                 'amount': amount,
@@ -133,7 +147,7 @@ class SmartExecutor:
         }
         
         # فحص أوقات التقلب العالي (مثل إعلانات الأخبار)
-        current_hour = datetime.now().hour
+        current_hour = clock.now().hour
         if current_hour in [14, 15]:  # وقت إعلانات أمريكية
             conditions['unfavorable'] = True
             conditions['message'] = 'وقت إعلانات رئيسية - تجنب التداول'
@@ -154,8 +168,28 @@ class SmartExecutor:
         
         return optimal_price
     
+    def on_stream_candle(self, symbol, interval, candle):
+        """تحديث آخر سعر من البث اللحظي (مشترك في أحداث KlineStream)"""
+        self.live_prices[symbol] = (candle[4], clock.timestamp())
+    
+    def drop_live_price(self, symbol):
+        """نسيان سعر البث لعملة خرجت من البث"""
+        self.live_prices.pop(symbol, None)
+    
     def get_current_market_price(self, symbol):
         """الحصول على السعر السوقي الحالي"""
+        # السعر اللحظي من البث إن توفر وكان حديثاً (انقطاع البث يعيدنا للمسار العادي)
+        live = self.live_prices.get(symbol)
+        if live is not None and clock.timestamp() - live[1] <= self.live_price_max_age:
+            return live[0]
+        
+        return self.market_cache.get_price(symbol, lambda: self.fetch_current_price(symbol))
+    
+    def fetch_current_price(self, symbol):
+        """جلب السعر من البورصة (أو محاكاته) بدون ذاكرة مؤقتة"""
+        if self.client is not None:
+            return float(self.client.get_symbol_ticker(symbol=symbol)['price'])
+        
         # في التطبيق الحقيقي، نستخدم API البورصة
         # هنا نعيد سعرًا عشوائيًا واقعيًا
         price_ranges = {
@@ -338,29 +372,94 @@ class SmartExecutor:
             self.performance_metrics['avg_execution_time'] = np.mean([e['execution_time'] for e in successful_executions])
     
     def get_market_data(self, symbol, interval='1h', limit=100):
-        """جلب بيانات السوق (محاكاة)"""
-        # في التطبيق الحقيقي، نستخدم API البورصة
-        dates = pd.date_range(end=datetime.now(), periods=limit, freq=interval)
+        """جلب بيانات السوق من مخزن الشموع المحلي بعد مزامنته"""
+        return candles_to_frame(self.get_candle_window(symbol, interval, limit))
+    
+    def get_candle_window(self, symbol, interval='1h', limit=100):
+        """آخر limit شمعة كعروض بدون نسخ على المخزن المحلي"""
+        def load():
+            self.sync_candles(symbol, interval, limit)
+            return self.candle_store.get_window(symbol, interval, limit)
+        
+        window = self.market_cache.get_candles(symbol, interval, limit, load)
+        self.remember_last_price(symbol, window)
+        return window
+    
+    def get_timeframe_windows(self, symbol, limits):
+        """كل الأطر الزمنية المطلوبة من سلسلة أساسية واحدة (طلب واحد بدل طلب لكل إطار)"""
+        def load():
+            self.sync_candles(symbol, self.resampler.base_interval, self.resampler.base_limit(limits))
+            return {
+                interval: self.resampler.get_window(symbol, interval, limit)
+                for interval, limit in limits.items()
+            }
         
-        # محاكاة بيانات واقعية
-        base_price = self.get_current_market_price(symbol)
-        prices = [base_price]
-        
-        for i in range(1, limit):
-            change = random.normalvariate(0, 0.002)  # تقلب 0.2%
-            new_price = prices[-1] * (1 + change)
-            prices.append(new_price)
-        
-        df = pd.DataFrame({
-            'open': [p * random.uniform(0.998, 1.002) for p in prices],
-            'high': [p * random.uniform(1.001, 1.005) for p in prices],
-            'low': [p * random.uniform(0.995, 0.999) for p in prices],
-            'close': prices,
-            'volume': [random.uniform(1000, 10000) for _ in prices],
-            'timestamp': dates
-        })
-        
-        return df
+        windows = self.market_cache.get_timeframes(symbol, limits, load)
+        self.remember_last_price(symbol, windows.get(self.resampler.base_interval))
+        return windows
+    
+    def remember_last_price(self, symbol, window):
+        """آخر إغلاق في البيانات المجلوبة يصبح السعر الحالي المشترك (لا حاجة لطلب سعر منفصل)"""
+        if window is not None and len(window['close']):
+            self.market_cache.set_price(symbol, float(window['close'][-1]))
+    
+    def sync_candles(self, symbol, interval, limit):
+        """مزامنة المخزن: تعبئة أولية ثم جلب الشموع الأحدث فقط"""
+        interval_ms = interval_to_seconds(interval) * 1000
+        current_open = int(clock.timestamp() * 1000) // interval_ms * interval_ms
+        backfill_start = current_open - (limit - 1) * interval_ms
+        last_ts = self.candle_store.last_timestamp(symbol, interval)
+        
+        if last_ts is not None and self.candle_store.length(symbol, interval) < limit:
+            # المخزن بإلحاق فقط: إن لم يغطِّ النافذة المطلوبة نعيد بناء السلسلة مرة واحدة
+            first_ts = int(self.candle_store.get_window(symbol, interval)['timestamp'][0])
+            if first_ts > backfill_start:
+                self.candle_store.reset(symbol, interval)
+                last_ts = None
+        
+        if last_ts is None:
+            # تعبئة أولية كاملة
+            start_time = backfill_start
+        else:
+            # الشمعة الأخيرة قد تكون غير مكتملة فنعيد جلبها مع ما بعدها
+            start_time = last_ts
+        
+        fetched = 0
+        while start_time <= current_open:
+            count = min((current_open - start_time) // interval_ms + 1, self.max_klines_per_request)
+            candles = self.fetch_klines(symbol, interval, count, start_time)
+            if len(candles['timestamp']) == 0:
+                break
+            
+            self.candle_store.upsert(symbol, interval, candles)
+            fetched += len(candles['timestamp'])
+            start_time = int(candles['timestamp'][-1]) + interval_ms
+        
+        return fetched
+    
+    def fetch_klines(self, symbol, interval, limit, start_time):
+        """جلب شموع من البورصة ابتداءً من start_time (بالمللي ثانية)"""
+        if self.client is not None:
+            klines = self.client.get_klines(symbol=symbol, interval=interval, limit=limit, startTime=start_time)
+            rows = np.array([[float(value) for value in k[:6]] for k in klines]).reshape(-1, 6)
+            return {
+                'timestamp': rows[:, 0].astype(np.int64),
+                'open': rows[:, 1],
+                'high': rows[:, 2],
+                'low': rows[:, 3],
+                'close': rows[:, 4],
+                'volume': rows[:, 5]
+            }
+        
+        return self.simulate_klines(symbol, interval, limit, start_time)
+    
+    def simulate_klines(self, symbol, interval, limit, start_time):
+        """محاكاة شموع واقعية تكمل من آخر سعر مخزن"""
+        # الاستمرار من آخر إغلاق مخزن للحفاظ على اتصال السلسلة
+        last_window = self.candle_store.get_window(symbol, interval, 1)
+        base_price = float(last_window['close'][-1]) if len(last_window['close']) else self.get_current_market_price(symbol)
+        
+        return self.market_simulator.generate_series(limit, base_price, interval=interval, start_time=start_time)
     
     def get_execution_analytics(self):
         """الحصول على تحليلات التنفيذ"""
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+
+from market_scanner.candle_store import CandleStore, empty_candles, interval_to_seconds
+
+def resample_candles(candles, target_interval, drop_leading_partial=False):
+    """تجميع شموع إطار أصغر إلى إطار أكبر مع محاذاة حدود الشمعة"""
+    timestamps = np.asarray(candles['timestamp'], dtype=np.int64)
+    if len(timestamps) == 0:
+        return empty_candles()
+    
+    target_ms = interval_to_seconds(target_interval) * 1000
+    buckets = timestamps // target_ms * target_ms
+    
+    # بداية كل مجموعة (الشموع مرتبة زمنياً)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    
+    if drop_leading_partial and len(starts) > 1 and timestamps[0] != buckets[0]:
+        # أول شمعة مجمعة ينقصها بداية الفترة فلا نعتمدها
+        first = starts[1]
+        return resample_candles({column: values[first:] for column, values in candles.items()}, target_interval)
+    
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+    
+    return {
+        'timestamp': buckets[starts],
+        'open': np.asarray(candles['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(candles['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(candles['low']), starts),
+        'close': np.asarray(candles['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(candles['volume']), starts)
+    }
+
+class TimeframeResampler:
+    """بناء الأطر الزمنية الأكبر محلياً من سلسلة أساسية واحدة
+    
+    الشموع المشتقة تُخزن في مخزن منفصل وتُحدث تزايدياً: في كل دورة
+    نعيد تجميع الشموع الأساسية منذ بداية آخر شمعة مشتقة فقط، فتتحدث
+    الشمعة الحالية غير المكتملة وتُلحق الجديدة.
+    """
+    
+    def __init__(self, candle_store, base_interval='5m', derived_store=None):
+        self.candle_store = candle_store
+        self.base_interval = base_interval
+        self.derived_store = derived_store if derived_store is not None else CandleStore(
+            os.path.join(candle_store.base_dir, 'derived')
+        )
+    
+    def base_limit(self, limits):
+        """عدد الشموع الأساسية اللازم لتغطية كل الأطر المطلوبة"""
+        base_seconds = interval_to_seconds(self.base_interval)
+        needed = [
+            (interval_to_seconds(interval) // base_seconds) * (limit + 1)
+            for interval, limit in limits.items()
+        ]
+        return max(needed)
+    
+    def update(self, symbol, target_interval):
+        """تحديث الإطار المشتق من الشموع الأساسية الجديدة فقط"""
+        last_ts = self.derived_store.last_timestamp(symbol, target_interval)
+        base = self.candle_store.get_range(symbol, self.base_interval, start_time=last_ts)
+        
+        if len(base['timestamp']) == 0:
+            return 0
+        
+        if last_ts is not None and int(base['timestamp'][0]) > last_ts + interval_to_seconds(target_interval) * 1000:
+            # السلسلة الأساسية أعيد بناؤها ولا تتصل بالمشتقة: إعادة اشتقاق كاملة
+            self.derived_store.reset(symbol, target_interval)
+            last_ts = None
+            base = self.candle_store.get_window(symbol, self.base_interval)
+        
+        derived = resample_candles(base, target_interval, drop_leading_partial=last_ts is None)
+        return self.derived_store.upsert(symbol, target_interval, derived)
+    
+    def get_window(self, symbol, interval, limit):
+        """نافذة إطار زمني (الأساسي مباشرة أو المشتق بعد تحديثه)"""
+        if interval == self.base_interval:
+            return self.candle_store.get_window(symbol, interval, limit)
+        
+        self.update(symbol, interval)
+        return self.derived_store.get_window(symbol, interval, limit)
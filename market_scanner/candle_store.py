@@ -0,0 +1,204 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# مدة كل إطار زمني بالثواني (نفس رموز Binance)
+INTERVAL_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '8h': 28800,
+    '12h': 43200, '1d': 86400
+}
+
+# أعمدة الشموع ونوع تخزين كل عمود (الطابع الزمني بالمللي ثانية مثل Binance)
+CANDLE_COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64
+}
+
+def interval_to_seconds(interval):
+    """تحويل رمز الإطار الزمني إلى ثوانٍ"""
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return INTERVAL_SECONDS[interval]
+
+def empty_candles():
+    """مجموعة شموع فارغة بنفس أعمدة المخزن"""
+    return {column: np.empty(0, dtype=dtype) for column, dtype in CANDLE_COLUMNS.items()}
+
+def candles_to_frame(candles):
+    """تحويل نافذة شموع إلى DataFrame بالشكل الذي تتوقعه أنظمة التحليل"""
+    return pd.DataFrame({
+        'open': candles['open'],
+        'high': candles['high'],
+        'low': candles['low'],
+        'close': candles['close'],
+        'volume': candles['volume'],
+        'timestamp': pd.to_datetime(candles['timestamp'], unit='ms')
+    })
+
+class CandleStore:
+    """مخزن شموع عمودي على القرص بإلحاق فقط لكل (عملة، إطار زمني)
+    
+    كل عمود ملف ثنائي مستقل يُقرأ عبر np.memmap، فالنوافذ المعادة
+    هي عروض (views) على الملف بدون نسخ.
+    """
+    
+    def __init__(self, base_dir='data/candles'):
+        self.base_dir = base_dir
+        self._maps = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        
+        os.makedirs(self.base_dir, exist_ok=True)
+    
+    def _lock(self, symbol, interval):
+        """قفل خاص بكل سلسلة لحماية الكتابة من خيوط المسح المتزامن"""
+        key = (symbol, interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.RLock()
+            return self._locks[key]
+    
+    def series_path(self, symbol, interval):
+        """مسار مجلد السلسلة"""
+        return os.path.join(self.base_dir, f"{symbol}_{interval}")
+    
+    def column_path(self, symbol, interval, column):
+        """مسار ملف العمود"""
+        dtype = np.dtype(CANDLE_COLUMNS[column])
+        return os.path.join(self.series_path(symbol, interval), f"{column}.{dtype.str[1:]}")
+    
+    def length(self, symbol, interval):
+        """عدد الشموع المخزنة"""
+        with self._lock(symbol, interval):
+            return self._repair(symbol, interval)
+    
+    def _repair(self, symbol, interval):
+        """توحيد أطوال الأعمدة بعد أي كتابة مقطوعة"""
+        lengths = []
+        for column, dtype in CANDLE_COLUMNS.items():
+            path = self.column_path(symbol, interval, column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // np.dtype(dtype).itemsize)
+        
+        length = min(lengths)
+        if max(lengths) != length:
+            for column, dtype in CANDLE_COLUMNS.items():
+                path = self.column_path(symbol, interval, column)
+                if os.path.exists(path):
+                    with open(path, 'r+b') as f:
+                        f.truncate(length * np.dtype(dtype).itemsize)
+            self._maps.pop((symbol, interval), None)
+        
+        return length
+    
+    def last_timestamp(self, symbol, interval):
+        """آخر طابع زمني مخزن أو None"""
+        window = self.get_window(symbol, interval, 1)
+        if len(window['timestamp']) == 0:
+            return None
+        return int(window['timestamp'][-1])
+    
+    def upsert(self, symbol, interval, candles):
+        """إضافة الشموع الأحدث فقط مع تحديث آخر شمعة إن كانت جزئية"""
+        timestamps = np.asarray(candles['timestamp'], dtype=np.int64)
+        if len(timestamps) == 0:
+            return 0
+        
+        with self._lock(symbol, interval):
+            os.makedirs(self.series_path(symbol, interval), exist_ok=True)
+            length = self._repair(symbol, interval)
+            last_ts = self.last_timestamp(symbol, interval) if length else None
+            
+            start = 0
+            if last_ts is not None:
+                # تجاهل ما هو مخزن مسبقاً
+                start = int(np.searchsorted(timestamps, last_ts, side='left'))
+                
+                # الشمعة الحالية غير المكتملة: تحديث في مكانها
+                if start < len(timestamps) and timestamps[start] == last_ts:
+                    for column, dtype in CANDLE_COLUMNS.items():
+                        value = np.asarray(candles[column][start:start + 1], dtype=dtype)
+                        with open(self.column_path(symbol, interval, column), 'r+b') as f:
+                            f.seek(-value.nbytes, os.SEEK_END)
+                            f.write(value.tobytes())
+                    start += 1
+            
+            appended = len(timestamps) - start
+            if appended > 0:
+                for column, dtype in CANDLE_COLUMNS.items():
+                    values = np.ascontiguousarray(candles[column][start:], dtype=dtype)
+                    with open(self.column_path(symbol, interval, column), 'ab') as f:
+                        f.write(values.tobytes())
+                
+                self._maps.pop((symbol, interval), None)
+            
+            return appended
+    
+    def reset(self, symbol, interval):
+        """حذف سلسلة بالكامل (لإعادة التعبئة بتاريخ أطول)"""
+        with self._lock(symbol, interval):
+            self._maps.pop((symbol, interval), None)
+            for column in CANDLE_COLUMNS:
+                path = self.column_path(symbol, interval, column)
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def _column_maps(self, symbol, interval):
+        """خرائط الذاكرة للأعمدة (تُعاد بناؤها فقط عند تغير الطول)"""
+        key = (symbol, interval)
+        length = self._repair(symbol, interval)
+        
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == length:
+            return cached[1]
+        
+        if length == 0:
+            maps = empty_candles()
+        else:
+            maps = {
+                column: np.memmap(self.column_path(symbol, interval, column),
+                                  dtype=dtype, mode='r', shape=(length,))
+                for column, dtype in CANDLE_COLUMNS.items()
+            }
+        
+        self._maps[key] = (length, maps)
+        return maps
+    
+    def get_window(self, symbol, interval, limit=None):
+        """آخر limit شمعة كعروض بدون نسخ على ملفات المخزن"""
+        with self._lock(symbol, interval):
+            maps = self._column_maps(symbol, interval)
+        
+        if limit is None:
+            return dict(maps)
+        return {column: values[-limit:] if limit > 0 else values[:0] for column, values in maps.items()}
+    
+    def get_range(self, symbol, interval, start_time=None, end_time=None):
+        """الشموع ضمن نطاق زمني (للتعلم والاختبار الرجعي)"""
+        window = self.get_window(symbol, interval)
+        timestamps = window['timestamp']
+        
+        lo = int(np.searchsorted(timestamps, start_time, side='left')) if start_time is not None else 0
+        hi = int(np.searchsorted(timestamps, end_time, side='right')) if end_time is not None else len(timestamps)
+        
+        return {column: values[lo:hi] for column, values in window.items()}
+    
+    def symbols(self, interval=None):
+        """العملات والأطر المخزنة"""
+        series = []
+        if not os.path.isdir(self.base_dir):
+            return series
+        
+        for name in sorted(os.listdir(self.base_dir)):
+            symbol, _, series_interval = name.rpartition('_')
+            if symbol and series_interval in INTERVAL_SECONDS:
+                if interval is None or series_interval == interval:
+                    series.append((symbol, series_interval))
+        
+        return series
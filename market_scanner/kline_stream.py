@@ -0,0 +1,459 @@
+import json
+import time
+import socket
+import threading
+import socketserver
+from datetime import timedelta
+import numpy as np
+
+import clock
+
+from market_scanner.candle_store import CANDLE_COLUMNS, empty_candles, interval_to_seconds
+from market_scanner.candle_resampler import resample_candles
+from market_scanner.market_simulator import SyntheticMarket
+from market_scanner.ring_buffer import CandleRingBuffer
+
+def parse_kline_message(message):
+    """تحويل رسالة kline بصيغة Binance إلى (عملة، إطار، شمعة، مغلقة؟)"""
+    # رسائل البث المتعدد تكون مغلفة بـ {'stream': ..., 'data': ...}
+    if 'data' in message and 'stream' in message:
+        message = message['data']
+    
+    if message.get('e') != 'kline':
+        return None
+    
+    k = message['k']
+    candle = (
+        int(k['t']),
+        float(k['o']),
+        float(k['h']),
+        float(k['l']),
+        float(k['c']),
+        float(k['v'])
+    )
+    return message['s'], k['i'], candle, bool(k['x'])
+
+class KlineStream:
+    """استقبال الشموع لحظياً عبر البث بدل الاستعلام الدوري
+    
+    يحتفظ بآخر الشموع المغلقة لكل عملة في الذاكرة مع الشمعة الحالية
+    غير المكتملة، ويحفظ الشموع المغلقة في مخزن الشموع، ويبلغ المشتركين
+    عند كل تحديث أو إغلاق شمعة.
+    
+    backfill(symbol, interval, limit, start_time) يجلب الشموع الناقصة عبر REST
+    عندما تقفز الرسائل فوق شموع (بعد إعادة الاتصال مثلاً)، فلا تُلحق شمعة
+    بالذاكرة أو المخزن إلا والسلسلة قبلها متصلة.
+    """
+    
+    def __init__(self, symbols, interval='5m', history=1500, candle_store=None,
+                 backfill=None, backfill_retry_seconds=5.0, max_backfill_bars=1000):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.interval_ms = interval_to_seconds(interval) * 1000
+        self.history = history
+        self.candle_store = candle_store
+        self.backfill = backfill
+        self.backfill_retry_seconds = backfill_retry_seconds
+        self.max_backfill_bars = max_backfill_bars
+        self.backfill_retry_at = {}
+        
+        # مخزن حلقي لكل عملة؛ آخر عنصر فيه قد يكون الشمعة الجارية غير المكتملة
+        self.buffers = {symbol: CandleRingBuffer(history) for symbol in self.symbols}
+        self.partial = {}
+        self.last_update = {}
+        
+        self.subscribers = {'update': [], 'close': []}
+        self.lock = threading.Lock()
+        self.bar_closed = threading.Condition(self.lock)
+        self.bar_close_count = 0
+        
+        self.running = False
+        self.source = None
+        self.worker = None
+        self.socket_manager = None
+        self.socket_name = None
+        
+        self.stats = {'messages': 0, 'bars_closed': 0, 'errors': 0, 'reconnects': 0, 'backfilled': 0}
+    
+    def subscribe(self, callback, event='close'):
+        """الاشتراك في أحداث البث: 'close' عند إغلاق الشمعة أو 'update' مع كل تحديث"""
+        if event not in self.subscribers:
+            raise ValueError(f"Unknown stream event: {event}")
+        self.subscribers[event].append(callback)
+    
+    def seed_history(self, symbol, candles):
+        """تعبئة الذاكرة بتاريخ سابق (من المخزن أو REST) قبل بدء البث"""
+        # الشمعة الجارية لم تغلق بعد وسيكملها البث
+        interval_ms = interval_to_seconds(self.interval) * 1000
+        current_open = int(clock.timestamp() * 1000) // interval_ms * interval_ms
+        
+        with self.lock:
+            if self.partial.get(symbol):
+                # البث بدأ فعلاً لهذه العملة ولا يمكن الإدراج قبل شمعته الجارية
+                return
+            
+            buffer = self.buffer(symbol)
+            timestamps = np.asarray(candles['timestamp'])
+            closed = timestamps < current_open
+            if buffer.last_timestamp is not None:
+                closed &= timestamps > buffer.last_timestamp
+            buffer.extend({column: np.asarray(values)[closed] for column, values in candles.items()})
+    
+    def buffer(self, symbol):
+        """المخزن الحلقي للعملة"""
+        if symbol not in self.buffers:
+            self.buffers[symbol] = CandleRingBuffer(self.history)
+        return self.buffers[symbol]
+    
+    def missing_start(self, symbol, open_time):
+        """أول شمعة ناقصة قبل open_time أو None إن كانت السلسلة متصلة (تحت القفل)"""
+        last_ts = self.buffer(symbol).last_timestamp
+        if last_ts is None or open_time <= last_ts:
+            return None
+        if self.partial.get(symbol):
+            # رسالة إغلاق الشمعة الجارية لم تصل: تُجلب من جديد مع ما بعدها
+            return last_ts
+        if open_time > last_ts + self.interval_ms:
+            return last_ts + self.interval_ms
+        return None
+    
+    def fetch_gap(self, symbol, start, open_time):
+        """الشموع من start حتى ما قبل open_time عبر REST (بدفعات)"""
+        chunks = []
+        while start < open_time:
+            count = min((open_time - start) // self.interval_ms, self.max_backfill_bars)
+            candles = self.backfill(symbol, self.interval, count, start)
+            if len(candles['timestamp']) == 0:
+                break
+            chunks.append(candles)
+            start = int(candles['timestamp'][-1]) + self.interval_ms
+        
+        if not chunks:
+            return empty_candles()
+        return {column: np.concatenate([np.asarray(chunk[column]) for chunk in chunks]) for column in CANDLE_COLUMNS}
+    
+    def fill_gap(self, symbol, start, open_time):
+        """ملء الشموع الناقصة قبل open_time في الذاكرة والمخزن؛ False إن بقيت السلسلة منقطعة"""
+        now = clock.timestamp()
+        if self.backfill is None or now < self.backfill_retry_at.get(symbol, 0):
+            return False
+        
+        try:
+            candles = self.fetch_gap(symbol, start, open_time)
+        except Exception as e:
+            candles = None
+            print(f"⚠️ Stream backfill failed for {symbol}: {e}")
+        
+        # المقبول فقط سلسلة كاملة بلا ثغرات حتى الشمعة الجديدة
+        if candles is not None:
+            closed = np.asarray(candles['timestamp']) < open_time
+            candles = {column: np.asarray(values)[closed] for column, values in candles.items()}
+            expected = np.arange(start, open_time, self.interval_ms, dtype=np.int64)
+        if candles is None or not np.array_equal(candles['timestamp'], expected):
+            self.stats['errors'] += 1
+            self.backfill_retry_at[symbol] = now + self.backfill_retry_seconds
+            return False
+        
+        with self.lock:
+            if self.missing_start(symbol, open_time) != start:
+                # تغيرت الذاكرة أثناء الجلب: يُعاد الفحص مع الرسالة التالية
+                return False
+            self.buffer(symbol).sync(candles)
+            self.partial[symbol] = False
+            self.stats['backfilled'] += len(expected)
+        
+        if self.candle_store is not None:
+            self.candle_store.upsert(symbol, self.interval, candles)
+        self.backfill_retry_at.pop(symbol, None)
+        print(f"🩹 Stream gap filled for {symbol}: {len(expected)} bars")
+        return True
+    
+    def handle_message(self, message):
+        """معالجة رسالة بث واحدة"""
+        try:
+            if isinstance(message, (str, bytes)):
+                message = json.loads(message)
+            
+            if message.get('e') == 'error':
+                self.stats['errors'] += 1
+                print(f"⚠️ Stream error: {message.get('m')}")
+                return
+            
+            parsed = parse_kline_message(message)
+            if parsed is None:
+                return
+            
+            symbol, interval, candle, is_closed = parsed
+            if interval != self.interval:
+                return
+            
+            with self.lock:
+                gap_start = self.missing_start(symbol, candle[0])
+            if gap_start is not None and not self.fill_gap(symbol, gap_start, candle[0]):
+                # السلسلة منقطعة: الشمعة لا تُلحق حتى يُملأ النقص، فيتقادم البث لهذه
+                # العملة ويعود البوت لـ REST الذي يكمل المخزن من آخر شمعة متصلة
+                return
+            
+            with self.lock:
+                self.stats['messages'] += 1
+                self.last_update[symbol] = clock.timestamp()
+                buffer = self.buffer(symbol)
+                last_ts = buffer.last_timestamp
+                
+                if last_ts is not None and candle[0] < last_ts:
+                    # رسالة متأخرة لشمعة أقدم (مثلاً بعد إعادة الاتصال)
+                    return
+                
+                if candle[0] == last_ts:
+                    if not self.partial.get(symbol):
+                        # تحديث أو إغلاق مكرر لشمعة مغلقة مسبقاً
+                        return
+                    buffer.update_last(candle)
+                else:
+                    buffer.append(candle)
+                
+                self.partial[symbol] = not is_closed
+                if is_closed:
+                    self.stats['bars_closed'] += 1
+                    self.bar_close_count += 1
+                    self.bar_closed.notify_all()
+            
+            if is_closed and self.candle_store is not None:
+                self.candle_store.upsert(symbol, interval, {
+                    column: np.array([value], dtype=dtype)
+                    for (column, dtype), value in zip(CANDLE_COLUMNS.items(), candle)
+                })
+            
+            for callback in self.subscribers['close' if is_closed else 'update']:
+                callback(symbol, interval, candle)
+        
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"⚠️ Stream message error: {e}")
+    
+    def has_data(self, symbol, max_staleness=None):
+        """هل لدى البث بيانات حديثة لهذه العملة؟"""
+        with self.lock:
+            if symbol not in self.buffers or len(self.buffers[symbol]) == 0:
+                return False
+            if max_staleness is None:
+                return True
+            return clock.timestamp() - self.last_update.get(symbol, 0) <= max_staleness
+    
+    def latest_price(self, symbol):
+        """آخر سعر معروف من البث"""
+        with self.lock:
+            buffer = self.buffers.get(symbol)
+            if buffer is None or len(buffer) == 0:
+                return None
+            return float(buffer.window(1)['close'][-1])
+    
+    def get_window(self, symbol, limit=None, include_partial=True):
+        """آخر الشموع من الذاكرة (المغلقة + الحالية غير المكتملة)
+        
+        تُعاد نسخة متصلة لأن خيط البث يكتب في المخزن الحلقي باستمرار.
+        """
+        with self.lock:
+            buffer = self.buffers.get(symbol)
+            if buffer is None:
+                return empty_candles()
+            
+            drop_partial = not include_partial and self.partial.get(symbol, False)
+            count = None if limit is None else limit + int(drop_partial)
+            window = buffer.window(count)
+            end = len(window) - int(drop_partial)
+            return {column: values[:end].copy() for column, values in window.columns.items()}
+    
+    def get_timeframe_windows(self, symbol, limits):
+        """كل الأطر الزمنية للعملة من الذاكرة بدون أي طلب شبكي"""
+        base_seconds = interval_to_seconds(self.interval)
+        base_limit = max(
+            (interval_to_seconds(interval) // base_seconds) * (limit + 1)
+            for interval, limit in limits.items()
+        )
+        base = self.get_window(symbol, base_limit)
+        
+        windows = {}
+        for interval, limit in limits.items():
+            candles = base if interval == self.interval else resample_candles(base, interval, drop_leading_partial=True)
+            windows[interval] = {column: values[-limit:] for column, values in candles.items()}
+        return windows
+    
+    def wait_for_bar_close(self, timeout=None):
+        """انتظار إغلاق شمعة جديدة (أو انتهاء المهلة)"""
+        with self.bar_closed:
+            seen = self.bar_close_count
+            self.bar_closed.wait_for(lambda: self.bar_close_count > seen or not self.running, timeout=timeout)
+            return self.bar_close_count > seen
+    
+    def start_binance(self, api_key='', api_secret='', testnet=False):
+        """البث من Binance عبر websocket متعدد القنوات"""
+        from binance import ThreadedWebsocketManager
+        
+        self.socket_manager = ThreadedWebsocketManager(api_key=api_key, api_secret=api_secret, testnet=testnet)
+        self.socket_manager.start()
+        self.running = True
+        self.source = 'binance'
+        self.subscribe_binance_streams()
+    
+    def subscribe_binance_streams(self):
+        """فتح قناة متعددة لكل العملات الحالية (تغلق القناة السابقة إن وجدت)"""
+        streams = [f"{symbol.lower()}@kline_{self.interval}" for symbol in self.symbols]
+        if self.socket_name is not None:
+            self.socket_manager.stop_socket(self.socket_name)
+        self.socket_name = self.socket_manager.start_multiplex_socket(callback=self.handle_message, streams=streams)
+        print(f"📡 Kline stream connected to Binance ({len(streams)} streams)")
+    
+    def set_symbols(self, symbols):
+        """تغيير العملات المبثوثة (مثلاً عند تحديث القائمة المختصرة) وإرجاع العملات الجديدة
+        
+        بيانات العملات التي خرجت تبقى في الذاكرة فتعود جاهزة إن رجعت للقائمة.
+        """
+        symbols = list(symbols)
+        added = [symbol for symbol in symbols if symbol not in self.symbols]
+        if not added and set(symbols) == set(self.symbols):
+            return []
+        
+        self.symbols = symbols
+        if self.socket_manager is not None:
+            self.subscribe_binance_streams()
+        return added
+    
+    def start_local(self, host='127.0.0.1', port=8765):
+        """البث من خادم تغذية محلي (أسطر JSON عبر TCP)"""
+        self.running = True
+        self.source = f"{host}:{port}"
+        self.worker = threading.Thread(
+            target=self._local_reader, args=(host, port), name='kline-stream', daemon=True
+        )
+        self.worker.start()
+        print(f"📡 Kline stream connected to local feed {host}:{port}")
+    
+    def _local_reader(self, host, port):
+        """قراءة الرسائل مع إعادة اتصال تلقائية"""
+        backoff = 0.5
+        while self.running:
+            try:
+                with socket.create_connection((host, port), timeout=10) as connection:
+                    connection.settimeout(None)
+                    backoff = 0.5
+                    for line in connection.makefile('r', encoding='utf-8'):
+                        if not self.running:
+                            break
+                        if line.strip():
+                            self.handle_message(line)
+            except OSError as e:
+                if not self.running:
+                    break
+                self.stats['reconnects'] += 1
+                print(f"⚠️ Kline stream disconnected ({e}) - reconnecting in {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+    
+    def stop(self):
+        """إيقاف البث"""
+        self.running = False
+        with self.bar_closed:
+            self.bar_closed.notify_all()
+        
+        if self.socket_manager is not None:
+            self.socket_manager.stop()
+            self.socket_manager = None
+            self.socket_name = None
+        
+        print("🛑 Kline stream stopped")
+
+class KlineFeedTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class LocalKlineFeedServer:
+    """خادم تغذية محلي يحاكي بث Binance للاختبار
+    
+    يولد شموعاً من SyntheticMarket ويرسل رسائل kline بنفس صيغة Binance
+    (أسطر JSON عبر TCP) بزمن متسارع: كل شمعة ترسل عدة تحديثات جزئية
+    ثم رسالة إغلاق.
+    """
+    
+    def __init__(self, symbols, interval='5m', host='127.0.0.1', port=8765,
+                 bar_seconds=1.0, updates_per_bar=4, seed=42, start_prices=None):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.bar_seconds = bar_seconds
+        self.updates_per_bar = updates_per_bar
+        self.market = SyntheticMarket(seed=seed)
+        self.start_prices = start_prices
+        self.server = None
+        self.thread = None
+    
+    def generate_messages(self, n_bars):
+        """رسائل kline لكل الشموع (تحديثات جزئية ثم إغلاق)"""
+        # أول شمعة تبدأ من الفترة الحالية والزمن يتقدم شمعة كاملة مع كل إغلاق
+        interval_seconds = interval_to_seconds(self.interval)
+        end_time = clock.now() + timedelta(seconds=interval_seconds * (n_bars - 1))
+        candles = self.market.generate_candles(len(self.symbols), n_bars, start_prices=self.start_prices,
+                                               interval=self.interval, end_time=end_time)
+        interval_ms = interval_seconds * 1000
+        
+        for bar in range(n_bars):
+            open_time = int(candles['timestamp'][bar])
+            for step in range(1, self.updates_per_bar + 1):
+                is_closed = step == self.updates_per_bar
+                progress = step / self.updates_per_bar
+                batch = []
+                for i, symbol in enumerate(self.symbols):
+                    o = candles['open'][i, bar]
+                    c = candles['close'][i, bar]
+                    # السعر اللحظي يتحرك من الافتتاح نحو الإغلاق داخل حدود الشمعة
+                    price = c if is_closed else o + (c - o) * progress
+                    batch.append({
+                        'e': 'kline',
+                        'E': open_time + int(interval_ms * progress),
+                        's': symbol,
+                        'k': {
+                            't': open_time,
+                            'T': open_time + interval_ms - 1,
+                            's': symbol,
+                            'i': self.interval,
+                            'o': f"{o:.8f}",
+                            'h': f"{candles['high'][i, bar] if is_closed else max(o, price):.8f}",
+                            'l': f"{candles['low'][i, bar] if is_closed else min(o, price):.8f}",
+                            'c': f"{price:.8f}",
+                            'v': f"{candles['volume'][i, bar] * progress:.8f}",
+                            'x': is_closed
+                        }
+                    })
+                yield batch
+    
+    def start(self, n_bars=10000):
+        """تشغيل الخادم في الخلفية"""
+        feed = self
+        
+        class FeedHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                pause = feed.bar_seconds / feed.updates_per_bar
+                try:
+                    for batch in feed.generate_messages(n_bars):
+                        payload = ''.join(json.dumps(message) + '\n' for message in batch)
+                        self.wfile.write(payload.encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(pause)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+        
+        self.server = KlineFeedTCPServer((self.host, self.port), FeedHandler)
+        self.port = self.server.server_address[1]
+        
+        self.thread = threading.Thread(target=self.server.serve_forever, name='kline-feed', daemon=True)
+        self.thread.start()
+        print(f"🧪 Local kline feed serving {len(self.symbols)} symbols on {self.host}:{self.port}")
+        return self.port
+    
+    def stop(self):
+        """إيقاف الخادم"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
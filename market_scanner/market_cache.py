@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+
+from clock import timestamp
+from market_scanner.candle_store import interval_to_seconds
+
+class MarketDataCache:
+    """ذاكرة مؤقتة مشتركة لبيانات السوق والأسعار بين الماسح والمنفذ
+    
+    - صلاحية الشموع مرتبطة بالإطار الزمني ولا تتجاوز إغلاق الشمعة الحالية
+    - صلاحية قصيرة ثابتة لآخر سعر
+    - إخلاء الأقدم استخداماً (LRU) عند امتلاء السعة
+    - عدادات إصابة/إخفاق لتقرير الدورة
+    """
+    
+    def __init__(self, max_entries=4096, price_ttl=10.0, candle_ttl_fraction=0.1, clock=timestamp):
+        self.max_entries = max_entries
+        self.price_ttl = price_ttl
+        self.candle_ttl_fraction = candle_ttl_fraction
+        self.clock = clock
+        
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+    
+    def candle_ttl(self, interval):
+        """صلاحية بيانات إطار زمني: جزء من مدته وحتى إغلاق الشمعة الحالية كحد أقصى"""
+        interval_seconds = interval_to_seconds(interval)
+        until_close = interval_seconds - (self.clock() % interval_seconds)
+        return max(min(interval_seconds * self.candle_ttl_fraction, until_close), 1.0)
+    
+    def get(self, key):
+        """قراءة قيمة صالحة أو None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self.entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+    
+    def set(self, key, value, ttl):
+        """تخزين قيمة بصلاحية محددة بالثواني"""
+        with self.lock:
+            self.entries[key] = (self.clock() + ttl, value)
+            self.entries.move_to_end(key)
+            
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def get_or_load(self, key, loader, ttl):
+        """القيمة من الذاكرة أو تحميلها مرة واحدة وتخزينها"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+    
+    def get_candles(self, symbol, interval, limit, loader):
+        """نافذة شموع مفتاحها (العملة، الإطار، العدد)"""
+        return self.get_or_load(('candles', symbol, interval, limit), loader, self.candle_ttl(interval))
+    
+    def get_timeframes(self, symbol, limits, loader):
+        """مجموعة أطر زمنية لعملة (مشتقة من سلسلة واحدة)"""
+        key = ('timeframes', symbol, tuple(sorted(limits.items())))
+        ttl = min(self.candle_ttl(interval) for interval in limits)
+        return self.get_or_load(key, loader, ttl)
+    
+    def get_price(self, symbol, loader):
+        """آخر سعر للعملة"""
+        return self.get_or_load(('price', symbol), loader, self.price_ttl)
+    
+    def set_price(self, symbol, price):
+        """تسجيل سعر معروف (مثلاً آخر إغلاق من المسح) لتستخدمه بقية الأنظمة"""
+        if price:
+            self.set(('price', symbol), price, self.price_ttl)
+    
+    def invalidate(self, symbol=None):
+        """حذف المدخلات (لعملة محددة أو الكل)"""
+        with self.lock:
+            if symbol is None:
+                self.entries.clear()
+                return
+            for key in [key for key in self.entries if key[1] == symbol]:
+                del self.entries[key]
+    
+    def get_statistics(self):
+        """إحصائيات الذاكرة المؤقتة"""
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self.entries),
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+            }
+    
+    def reset_statistics(self):
+        """تصفير العدادات (في بداية كل دورة)"""
+        with self.lock:
+            for name in self.stats:
+                self.stats[name] = 0
@@ -0,0 +1,162 @@
+import numpy as np
+
+import clock
+from market_scanner.candle_store import interval_to_seconds
+
+class SyntheticMarket:
+    """محرك سوق اصطناعي متجه بالكامل لمحاكاة واختبارات الحمل
+    
+    - حركة براونية هندسية (GBM) على العوائد اللوغاريتمية
+    - تبديل أنظمة سوقية (صاعد/هابط/عرضي/متقلب) بسلسلة ماركوف
+    - تجمع التقلب عبر تقلب عشوائي لوغاريتمي AR(1)
+    - عوائد مترابطة بين العملات عبر عامل سوق مشترك
+    - مولد أرقام بذرة ثابتة لنتائج قابلة للتكرار
+    """
+    
+    # (الانجراف لكل شمعة، مضاعف التقلب)
+    REGIMES = {
+        'BULL': (0.0004, 1.0),
+        'BEAR': (-0.0004, 1.2),
+        'SIDEWAYS': (0.0, 0.6),
+        'VOLATILE': (0.0, 2.0)
+    }
+    
+    def __init__(self, seed=42, base_volatility=0.002, market_correlation=0.6,
+                 regime_persistence=0.995, volatility_persistence=0.97, volatility_of_volatility=0.08):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.base_volatility = base_volatility
+        self.market_correlation = market_correlation
+        self.regime_persistence = regime_persistence
+        self.volatility_persistence = volatility_persistence
+        self.volatility_of_volatility = volatility_of_volatility
+        
+        self.regime_names = list(self.REGIMES)
+        self.regime_drift = np.array([self.REGIMES[name][0] for name in self.regime_names])
+        self.regime_volatility = np.array([self.REGIMES[name][1] for name in self.regime_names])
+    
+    def reseed(self, seed):
+        """إعادة ضبط المولد للحصول على نفس السلسلة مجدداً"""
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+    
+    def generate_regimes(self, n_bars):
+        """مسار الأنظمة السوقية (مشترك بين كل العملات)"""
+        switches = self.rng.random(n_bars) > self.regime_persistence
+        switches[0] = True
+        segment_ids = np.cumsum(switches) - 1
+        segment_regimes = self.rng.integers(0, len(self.regime_names), size=segment_ids[-1] + 1)
+        return segment_regimes[segment_ids]
+    
+    def _ar1(self, shocks, phi, block=256):
+        """حل متجه لمعادلة AR(1) على المحور الزمني بكتل لتجنب فيضان القوى"""
+        n_bars = shocks.shape[1]
+        result = np.empty_like(shocks)
+        previous = np.zeros(shocks.shape[0], dtype=shocks.dtype)
+        
+        for start in range(0, n_bars, block):
+            segment = shocks[:, start:start + block]
+            k = np.arange(segment.shape[1])
+            growth = (phi ** k).astype(shocks.dtype)
+            # x_t = phi^t * (x_0 * phi + sum_j e_j * phi^-j)
+            partial = np.cumsum(segment / growth, axis=1)
+            partial *= growth
+            partial += previous[:, None] * (growth * phi)
+            result[:, start:start + segment.shape[1]] = partial
+            previous = partial[:, -1]
+        
+        return result
+    
+    def generate_returns(self, n_symbols, n_bars, regimes=None, dtype=np.float64):
+        """عوائد لوغاريتمية مترابطة (عملات × شموع) مع تقلباتها اللحظية"""
+        if regimes is None:
+            regimes = self.generate_regimes(n_bars)
+        
+        # صدمات مترابطة: عامل سوق مشترك + مكون خاص بكل عملة
+        rho = self.market_correlation
+        shocks = self.rng.standard_normal((n_symbols, n_bars), dtype=dtype)
+        shocks *= np.sqrt(1 - rho ** 2)
+        shocks += (rho * self.rng.standard_normal(n_bars, dtype=dtype))
+        
+        # تجمع التقلب: لوغاريتم التقلب يتبع AR(1)
+        vol_shocks = self.rng.standard_normal((n_symbols, n_bars), dtype=dtype)
+        vol_shocks *= self.volatility_of_volatility
+        sigma = np.exp(self._ar1(vol_shocks, self.volatility_persistence))
+        
+        symbol_scale = self.rng.uniform(0.7, 1.6, size=(n_symbols, 1)).astype(dtype)
+        sigma *= symbol_scale * self.base_volatility
+        sigma *= self.regime_volatility[regimes].astype(dtype)
+        
+        # r = (mu - sigma^2 / 2) + sigma * z
+        returns = shocks
+        returns *= sigma
+        returns -= 0.5 * sigma * sigma
+        returns += self.regime_drift[regimes].astype(dtype)
+        
+        return returns, sigma
+    
+    def generate_candles(self, n_symbols, n_bars, start_prices=None, interval='5m',
+                         end_time=None, base_volume=5000.0, dtype=np.float64):
+        """شموع OHLCV متسقة داخلياً بشكل (عملات × شموع)
+        
+        dtype=np.float32 يضاعف السرعة تقريباً لاختبارات الحمل الكبيرة.
+        """
+        if start_prices is None:
+            start_prices = self.rng.lognormal(mean=3.0, sigma=2.0, size=n_symbols)
+        start_prices = np.asarray(start_prices, dtype=dtype).reshape(n_symbols, 1)
+        
+        returns, sigma = self.generate_returns(n_symbols, n_bars, dtype=dtype)
+        
+        # الحجم يرتفع مع حجم الحركة (قبل استهلاك مصفوفة العوائد)
+        volume = np.abs(returns) / sigma
+        volume += 0.5
+        volume *= np.exp(0.3 * self.rng.standard_normal((n_symbols, n_bars), dtype=dtype))
+        volume *= base_volume
+        
+        close = np.cumsum(returns, axis=1)
+        np.exp(close, out=close)
+        close *= start_prices
+        
+        open_ = np.empty_like(close)
+        open_[:, 0] = start_prices[:, 0]
+        open_[:, 1:] = close[:, :-1]
+        
+        # الظلال فوق/تحت جسم الشمعة: high >= max(open, close) و low <= min(open, close)
+        sigma *= 0.4
+        high = self.rng.standard_exponential((n_symbols, n_bars), dtype=dtype)
+        high *= sigma
+        np.exp(high, out=high)
+        high *= np.maximum(open_, close)
+        
+        low = self.rng.standard_exponential((n_symbols, n_bars), dtype=dtype)
+        low *= -sigma
+        np.exp(low, out=low)
+        low *= np.minimum(open_, close)
+        
+        interval_ms = interval_to_seconds(interval) * 1000
+        if end_time is None:
+            end_time = clock.now()
+        last_open = int(end_time.timestamp() * 1000) // interval_ms * interval_ms
+        timestamps = last_open - (n_bars - 1 - np.arange(n_bars, dtype=np.int64)) * interval_ms
+        
+        return {
+            'timestamp': timestamps,
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume
+        }
+    
+    def generate_series(self, n_bars, start_price, interval='5m', start_time=None, end_time=None):
+        """سلسلة شموع لعملة واحدة (أعمدة أحادية البعد)"""
+        candles = self.generate_candles(1, n_bars, start_prices=[start_price], interval=interval, end_time=end_time)
+        series = {column: values[0] for column, values in candles.items() if column != 'timestamp'}
+        
+        if start_time is not None:
+            interval_ms = interval_to_seconds(interval) * 1000
+            series['timestamp'] = start_time + np.arange(n_bars, dtype=np.int64) * interval_ms
+        else:
+            series['timestamp'] = candles['timestamp']
+        
+        return series
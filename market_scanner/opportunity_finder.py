@@ -1,6 +1,7 @@
 import numpy as np
-import pandas as pd
-from datetime import datetime
+
+import clock
+from quantum_engine import indicators
 
 class OpportunityFinder:
     def __init__(self):
@@ -12,17 +13,21 @@ class OpportunityFinder:
         """مسح الفرص عالية الاحتمال"""
         opportunities = []
         
+        # درجات كل العملات في تمريرة مجمعة واحدة
+        scores = {symbol: result['score'] for symbol, result in self.score_batch(market_data).items()}
+        
         for symbol, data in market_data.items():
             if symbol == 'symbol':
                 continue
-                
-            # تحليل متعدد الأبعاد للفرص
-            opportunity_score = self.calculate_opportunity_score(data)
-            trend_direction = self.determine_trend_direction(data)
-            momentum_strength = self.assess_momentum_strength(data)
-            volatility_profile = self.analyze_volatility_profile(data)
+            
+            opportunity_score = scores[symbol]
             
             if opportunity_score > 0.6:  # فرص ذات جودة عالية فقط
+                # التحليل التفصيلي للعملات المؤهلة فقط
+                trend_direction = self.determine_trend_direction(data)
+                momentum_strength = self.assess_momentum_strength(data)
+                volatility_profile = self.analyze_volatility_profile(data)
+                
                 opportunities.append({
                     'symbol': symbol,
                     'score': opportunity_score,
@@ -30,7 +35,7 @@ class OpportunityFinder:
                     'momentum': momentum_strength,
                     'volatility': volatility_profile,
                     'entry_confidence': self.calculate_entry_confidence(data, trend_direction),
-                    'timestamp': datetime.now()
+                    'timestamp': clock.now()
                 })
         
         # ترتيب الفرص حسب الجودة
@@ -38,7 +43,7 @@ class OpportunityFinder:
         
         # حفظ تاريخ المسح
         self.scan_history.append({
-            'timestamp': datetime.now(),
+            'timestamp': clock.now(),
             'opportunities_found': len(opportunities),
             'top_opportunity': opportunities[0] if opportunities else None
         })
@@ -71,25 +76,112 @@ class OpportunityFinder:
         
         return sum(scores)
     
+    def score_batch(self, market_data):
+        """درجات الفرص لكل العملات دفعة واحدة على مصفوفات (العملات × الشموع)
+        
+        نفس مكونات calculate_opportunity_score وأوزانها، لكن كل مؤشر يُحسب
+        لكل العملات في تمريرة NumPy واحدة بدل حلقة على العملات.
+        """
+        symbols = [symbol for symbol in market_data if symbol != 'symbol']
+        results = {
+            symbol: {'trend': 0.5, 'momentum': 0.5, 'volatility': 0.5, 'volume': 0.5, 'liquidity': 0.5}
+            for symbol in symbols
+        }
+        
+        # مكونات إطار الساعة: الاتجاه والتقلب والحجم والسيولة
+        hourly = {symbol: market_data[symbol]['1h'] for symbol in symbols if not market_data[symbol]['1h'].empty}
+        for group, columns in indicators.stack_windows(hourly, ('close', 'volume')):
+            closes = columns['close']
+            volumes = columns['volume']
+            n_bars = closes.shape[1]
+            
+            avg_volume = np.mean(volumes, axis=1)
+            liquidity = np.select(
+                [avg_volume > 1000000, avg_volume > 500000, avg_volume > 100000], [1.0, 0.7, 0.4], 0.2
+            )
+            components = {'liquidity': liquidity}
+            
+            if n_bars >= 50:
+                sma_20 = indicators.batch_sma_last(closes, 20)
+                sma_50 = indicators.batch_sma_last(closes, 50)
+                sma_trend = np.where(sma_20 > sma_50, 1.0, 0.0)
+                trend_strength = np.abs(sma_20 - sma_50) / sma_50
+                recent_trend = closes[:, -1] / closes[:, -20] - 1
+                trend_consistency = np.where(np.abs(recent_trend) > 0.02, 1.0, 0.5)
+                components['trend'] = (sma_trend * 0.4 + np.minimum(trend_strength / 0.05, 1.0) * 0.4
+                                       + trend_consistency * 0.2)
+            
+            if n_bars >= 20:
+                volatility = indicators.batch_returns_volatility(closes) * np.sqrt(24)
+                components['daily_volatility'] = volatility
+                components['volatility'] = np.where(
+                    volatility < 0.01,
+                    volatility / 0.01 * 0.5,
+                    np.where(volatility > 0.03, np.maximum(0.5 - ((volatility - 0.03) / 0.03), 0.2), 1.0)
+                )
+                
+                recent_volume = np.mean(volumes[:, -5:], axis=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    volume_ratio = np.where(avg_volume > 0, recent_volume / avg_volume, 1.0)
+                components['volume'] = np.minimum(volume_ratio / 2, 1.0)
+            
+            for name, values in components.items():
+                for symbol, value in zip(group, values.tolist()):
+                    results[symbol][name] = value
+        
+        # مكونات إطار 15 دقيقة: الزخم
+        quarter = {
+            symbol: market_data[symbol]['15m'] for symbol in symbols
+            if not market_data[symbol]['15m'].empty and len(market_data[symbol]['15m']) >= 14
+        }
+        for group, columns in indicators.stack_windows(quarter, ('high', 'low', 'close')):
+            # آخر قيمة RSI و Stochastic تعتمد على آخر الفترة فقط؛ MACD يحتاج كل التاريخ
+            rsi = indicators.batch_rsi(columns['close'][:, -15:], 14)[:, -1]
+            macd, signal = indicators.batch_macd(columns['close'])
+            stoch = indicators.batch_stochastic(
+                columns['high'][:, -14:], columns['low'][:, -14:], columns['close'][:, -14:], 14
+            )[:, -1]
+            
+            rsi_score = np.where(rsi < 30, (30 - rsi) / 30, np.where(rsi > 70, (rsi - 70) / 30, 0.0))
+            macd_score = np.where(macd[:, -1] > signal[:, -1], 1.0, 0.0)
+            stoch_score = np.where(stoch < 20, (20 - stoch) / 20, np.where(stoch > 80, (stoch - 80) / 20, 0.0))
+            
+            components = {
+                'momentum': rsi_score * 0.4 + macd_score * 0.3 + stoch_score * 0.3,
+                'rsi': rsi,
+                'macd': macd[:, -1],
+                'macd_signal': signal[:, -1],
+                'stochastic': stoch
+            }
+            for name, values in components.items():
+                for symbol, value in zip(group, values.tolist()):
+                    results[symbol][name] = value
+        
+        for result in results.values():
+            result['score'] = (result['trend'] * 0.3 + result['momentum'] * 0.25 + result['volatility'] * 0.2
+                               + result['volume'] * 0.15 + result['liquidity'] * 0.1)
+        
+        return results
+    
     def analyze_trend_quality(self, data):
         """تحليل جودة الاتجاه"""
         if data['1h'].empty or len(data['1h']) < 50:
             return 0.5
         
-        df = data['1h']
+        closes = np.asarray(data['1h']['close'])
         
         # المتوسطات المتحركة
-        sma_20 = df['close'].rolling(20).mean()
-        sma_50 = df['close'].rolling(50).mean()
+        sma_20 = indicators.window_sma(data['1h'], 20)
+        sma_50 = indicators.window_sma(data['1h'], 50)
         
         # اتجاه المتوسطات
-        sma_trend = 1.0 if sma_20.iloc[-1] > sma_50.iloc[-1] else 0.0
+        sma_trend = 1.0 if sma_20 > sma_50 else 0.0
         
         # قوة الاتجاه
-        trend_strength = abs(sma_20.iloc[-1] - sma_50.iloc[-1]) / sma_50.iloc[-1]
+        trend_strength = abs(sma_20 - sma_50) / sma_50
         
         # استقرار الاتجاه
-        recent_trend = (df['close'].iloc[-1] / df['close'].iloc[-20] - 1)
+        recent_trend = (closes[-1] / closes[-20] - 1)
         trend_consistency = 1.0 if abs(recent_trend) > 0.02 else 0.5
         
         return (sma_trend * 0.4 + min(trend_strength / 0.05, 1.0) * 0.4 + trend_consistency * 0.2)
@@ -102,7 +194,7 @@ class OpportunityFinder:
         df = data['15m']
         
         # RSI
-        rsi = self.calculate_rsi(df['close'], 14)
+        rsi = indicators.window_rsi(df, 14)
         rsi_score = 0.0
         if rsi[-1] < 30:  # ذروة بيع
             rsi_score = (30 - rsi[-1]) / 30
@@ -110,11 +202,11 @@ class OpportunityFinder:
             rsi_score = (rsi[-1] - 70) / 30
         
         # MACD
-        macd, signal = self.calculate_macd(df['close'])
+        macd, signal = indicators.window_macd(df)
         macd_score = 1.0 if macd[-1] > signal[-1] else 0.0
         
         # Stochastic
-        stoch = self.calculate_stochastic(df, 14)
+        stoch = indicators.window_stochastic(df, 14)
         stoch_score = 0.0
         if stoch[-1] < 20:  # ذروة بيع
             stoch_score = (20 - stoch[-1]) / 20
@@ -128,11 +220,8 @@ class OpportunityFinder:
         if data['1h'].empty or len(data['1h']) < 20:
             return 0.5
         
-        df = data['1h']
-        
         # حساب التقلب
-        returns = df['close'].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(24)  # تقلب يومي
+        volatility = indicators.window_volatility(data['1h']) * np.sqrt(24)  # تقلب يومي
         
         # تقلب مثالي للتداول (1-3%)
         ideal_volatility_min = 0.01
@@ -154,13 +243,13 @@ class OpportunityFinder:
         if data['1h'].empty or len(data['1h']) < 20:
             return 0.5
         
-        df = data['1h']
+        volumes = np.asarray(data['1h']['volume'])
         
         # متوسط الحجم
-        avg_volume = df['volume'].mean()
+        avg_volume = np.mean(volumes)
         
         # حجم حديث
-        recent_volume = df['volume'].tail(5).mean()
+        recent_volume = np.mean(volumes[-5:])
         
         # نسبة الحجم
         volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1.0
@@ -175,8 +264,7 @@ class OpportunityFinder:
         if data['1h'].empty:
             return 0.5
         
-        df = data['1h']
-        avg_volume = df['volume'].mean()
+        avg_volume = np.mean(data['1h']['volume'])
         
         # سيولة جيدة إذا كان الحجم فوق 1M
         if avg_volume > 1000000:
@@ -193,14 +281,14 @@ class OpportunityFinder:
         if data['1h'].empty or len(data['1h']) < 50:
             return 'SIDEWAYS'
         
-        df = data['1h']
+        closes = np.asarray(data['1h']['close'])
         
-        sma_20 = df['close'].rolling(20).mean()
-        sma_50 = df['close'].rolling(50).mean()
+        sma_20 = indicators.window_sma(data['1h'], 20)
+        sma_50 = indicators.window_sma(data['1h'], 50)
         
-        if sma_20.iloc[-1] > sma_50.iloc[-1] and df['close'].iloc[-1] > sma_20.iloc[-1]:
+        if sma_20 > sma_50 and closes[-1] > sma_20:
             return 'UPTREND'
-        elif sma_20.iloc[-1] < sma_50.iloc[-1] and df['close'].iloc[-1] < sma_20.iloc[-1]:
+        elif sma_20 < sma_50 and closes[-1] < sma_20:
             return 'DOWNTREND'
         else:
             return 'SIDEWAYS'
@@ -210,10 +298,8 @@ class OpportunityFinder:
         if data['15m'].empty or len(data['15m']) < 14:
             return 'NEUTRAL'
         
-        df = data['15m']
-        
-        rsi = self.calculate_rsi(df['close'], 14)
-        macd, signal = self.calculate_macd(df['close'])
+        rsi = indicators.window_rsi(data['15m'], 14)
+        macd, signal = indicators.window_macd(data['15m'])
         
         if rsi[-1] > 70 and macd[-1] > signal[-1]:
             return 'STRONG_BULLISH'
@@ -231,9 +317,7 @@ class OpportunityFinder:
         if data['1h'].empty or len(data['1h']) < 20:
             return 'UNKNOWN'
         
-        df = data['1h']
-        returns = df['close'].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(24)
+        volatility = indicators.window_volatility(data['1h']) * np.sqrt(24)
         
         if volatility > 0.04:
             return 'HIGH'
@@ -282,9 +366,9 @@ class OpportunityFinder:
         if '1h' not in data or data['1h'].empty:
             return False
         
-        df = data['1h']
-        recent_volume = df['volume'].tail(5).mean()
-        historical_volume = df['volume'].mean()
+        volumes = np.asarray(data['1h']['volume'])
+        recent_volume = np.mean(volumes[-5:])
+        historical_volume = np.mean(volumes)
         
         # حجم أعلى من المتوسط يؤكد الاتجاه
         return recent_volume > historical_volume * 1.2
@@ -309,11 +393,11 @@ class OpportunityFinder:
         if '15m' not in data or data['15m'].empty:
             return False
         
-        df = data['15m']
+        closes = np.asarray(data['15m']['close'])
         
         # تحقق من نمط الهبوط/الصعود المستمر
-        if len(df) >= 3:
-            recent_trend = (df['close'].iloc[-1] / df['close'].iloc[-3] - 1)
+        if len(closes) >= 3:
+            recent_trend = (closes[-1] / closes[-3] - 1)
             if direction == 'UPTREND' and recent_trend > 0:
                 return True
             elif direction == 'DOWNTREND' and recent_trend < 0:
@@ -323,45 +407,19 @@ class OpportunityFinder:
     
     def calculate_rsi(self, prices, period=14):
         """حساب مؤشر RSI"""
-        if len(prices) < period:
-            return np.array([50] * len(prices))
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gains = np.convolve(gains, np.ones(period)/period, mode='valid')
-        avg_losses = np.convolve(losses, np.ones(period)/period, mode='valid')
-        
-        rs = avg_gains / (avg_losses + 1e-10)
-        rsi = 100 - (100 / (1 + rs))
-        
-        rsi_full = np.concatenate([np.array([50] * (len(prices) - len(rsi))), rsi])
-        
-        return rsi_full
+        return indicators.rsi(prices, period)
     
     def calculate_macd(self, prices, fast=12, slow=26, signal=9):
         """حساب مؤشر MACD"""
-        if len(prices) < slow:
-            return np.array([0] * len(prices)), np.array([0] * len(prices))
-        
-        exp1 = pd.Series(prices).ewm(span=fast).mean()
-        exp2 = pd.Series(prices).ewm(span=slow).mean()
-        macd = exp1 - exp2
-        macd_signal = macd.ewm(span=signal).mean()
-        
-        return macd.values, macd_signal.values
+        return indicators.macd(prices, fast, slow, signal)
     
     def calculate_stochastic(self, data, period=14):
         """حساب مؤشر Stochastic"""
-        if len(data) < period:
-            return np.array([50] * len(data))
-        
-        lows = data['low'].rolling(period).min()
-        highs = data['high'].rolling(period).max()
-        
-        stoch = 100 * (data['close'] - lows) / (highs - lows)
-        return stoch.fillna(50).values
+        return indicators.stochastic(data['high'], data['low'], data['close'], period)
+    
+    def calculate_returns_volatility(self, data):
+        """الانحراف المعياري للعوائد النسبية"""
+        return indicators.returns_volatility(data['close'])
     
     def get_scan_statistics(self):
         """الحصول على إحصائيات المسح"""
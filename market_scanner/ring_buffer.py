@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from market_scanner.candle_store import CANDLE_COLUMNS
+
+class CandleWindow:
+    """نافذة شموع خفيفة فوق مصفوفات NumPy بواجهة قريبة من DataFrame
+    
+    window['close'] تعيد مصفوفة (عرض بدون نسخ) بدل Series، فتعمل
+    دوال التحليل مباشرة على المصفوفات. الرمز والإطار (إن وُجدا) يعرّفان
+    النافذة لذاكرة المؤشرات المشتركة.
+    """
+    
+    __slots__ = ('columns', 'symbol', 'interval')
+    
+    def __init__(self, columns, symbol=None, interval=None):
+        self.columns = columns
+        self.symbol = symbol
+        self.interval = interval
+    
+    def __getitem__(self, column):
+        return self.columns[column]
+    
+    def __contains__(self, column):
+        return column in self.columns
+    
+    def __len__(self):
+        return len(self.columns['close'])
+    
+    @property
+    def empty(self):
+        return len(self) == 0
+    
+    def tail(self, n):
+        """آخر n شمعة كنافذة (عرض بدون نسخ)"""
+        return CandleWindow(
+            {column: values[-n:] if n > 0 else values[:0] for column, values in self.columns.items()},
+            self.symbol, self.interval
+        )
+    
+    def to_frame(self):
+        """تحويل إلى DataFrame عند الحاجة لأدوات pandas"""
+        frame = pd.DataFrame({column: values for column, values in self.columns.items() if column != 'timestamp'})
+        if 'timestamp' in self.columns:
+            frame['timestamp'] = pd.to_datetime(self.columns['timestamp'], unit='ms')
+        return frame
+
+class CandleRingBuffer:
+    """مخزن حلقي ثابت الحجم لأعمدة الشموع مع إلحاق O(1)
+    
+    كل قيمة تُكتب مرتين (في الموضع i و i + capacity) فتكون آخر N شمعة
+    دائماً شريحة متصلة في الذاكرة تُعاد كعرض بدون نسخ.
+    """
+    
+    def __init__(self, capacity, dtype=np.float64, symbol=None, interval=None):
+        self.capacity = capacity
+        self.symbol = symbol
+        self.interval = interval
+        self.dtypes = {
+            column: (column_dtype if column == 'timestamp' else dtype)
+            for column, column_dtype in CANDLE_COLUMNS.items()
+        }
+        self.data = {column: np.zeros(2 * capacity, dtype=column_dtype) for column, column_dtype in self.dtypes.items()}
+        self.head = 0
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    @property
+    def last_timestamp(self):
+        """الطابع الزمني لآخر شمعة أو None"""
+        if self.size == 0:
+            return None
+        return int(self.data['timestamp'][self.head - 1 + self.capacity])
+    
+    def append(self, candle):
+        """إلحاق شمعة (timestamp, open, high, low, close, volume)"""
+        head = self.head
+        for column, value in zip(self.data, candle):
+            values = self.data[column]
+            values[head] = value
+            values[head + self.capacity] = value
+        
+        self.head = (head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    def update_last(self, candle):
+        """تحديث آخر شمعة في مكانها (الشمعة الجارية غير المكتملة)"""
+        if self.size == 0:
+            self.append(candle)
+            return
+        
+        position = (self.head - 1) % self.capacity
+        for column, value in zip(self.data, candle):
+            values = self.data[column]
+            values[position] = value
+            values[position + self.capacity] = value
+    
+    def extend(self, candles):
+        """إلحاق دفعة شموع (قاموس أعمدة) بكتابة متجهة"""
+        count = len(candles['timestamp'])
+        if count == 0:
+            return
+        
+        skip = max(count - self.capacity, 0)
+        count -= skip
+        positions = (self.head + np.arange(count)) % self.capacity
+        
+        for column, values in self.data.items():
+            incoming = np.asarray(candles[column][skip:], dtype=values.dtype)
+            values[positions] = incoming
+            values[positions + self.capacity] = incoming
+        
+        self.head = (self.head + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+    
+    def sync(self, candles):
+        """مزامنة مع نافذة مصدر مرتبة: تحديث آخر شمعة وإلحاق الأحدث فقط"""
+        timestamps = candles['timestamp']
+        if len(timestamps) == 0:
+            return 0
+        
+        last_ts = self.last_timestamp
+        start = 0
+        if last_ts is not None:
+            start = int(np.searchsorted(timestamps, last_ts, side='left'))
+            if start < len(timestamps) and timestamps[start] == last_ts:
+                self.update_last(tuple(candles[column][start] for column in self.data))
+                start += 1
+        
+        if start < len(timestamps):
+            self.extend({column: candles[column][start:] for column in self.data})
+        
+        return len(timestamps) - start
+    
+    def window(self, limit=None):
+        """آخر limit شمعة كنافذة متصلة بدون نسخ"""
+        count = self.size if limit is None else min(limit, self.size)
+        end = self.head + self.capacity
+        return CandleWindow(
+            {column: values[end - count:end] for column, values in self.data.items()},
+            self.symbol, self.interval
+        )
+
+class CandleBufferSet:
+    """مخازن حلقية لكل (عملة، إطار زمني)"""
+    
+    def __init__(self, capacities, dtype=np.float64):
+        self.capacities = capacities
+        self.dtype = dtype
+        self.buffers = {}
+    
+    def get(self, symbol, interval):
+        """المخزن الحلقي للعملة والإطار (يُنشأ عند أول استخدام)"""
+        key = (symbol, interval)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = CandleRingBuffer(self.capacities.get(interval, 500), self.dtype, symbol, interval)
+            self.buffers[key] = buffer
+        return buffer
+    
+    def sync_windows(self, symbol, windows, limits):
+        """مزامنة كل الأطر من نوافذ المصدر وإعادة نوافذ التحليل من المخازن الحلقية"""
+        result = {}
+        for interval, candles in windows.items():
+            buffer = self.get(symbol, interval)
+            buffer.sync(candles)
+            result[interval] = buffer.window(limits.get(interval))
+        return result
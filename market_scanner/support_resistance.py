@@ -0,0 +1,158 @@
+import bisect
+import threading
+
+import numpy as np
+
+from quantum_engine.indicators import rolling_window
+
+def find_pivots(highs, lows, strength=3):
+    """مواضع القمم والقيعان المتأرجحة: أعلى (أو أدنى) نقطة بين strength شمعة من كل جانب
+    
+    لا يُؤكد المحور إلا بعد strength شمعة لاحقة، فآخر strength شمعة لا تُفحص.
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    span = 2 * strength + 1
+    if len(highs) < span:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    
+    centers = np.arange(strength, len(highs) - strength)
+    swing_highs = centers[highs[strength:len(highs) - strength] == rolling_window(highs, span).max(axis=1)]
+    swing_lows = centers[lows[strength:len(lows) - strength] == rolling_window(lows, span).min(axis=1)]
+    return swing_highs, swing_lows
+
+class LevelIndex:
+    """مستويات دعم/مقاومة مرتبة حسب السعر مع عدد اللمسات
+    
+    المحاور القريبة من مستوى قائم (ضمن tolerance نسبية) تُدمج فيه وتزيد
+    لمساته؛ والاستعلام عن أقرب مستوى تحت/فوق السعر بحث ثنائي O(log n).
+    """
+    
+    def __init__(self, tolerance=0.003, max_levels=50):
+        self.tolerance = tolerance
+        self.max_levels = max_levels
+        self.prices = []
+        self.touches = []
+        self.last_touch = []
+    
+    def __len__(self):
+        return len(self.prices)
+    
+    def add(self, price, timestamp):
+        """إضافة محور جديد (دمج مع أقرب مستوى أو مستوى جديد)"""
+        position = bisect.bisect_left(self.prices, price)
+        nearest = None
+        for candidate in (position - 1, position):
+            if 0 <= candidate < len(self.prices):
+                if nearest is None or abs(self.prices[candidate] - price) < abs(self.prices[nearest] - price):
+                    nearest = candidate
+        
+        if nearest is not None and abs(self.prices[nearest] - price) <= self.tolerance * price:
+            # المستوى يتحرك نحو المتوسط المرجح بلمساته ثم يُعاد إدراجه في مكانه
+            touches = self.touches[nearest] + 1
+            merged = (self.prices[nearest] * self.touches[nearest] + price) / touches
+            last_touch = max(self.last_touch[nearest], timestamp)
+            self.remove(nearest)
+            self.insert(merged, touches, last_touch)
+            return
+        
+        self.insert(price, 1, timestamp)
+        if len(self.prices) > self.max_levels:
+            # إسقاط المستوى الأقدم لمساً
+            self.remove(int(np.argmin(self.last_touch)))
+    
+    def insert(self, price, touches, last_touch):
+        position = bisect.bisect_left(self.prices, price)
+        self.prices.insert(position, price)
+        self.touches.insert(position, touches)
+        self.last_touch.insert(position, last_touch)
+    
+    def remove(self, position):
+        del self.prices[position]
+        del self.touches[position]
+        del self.last_touch[position]
+    
+    def nearest_support(self, price, min_touches=1):
+        """أقرب مستوى تحت السعر: (السعر، اللمسات) أو None"""
+        position = bisect.bisect_left(self.prices, price) - 1
+        while position >= 0:
+            if self.touches[position] >= min_touches:
+                return self.prices[position], self.touches[position]
+            position -= 1
+        return None
+    
+    def nearest_resistance(self, price, min_touches=1):
+        """أقرب مستوى فوق السعر: (السعر، اللمسات) أو None"""
+        position = bisect.bisect_right(self.prices, price)
+        while position < len(self.prices):
+            if self.touches[position] >= min_touches:
+                return self.prices[position], self.touches[position]
+            position += 1
+        return None
+    
+    def levels(self):
+        return [
+            {'price': price, 'touches': touches, 'last_touch': last_touch}
+            for price, touches, last_touch in zip(self.prices, self.touches, self.last_touch)
+        ]
+
+class SupportResistanceIndex:
+    """مستويات الدعم والمقاومة لكل (عملة، إطار) تُبنى تدريجياً من المحاور
+    
+    كل تحديث يفحص فقط الشموع التي لم تُفحص بعد كمراكز محاور، فكلفة
+    الدورة تتناسب مع عدد الشموع الجديدة لا مع طول النافذة.
+    """
+    
+    def __init__(self, strength=3, tolerance=0.003, max_levels=50):
+        self.strength = strength
+        self.tolerance = tolerance
+        self.max_levels = max_levels
+        self.indexes = {}
+        self.last_checked = {}
+        self.lock = threading.Lock()
+    
+    def update(self, symbol, interval, window):
+        """إضافة المحاور المؤكدة الجديدة من نافذة شموع مرتبة زمنياً"""
+        timestamps = np.asarray(window['timestamp'])
+        if len(timestamps) == 0:
+            return self.get(symbol, interval)
+        
+        key = (symbol, interval)
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                index = LevelIndex(self.tolerance, self.max_levels)
+                self.indexes[key] = index
+            
+            # أول مركز لم يُفحص بعد (مع strength شمعة قبله للمقارنة)
+            last_checked = self.last_checked.get(key)
+            first_center = 0 if last_checked is None else int(np.searchsorted(timestamps, last_checked, side='right'))
+            start = max(first_center - self.strength, 0)
+            if len(timestamps) - start < 2 * self.strength + 1:
+                return index
+            
+            highs = np.asarray(window['high'])[start:]
+            lows = np.asarray(window['low'])[start:]
+            swing_highs, swing_lows = find_pivots(highs, lows, self.strength)
+            
+            pivots = [(start + i, float(highs[i])) for i in swing_highs] + [(start + i, float(lows[i])) for i in swing_lows]
+            for position, price in sorted(pivots):
+                if position >= first_center:
+                    index.add(price, int(timestamps[position]))
+            
+            self.last_checked[key] = int(timestamps[len(timestamps) - 1 - self.strength])
+            return index
+    
+    def get(self, symbol, interval):
+        with self.lock:
+            return self.indexes.get((symbol, interval))
+    
+    def nearest_levels(self, symbol, interval, price, min_touches=1):
+        """(أقرب دعم، أقرب مقاومة) كأسعار أو None لكل منهما"""
+        with self.lock:
+            index = self.indexes.get((symbol, interval))
+            if index is None:
+                return None, None
+            support = index.nearest_support(price, min_touches)
+            resistance = index.nearest_resistance(price, min_touches)
+        return (support[0] if support else None), (resistance[0] if resistance else None)
@@ -0,0 +1,130 @@
+import heapq
+
+import numpy as np
+
+import clock
+
+# عملات مستقرة وتوكنات رافعة لا معنى لتداولها مقابل USDT
+EXCLUDED_BASES = ('USDC', 'BUSD', 'TUSD', 'FDUSD', 'USDP', 'DAI', 'USDD', 'EUR', 'GBP', 'AEUR')
+EXCLUDED_SUFFIXES = ('UPUSDT', 'DOWNUSDT', 'BULLUSDT', 'BEARUSDT')
+
+class UniverseFilter:
+    """اختيار قائمة مختصرة من كل أزواج USDT القابلة للتداول
+    
+    طلب واحد شامل لتيكر 24 ساعة، ثم فلتر متجه على السيولة والفارق
+    والتقلب، ثم اختيار أفضل N بكومة (heap) بدل ترتيب كامل. فقط القائمة
+    المختصرة تمر بالتحليل الكامل متعدد الأطر.
+    """
+    
+    def __init__(self, client=None, quote_asset='USDT', min_quote_volume=5_000_000,
+                 max_spread=0.002, min_volatility=0.01, max_volatility=0.25,
+                 shortlist_size=40, refresh_interval=900):
+        self.client = client
+        self.quote_asset = quote_asset
+        self.min_quote_volume = min_quote_volume
+        self.max_spread = max_spread
+        self.min_volatility = min_volatility
+        self.max_volatility = max_volatility
+        self.shortlist_size = shortlist_size
+        self.refresh_interval = refresh_interval
+        
+        self.shortlist = []
+        self.refreshed_at = 0.0
+        self.last_stats = {}
+    
+    def ticker_arrays(self, tickers):
+        """تحويل ردود التيكر إلى أعمدة NumPy"""
+        symbols = np.array([ticker['symbol'] for ticker in tickers])
+        
+        def column(name):
+            return np.array([ticker.get(name) or 0 for ticker in tickers], dtype=np.float64)
+        
+        return {
+            'symbol': symbols,
+            'last': column('lastPrice'),
+            'bid': column('bidPrice'),
+            'ask': column('askPrice'),
+            'high': column('highPrice'),
+            'low': column('lowPrice'),
+            'quote_volume': column('quoteVolume'),
+            'change': column('priceChangePercent'),
+            'count': column('count')
+        }
+    
+    def prefilter(self, columns):
+        """فلتر متجه وإرجاع (العملات المقبولة، درجاتها)"""
+        symbols = columns['symbol']
+        last = columns['last']
+        bid = columns['bid']
+        ask = columns['ask']
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mid = (bid + ask) / 2
+            spread = np.where(mid > 0, (ask - bid) / mid, np.inf)
+            volatility = np.where(last > 0, (columns['high'] - columns['low']) / last, 0.0)
+        
+        names = symbols.astype(str)
+        mask = np.char.endswith(names, self.quote_asset)
+        for suffix in EXCLUDED_SUFFIXES:
+            mask &= ~np.char.endswith(names, suffix)
+        # الأصل الأساسي: ما قبل آخر ظهور لعملة التسعير (أي بعد حذف اللاحقة فقط)
+        bases = np.char.rpartition(names, self.quote_asset)[:, 0]
+        mask &= ~np.isin(bases, EXCLUDED_BASES)
+        mask &= columns['count'] > 0
+        mask &= columns['quote_volume'] >= self.min_quote_volume
+        mask &= spread <= self.max_spread
+        mask &= (volatility >= self.min_volatility) & (volatility <= self.max_volatility)
+        
+        if not mask.any():
+            return symbols[mask], np.empty(0)
+        
+        # الدرجة: سيولة (لوغاريتمية) + تقلب ضمن النطاق + زخم اليوم
+        quote_volume = columns['quote_volume'][mask]
+        liquidity = np.log10(np.maximum(quote_volume, 1.0))
+        liquidity_range = liquidity.max() - liquidity.min()
+        liquidity_score = (liquidity - liquidity.min()) / liquidity_range if liquidity_range > 0 else np.ones_like(liquidity)
+        
+        volatility_score = (volatility[mask] - self.min_volatility) / (self.max_volatility - self.min_volatility)
+        momentum_score = np.minimum(np.abs(columns['change'][mask]) / 10, 1.0)
+        
+        scores = liquidity_score * 0.5 + volatility_score * 0.3 + momentum_score * 0.2
+        return symbols[mask], scores
+    
+    def select(self, tickers, pinned=()):
+        """أفضل N عملة من التيكرات (مع عملات مثبتة دائماً، مثل المراكز المفتوحة)"""
+        columns = self.ticker_arrays(tickers)
+        symbols, scores = self.prefilter(columns)
+        
+        top = heapq.nlargest(self.shortlist_size, zip(scores.tolist(), symbols.tolist()))
+        shortlist = [symbol for _, symbol in top]
+        shortlist += [symbol for symbol in pinned if symbol not in shortlist]
+        
+        self.last_stats = {
+            'universe': len(columns['symbol']),
+            'passed_filter': len(symbols),
+            'shortlist': len(shortlist)
+        }
+        return shortlist
+    
+    def get_shortlist(self, fallback, pinned=()):
+        """القائمة المختصرة الحالية (تُحدّث كل refresh_interval ثانية)"""
+        if self.client is None:
+            return list(fallback)
+        
+        if self.shortlist and clock.timestamp() - self.refreshed_at < self.refresh_interval:
+            return self.shortlist + [symbol for symbol in pinned if symbol not in self.shortlist]
+        
+        try:
+            # طلب واحد لكل العملات بدل طلب لكل عملة
+            tickers = self.client.get_ticker()
+            shortlist = self.select(tickers, pinned)
+            if shortlist:
+                self.shortlist = shortlist
+                self.refreshed_at = clock.timestamp()
+                print(f"🌐 Universe: {self.last_stats['universe']} pairs → "
+                      f"{self.last_stats['passed_filter']} passed filter → {len(shortlist)} shortlisted")
+        except Exception as e:
+            print(f"⚠️ Universe refresh failed: {e}")
+        
+        shortlist = self.shortlist or list(fallback)
+        return shortlist + [symbol for symbol in pinned if symbol not in shortlist]
@@ -1,35 +1,49 @@
 import os
 import time
 import json
-import pandas as pd
+import heapq
 import numpy as np
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import warnings
 warnings.filterwarnings('ignore')
 
 from quantum_engine.deep_learner import QuantumDeepLearner
+from quantum_engine.feature_builder import FeatureBuilder
+from quantum_engine.insight_store import InsightStore
+from quantum_engine.learning_worker import LearningWorker
 from quantum_engine.strategy_master import StrategyMaster
 from quantum_engine.profit_optimizer import ProfitOptimizer
 from risk_guard.capital_protector import CapitalProtector
 from risk_guard.drawdown_shield import DrawdownShield
 from market_scanner.opportunity_finder import OpportunityFinder
 from market_scanner.trend_analyzer import TrendAnalyzer
+from market_scanner.candle_store import CandleStore
+from market_scanner.candle_resampler import resample_candles
+from market_scanner.market_simulator import SyntheticMarket
+from market_scanner.kline_stream import KlineStream
+from market_scanner.ring_buffer import CandleBufferSet, CandleWindow
+from market_scanner.market_cache import MarketDataCache
+from market_scanner.universe_filter import UniverseFilter
 from execution_engine.smart_executor import SmartExecutor
 from execution_engine.performance_tracker import PerformanceTracker
 from config import QuantumConfig
+import clock
 
 class AIONQuantumUltraMAX:
-    def __init__(self, initial_balance=50, mode='paper_trading'):
+    def __init__(self, initial_balance=50, mode='paper_trading', config=None):
         self.initial_balance = initial_balance
         self.current_balance = initial_balance
         self.mode = mode
         self.portfolio = {}
         self.trade_history = []
-        self.learning_data = []
+        # سجلات التعلم مضغوطة بسعة ثابتة (total = كل ما سُجل منذ البداية)
+        self.learning_data = InsightStore(capacity=10000)
         self.performance_metrics = {}
+        self.scan_latencies = {}
+        self.timeframe_limits = {'1h': 100, '15m': 50, '5m': 30}
         
         # التهيئة المتقدمة
-        self.config = QuantumConfig()
+        self.config = config or QuantumConfig()
         self.setup_quantum_systems()
         self.setup_tracking_systems()
         
@@ -41,7 +55,7 @@ class AIONQuantumUltraMAX:
     def setup_quantum_systems(self):
         """إعداد الأنظمة الكمية المتطورة"""
         # نظام التعلم العميق الكمي
-        self.deep_learner = QuantumDeepLearner()
+        self.deep_learner = QuantumDeepLearner(models_dir=self.config.models_dir)
         
         # سيد الاستراتيجيات
         self.strategy_master = StrategyMaster()
@@ -57,14 +71,127 @@ class AIONQuantumUltraMAX:
         self.opportunity_finder = OpportunityFinder()
         self.trend_analyzer = TrendAnalyzer()
         
+        # مصفوفة الميزات المشتركة بين التقييم والمتعلم وتسجيل الصفقات
+        self.feature_builder = FeatureBuilder(
+            self.opportunity_finder, self.deep_learner.level_index, regime_engine=self.deep_learner.regime_engine
+        )
+        self.cycle_features = None
+        
         # محرك التنفيذ
-        self.smart_executor = SmartExecutor(self.mode)
+        self.candle_store = CandleStore(self.config.candle_store_dir)
+        self.candle_buffers = CandleBufferSet(
+            {interval: limit * 2 for interval, limit in self.timeframe_limits.items()}
+        )
+        self.market_simulator = SyntheticMarket(seed=self.config.simulation_seed)
+        
+        # ذاكرة مؤقتة مشتركة حتى لا تُجلب نفس البيانات مرتين في الدورة
+        self.market_cache = MarketDataCache(
+            max_entries=self.config.cache_max_entries,
+            price_ttl=self.config.price_cache_ttl,
+            candle_ttl_fraction=self.config.candle_cache_ttl_fraction
+        )
+        self.smart_executor = SmartExecutor(
+            self.mode,
+            candle_store=self.candle_store,
+            client=self.config.get_client(),
+            base_interval=self.config.base_interval,
+            market_simulator=self.market_simulator,
+            market_cache=self.market_cache,
+            live_price_max_age=self.config.stream_max_staleness
+        )
+        
+        # نطاق العملات: القائمة الثابتة أو كل أزواج USDT عبر فلتر أولي
+        # خيوط المسح مملوكة للبوت طوال عمره (تُغلق في shutdown) فلا تتراكم خيوط الدورات المتروكة
+        self.scan_pool = None
+        if self.config.scan_mode == 'concurrent' and self.config.scan_concurrency > 1:
+            self.scan_pool = ThreadPoolExecutor(
+                max_workers=self.config.scan_concurrency,
+                thread_name_prefix='quantum-scan'
+            )
+        
+        self.universe_filter = UniverseFilter(
+            client=self.smart_executor.client if self.config.symbol_universe == 'usdt' else None,
+            min_quote_volume=self.config.universe_min_quote_volume,
+            max_spread=self.config.universe_max_spread,
+            min_volatility=self.config.universe_min_volatility,
+            max_volatility=self.config.universe_max_volatility,
+            shortlist_size=self.config.universe_shortlist_size,
+            refresh_interval=self.config.universe_refresh_interval
+        )
+        
+        # البث اللحظي للشموع
+        self.kline_stream = None
+        if self.config.data_mode == 'stream':
+            self.setup_kline_stream()
         
         # متتبع الأداء
         self.performance_tracker = PerformanceTracker()
         
         # تحميل التعلم السابق
         self.load_quantum_knowledge()
+        
+        # التعلم والحفظ خارج مسار التداول (خيط خلفي بطابور مهام)
+        self.learning_worker = LearningWorker(
+            self.run_learning_step,
+            self.save_quantum_knowledge,
+            inline=self.config.learning_mode != 'background'
+        )
+        self.learning_worker.start()
+    
+    def setup_kline_stream(self):
+        """تشغيل البث اللحظي بدل الاستعلام الدوري"""
+        base_interval = self.config.base_interval
+        # البث يغطي نطاق العملات الفعلي (القائمة الثابتة أو القائمة المختصرة من أزواج USDT)
+        symbols = self.universe_filter.get_shortlist(self.config.target_symbols, pinned=self.open_position_symbols())
+        self.kline_stream = KlineStream(
+            symbols,
+            interval=base_interval,
+            candle_store=self.candle_store,
+            backfill=self.smart_executor.fetch_klines
+        )
+        
+        # تعبئة أولية من المخزن المحلي حتى تكون النوافذ كاملة من أول دورة
+        self.seed_stream_symbols(symbols)
+        
+        # المنفذ يسعّر الأوامر من آخر سعر في البث
+        self.kline_stream.subscribe(self.smart_executor.on_stream_candle, 'update')
+        self.kline_stream.subscribe(self.smart_executor.on_stream_candle, 'close')
+        
+        try:
+            if self.config.stream_source == 'local':
+                self.kline_stream.start_local(self.config.stream_host, self.config.stream_port)
+            else:
+                self.kline_stream.start_binance(self.config.api_key, self.config.api_secret, self.config.testnet)
+        except Exception as e:
+            print(f"⚠️ Kline stream unavailable ({e}) - falling back to REST polling")
+            self.kline_stream = None
+    
+    def seed_stream_symbols(self, symbols):
+        """تعبئة ذاكرة البث لعملات جديدة من المخزن المحلي أو REST"""
+        base_interval = self.config.base_interval
+        base_limit = self.smart_executor.resampler.base_limit(self.timeframe_limits)
+        for symbol in symbols:
+            try:
+                self.kline_stream.seed_history(
+                    symbol, self.smart_executor.get_candle_window(symbol, base_interval, base_limit)
+                )
+            except Exception as e:
+                print(f"⚠️ Stream history backfill failed for {symbol}: {e}")
+    
+    def sync_stream_universe(self, symbols):
+        """مطابقة عملات البث مع القائمة المختصرة الحالية"""
+        if self.kline_stream is None:
+            return
+        previous = set(self.kline_stream.symbols)
+        try:
+            added = self.kline_stream.set_symbols(symbols)
+        except Exception as e:
+            print(f"⚠️ Stream resubscribe failed: {e}")
+            return
+        for symbol in previous.difference(symbols):
+            self.smart_executor.drop_live_price(symbol)
+        if added:
+            self.seed_stream_symbols(added)
     
     def setup_tracking_systems(self):
         """إعداد أنظمة التتبع المتقدمة"""
@@ -104,10 +231,10 @@ class AIONQuantumUltraMAX:
     
     def execute_quantum_cycle(self):
         """تنفيذ دورة التداول الكمية المتقدمة"""
-        cycle_start = datetime.now()
+        cycle_start = time.perf_counter()
         
         try:
-            # 1. المسح الكمي للسوق - 10 عملات
+            # 1. المسح الكمي للسوق
             market_data = self.scan_quantum_market()
             
             # 2. التحليل الكمي المتقدم
@@ -132,62 +259,194 @@ class AIONQuantumUltraMAX:
             self.record_quantum_performance(executed_trades, cycle_profit, cycle_start)
             
             return executed_trades, cycle_profit
-            
+        
         except Exception as e:
             print(f"❌ Quantum Cycle Error: {e}")
             return 0, 0
     
     def scan_quantum_market(self):
-        """مسح سوق كمي متقدم لـ 10 عملات"""
-        target_symbols = [
-            'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'ADAUSDT',
-            'XRPUSDT', 'DOTUSDT', 'DOGEUSDT', 'MATICUSDT', 'AVAXUSDT'
-        ]
+        """مسح سوق كمي متقدم للعملات المستهدفة أو القائمة المختصرة من كل أزواج USDT"""
+        # فقط القائمة المختصرة تمر بالتحليل الكامل متعدد الأطر (مع عملات المراكز المفتوحة دائماً)
+        target_symbols = self.universe_filter.get_shortlist(
+            self.config.target_symbols, pinned=self.open_position_symbols()
+        )
+        self.sync_stream_universe(target_symbols)
+        
+        self.scan_latencies = {}
+        self.market_cache.reset_statistics()
+        
+        # بدون عميل تأتي الشموع من مولد المحاكاة ذي البذرة الثابتة: المسح المتتابع يبقي ترتيب
+        # السحب منه ثابتاً فتتكرر نتائج SIMULATION_SEED (ولا زمن شبكة يستحق التزامن)
+        if self.scan_pool is not None and self.smart_executor.client is not None:
+            return self.scan_market_concurrently(target_symbols)
         
         market_data = {}
         for symbol in target_symbols:
+            fetch_start = time.perf_counter()
             try:
-                # جلب بيانات متعددة الأطر الزمنية
-                data_1h = self.smart_executor.get_market_data(symbol, '1h', 100)
-                data_15m = self.smart_executor.get_market_data(symbol, '15m', 50)
-                data_5m = self.smart_executor.get_market_data(symbol, '5m', 30)
-                
-                market_data[symbol] = {
-                    '1h': data_1h,
-                    '15m': data_15m, 
-                    '5m': data_5m,
-                    'current_price': data_1h['close'].iloc[-1] if not data_1h.empty else 0,
-                    'symbol': symbol
-                }
-                
+                market_data[symbol] = self.fetch_symbol_market_data(symbol)
+            
             except Exception as e:
                 print(f"⚠️ Error scanning {symbol}: {e}")
                 # بيانات محاكاة للاختبار
                 market_data[symbol] = self.generate_mock_market_data(symbol)
+            
+            self.scan_latencies[symbol] = time.perf_counter() - fetch_start
         
         return market_data
     
+    def open_position_symbols(self):
+        """عملات المراكز المفتوحة (تبقى في المسح حتى لو خرجت من القائمة المختصرة)"""
+        return list(self.portfolio)
+    
+    def fetch_symbol_market_data(self, symbol):
+        """جلب بيانات متعددة الأطر الزمنية لعملة واحدة"""
+        return self.commit_symbol_windows(symbol, self.fetch_symbol_windows(symbol))
+    
+    def fetch_symbol_windows(self, symbol):
+        """جلب نوافذ الأطر الزمنية لعملة (بدون لمس المخازن الحلقية)"""
+        # نوافذ بدون نسخ على مخزن الشموع المحلي (يُجلب فقط الجديد منذ آخر دورة)
+        if self.kline_stream is not None and self.kline_stream.has_data(symbol, self.config.stream_max_staleness):
+            # البيانات الحية من البث بدون أي طلب شبكي
+            windows = self.kline_stream.get_timeframe_windows(symbol, self.timeframe_limits)
+        elif self.config.resample_timeframes:
+            # سلسلة أساسية واحدة تُشتق منها 15m و 1h محلياً
+            windows = self.smart_executor.get_timeframe_windows(symbol, self.timeframe_limits)
+        else:
+            windows = {
+                interval: self.smart_executor.get_candle_window(symbol, interval, limit)
+                for interval, limit in self.timeframe_limits.items()
+            }
+        return windows
+    
+    def commit_symbol_windows(self, symbol, windows):
+        """نسخ النوافذ المجلوبة إلى المخازن الحلقية (من خيط الدورة فقط)"""
+        # المخازن الحلقية تنسخ الشموع الجديدة فقط وتعطي التحليل عروضاً متصلة
+        windows = self.candle_buffers.sync_windows(symbol, windows, self.timeframe_limits)
+        window_1h = windows['1h']
+        
+        return {
+            '1h': window_1h,
+            '15m': windows['15m'], 
+            '5m': windows['5m'],
+            'current_price': float(window_1h['close'][-1]) if len(window_1h) else 0,
+            'symbol': symbol
+        }
+    
+    def scan_market_concurrently(self, symbols):
+        """مسح متزامن للعملات مع حد للتزامن ومهلة لكل عملة وسقف للمسح كله
+        
+        مهلة العملة (scan_timeout) تُحسب من بدء جلبها في الخيط لا من الإرسال،
+        فانتظار الطابور خلف عملات بطيئة لا يُسقط العملات السليمة، وزمن الجلب
+        المعروض لا يشمل الانتظار. scan_total_timeout سقف للمسح كله (يشمل ما لم
+        يبدأ بعد). الخيوط تجلب النوافذ فقط، والنسخ إلى المخازن الحلقية يتم هنا
+        في خيط الدورة للنتائج المستلمة في وقتها، فالطلب المتروك لا يكتب في مخزن
+        تقرؤه الدورة التالية.
+        """
+        timeout = self.config.scan_timeout
+        scan_deadline = time.perf_counter() + self.config.scan_total_timeout
+        started_at = {}
+        market_data = {}
+        
+        def timed_fetch(symbol):
+            started_at[symbol] = started = time.perf_counter()
+            windows = self.fetch_symbol_windows(symbol)
+            return windows, started, time.perf_counter()
+        
+        def fallback(symbol, reason):
+            print(f"⏱️ Scan timeout for {symbol} {reason} - using fallback data")
+            market_data[symbol] = self.generate_mock_market_data(symbol)
+        
+        futures = {self.scan_pool.submit(timed_fetch, symbol): symbol for symbol in symbols}
+        pending = set(futures)
+        
+        try:
+            while pending:
+                now = time.perf_counter()
+                if now >= scan_deadline:
+                    break
+                
+                # العملات التي تجاوزت مهلتها منذ بدء جلبها تُترك دون انتظار
+                for future in [future for future in pending if futures[future] in started_at]:
+                    symbol = futures[future]
+                    if now - started_at[symbol] >= timeout and not future.done():
+                        pending.discard(future)
+                        self.scan_latencies[symbol] = now - started_at[symbol]
+                        fallback(symbol, f"after {timeout:.1f}s")
+                if not pending:
+                    break
+                
+                # الاستيقاظ عند أقرب مهلة معروفة (مع حد أعلى قصير لالتقاط العملات التي بدأت للتو)
+                deadlines = [started_at[futures[future]] + timeout for future in pending if futures[future] in started_at]
+                wake_at = min(deadlines + [scan_deadline, now + min(timeout, 0.25)])
+                done, pending = wait(pending, timeout=max(wake_at - now, 0), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    symbol = futures[future]
+                    try:
+                        windows, started, finished = future.result()
+                        self.scan_latencies[symbol] = finished - started
+                        market_data[symbol] = self.commit_symbol_windows(symbol, windows)
+                    except Exception as e:
+                        if symbol in started_at:
+                            self.scan_latencies[symbol] = time.perf_counter() - started_at[symbol]
+                        print(f"⚠️ Error scanning {symbol}: {e}")
+                        market_data[symbol] = self.generate_mock_market_data(symbol)
+            
+            # ما بقي عند سقف المسح (عالق أو لم يبدأ) يتحول للمسار الاحتياطي دون إيقاف البقية
+            for future in pending:
+                symbol = futures[future]
+                if symbol in started_at:
+                    self.scan_latencies[symbol] = time.perf_counter() - started_at[symbol]
+                fallback(symbol, f"at the {self.config.scan_total_timeout:.1f}s scan cap")
+        finally:
+            # إلغاء ما في الطابور وترك العالق دون انتظار (خيوطه تعود للمجمع المشترك عند انتهائه)
+            for future in futures:
+                future.cancel()
+        
+        return {symbol: market_data[symbol] for symbol in symbols if symbol in market_data}
+    
     def quantum_market_analysis(self, market_data):
         """تحليل سوق كمي متقدم"""
         analysis = {}
         
+        # لقطة واحدة من حالة التعلم للدورة كلها (العامل الخلفي ينشر لقطات جديدة باستبدال مرجع)
+        snapshot = self.deep_learner.snapshot
+        
+        # أنماط كل العملات وكل الأطر في تمريرة مجمعة واحدة
+        pattern_recognition = self.deep_learner.recognize_patterns_batch(market_data, snapshot)
+        
         for symbol, data in market_data.items():
             # تحليل متعدد الأبعاد
             trend_analysis = self.trend_analyzer.analyze_multi_timeframe(data)
             volatility_profile = self.analyze_volatility_profile(data)
             momentum_signals = self.calculate_quantum_momentum(data)
-            pattern_recognition = self.deep_learner.recognize_patterns(data)
             
             analysis[symbol] = {
                 'trend': trend_analysis,
                 'volatility': volatility_profile,
                 'momentum': momentum_signals,
-                'patterns': pattern_recognition,
-                'opportunity_score': self.calculate_opportunity_score(
-                    trend_analysis, volatility_profile, momentum_signals, pattern_recognition
-                )
+                'patterns': pattern_recognition[symbol]
             }
         
+        # مصفوفة ميزات float32 واحدة للدورة (المؤشرات مجمعة لكل العملات في تمريرة واحدة)
+        self.cycle_features = self.feature_builder.build(market_data, analysis)
+        
+        # احتمال الربح لكل العملات باستدعاء predict_proba واحد، وأقرب الإعدادات السابقة باستعلام واحد
+        win_probabilities = self.deep_learner.predict_outcomes(self.cycle_features, snapshot)
+        similar_setups = self.deep_learner.similar_setups(self.cycle_features, snapshot=snapshot)
+        model_weight = self.deep_learner.outcome_weight(snapshot)
+        
+        for symbol, symbol_analysis in analysis.items():
+            symbol_analysis['features'] = self.cycle_features.row(symbol)
+            symbol_analysis['win_probability'] = win_probabilities.get(symbol)
+            symbol_analysis['similar_setups'] = similar_setups.get(symbol)
+            symbol_analysis['regime'] = self.deep_learner.regime_engine.get(symbol)
+            symbol_analysis['opportunity_score'] = self.calculate_opportunity_score(
+                self.cycle_features, symbol, symbol_analysis['win_probability'], symbol_analysis['similar_setups'],
+                model_weight
+            )
+        
         return analysis
     
     def find_quantum_opportunities(self, quantum_analysis):
@@ -211,14 +470,11 @@ class AIONQuantumUltraMAX:
                     'score': opportunity_score,
                     'signal_strength': signal_strength,
                     'analysis': analysis,
-                    'timestamp': datetime.now()
+                    'timestamp': clock.now()
                 })
         
-        # ترتيب الفرص حسب الجودة
-        opportunities.sort(key=lambda x: x['score'], reverse=True)
-        
-        # أخذ أفضل 3 فرص فقط للتركيز العالي
-        return opportunities[:3]
+        # أخذ أفضل 3 فرص فقط للتركيز العالي (كومة بدل ترتيب كامل)
+        return heapq.nlargest(3, opportunities, key=lambda x: x['score'])
     
     def quantum_risk_reward_optimization(self, opportunities):
         """تحسين المخاطرة والعائد كمياً"""
@@ -284,19 +540,40 @@ class AIONQuantumUltraMAX:
         return executed_trades, total_profit
     
     def quantum_learning_cycle(self, executed_trades, market_data, cycle_profit):
-        """دورة التعلم الكمي المتقدم"""
+        """دورة التعلم الكمي المتقدم: تُرسل للعامل الخلفي ولا تنتظر تنفيذها"""
         if executed_trades > 0:
-            # تحديث التعلم العميق
-            self.deep_learner.update_learning(self.trade_history[-executed_trades:], market_data)
-            
-            # تحديث استراتيجيات التداول
-            self.strategy_master.adapt_strategies(self.performance_metrics, market_data)
-            
-            # تحسين نظام الأرباح
-            self.profit_optimizer.optimize_profits(self.cumulative_profits, cycle_profit)
-            
-            # حفظ المعرفة المكتسبة
-            self.save_quantum_knowledge()
+            # نسخ ما قد تعدله الدورة التالية قبل أن يقرأه العامل (النوافذ عروض على المخازن الحلقية)
+            self.learning_worker.submit({
+                'trades': self.trade_history[-executed_trades:],
+                'market_data': {symbol: self.copy_market_data(data) for symbol, data in market_data.items()},
+                'features': self.cycle_features,
+                'performance_metrics': dict(self.performance_metrics),
+                'cumulative_profits': {period: list(profits) for period, profits in self.cumulative_profits.items()},
+                'cycle_profit': cycle_profit
+            })
+    
+    def run_learning_step(self, job):
+        """خطوة التعلم الكاملة (في خيط العامل)"""
+        # تحديث التعلم العميق
+        self.deep_learner.update_learning(job['trades'], job['market_data'], job['features'])
+        
+        # تحديث استراتيجيات التداول
+        self.strategy_master.adapt_strategies(job['performance_metrics'], job['market_data'])
+        
+        # تحسين نظام الأرباح
+        self.profit_optimizer.optimize_profits(job['cumulative_profits'], job['cycle_profit'])
+        
+        # حفظ المعرفة المكتسبة
+        self.save_quantum_knowledge()
+    
+    def copy_market_data(self, data):
+        """نسخة مستقلة من بيانات العملة: sync_windows في الدورة التالية يكتب فوق المخازن في مكانها"""
+        return {
+            key: CandleWindow({column: np.array(values) for column, values in value.columns.items()},
+                              value.symbol, value.interval)
+            if isinstance(value, CandleWindow) else value
+            for key, value in data.items()
+        }
     
     def update_protection_systems(self, cycle_profit):
         """تحديث أنظمة الحماية الكمية"""
@@ -313,7 +590,7 @@ class AIONQuantumUltraMAX:
     
     def record_quantum_performance(self, executed_trades, cycle_profit, cycle_start):
         """تسجيل أداء كمي متقدم"""
-        cycle_time = (datetime.now() - cycle_start).total_seconds()
+        cycle_time = time.perf_counter() - cycle_start
         
         # تحديث الأرباح التراكمية
         self.update_cumulative_profits(cycle_profit)
@@ -331,10 +608,29 @@ class AIONQuantumUltraMAX:
         
         print(f"📊 Quantum Cycle Complete: {executed_trades} trades | "
               f"Profit: ${cycle_profit:.2f} | Time: {cycle_time:.1f}s")
+        
+        self.report_scan_latencies()
+    
+    def report_scan_latencies(self):
+        """عرض زمن جلب البيانات لكل عملة في ملخص الدورة"""
+        if not self.scan_latencies:
+            return
+        
+        latencies = self.scan_latencies
+        slowest = max(latencies, key=latencies.get)
+        per_symbol = ' | '.join(f"{symbol} {latency:.2f}s" for symbol, latency in latencies.items())
+        
+        print(f"⏱️ Scan Latency: avg {np.mean(list(latencies.values())):.2f}s | "
+              f"max {latencies[slowest]:.2f}s ({slowest})")
+        print(f"   {per_symbol}")
+        
+        cache_stats = self.market_cache.get_statistics()
+        print(f"🗃️ Market Cache: {cache_stats['hits']} hits | {cache_stats['misses']} misses | "
+              f"hit rate {cache_stats['hit_rate']:.0%} | {cache_stats['entries']} entries")
     
     def update_cumulative_profits(self, profit):
         """تحديث الأرباح التراكمية"""
-        now = datetime.now()
+        now = clock.now()
         
         # يومي
         if not self.cumulative_profits['day'] or \
@@ -372,9 +668,19 @@ class AIONQuantumUltraMAX:
             'profit': profit
         })
     
-    def calculate_opportunity_score(self, trend, volatility, momentum, patterns):
-        """حساب درجة الفرصة الكمية"""
-        score = 0
+    def calculate_opportunity_score(self, features, symbol, win_probability=None, similar_setups=None,
+                                    model_weight=None):
+        """حساب درجة الفرصة الكمية من صف العملة في مصفوفة الميزات
+        
+        win_probability: تقدير نموذج النتائج إن كان جاهزاً (بوزن model_weight من
+        نفس اللقطة)، و similar_setups: نتائج أقرب الإعدادات السابقة (نسبة فوزها تُمزج بوزنها).
+        """
+        row = features.row(symbol)
+        columns = features.columns
+        
+        def component(name, default):
+            value = float(row[columns[name]])
+            return default if np.isnan(value) else value
         
         # وزن المكونات المختلفة
         trend_weight = 0.3
@@ -382,27 +688,28 @@ class AIONQuantumUltraMAX:
         pattern_weight = 0.25
         volatility_weight = 0.2
         
-        # حساب الدرجة من التحليل الاتجاهي
-        if trend['primary_trend'] == 'STRONG_UPTREND':
-            score += 0.8 * trend_weight
-        elif trend['primary_trend'] == 'UPTREND':
-            score += 0.6 * trend_weight
-        elif trend['primary_trend'] == 'SIDEWAYS':
-            score += 0.4 * trend_weight
-        else:
-            score += 0.2 * trend_weight
-        
-        # حساب الدرجة من الزخم
-        score += momentum['strength'] * momentum_weight
-        
-        # حساب الدرجة من الأنماط
-        score += patterns['confidence'] * pattern_weight
+        # الاتجاه الرئيسي والزخم والأنماط من تحليل البوت (أعمدة trend_signal وما بعدها)
+        score = component('trend_signal', 0.2) * trend_weight
+        score += component('momentum_strength', 0.0) * momentum_weight
+        score += component('pattern_confidence', 0.0) * pattern_weight
         
         # تعديل بناءً على التقلب (تقلب متوسط هو الأفضل)
         optimal_volatility = 0.15
-        volatility_diff = abs(volatility['current'] - optimal_volatility)
-        volatility_score = 1 - (volatility_diff / optimal_volatility)
-        score += max(0, volatility_score) * volatility_weight
+        volatility_current = component('volatility_current', np.nan)
+        if not np.isnan(volatility_current):
+            volatility_score = 1 - abs(volatility_current - optimal_volatility) / optimal_volatility
+            score += max(0, volatility_score) * volatility_weight
+        
+        # مزج تقدير النموذج بوزن يكبر مع عدد الصفقات التي تعلم منها
+        if win_probability is not None:
+            if model_weight is None:
+                model_weight = self.deep_learner.outcome_weight()
+            score = (1 - model_weight) * score + model_weight * win_probability
+        
+        # ومزج نسبة فوز الإعدادات المشابهة السابقة
+        if similar_setups is not None:
+            setup_weight = similar_setups['weight']
+            score = (1 - setup_weight) * score + setup_weight * similar_setups['win_rate']
         
         return min(score, 1.0)
     
@@ -431,7 +738,11 @@ class AIONQuantumUltraMAX:
         # تعديل بناءً على تنويع المحفظة
         diversification_penalty = 1.0 - (len(self.portfolio) * 0.05)
         
-        final_size = base_size * signal_adjustment * opportunity_adjustment * diversification_penalty
+        # تقليص الحجم في نظام التقلب العالي (من حالة النظام المخزنة)
+        regime = opportunity['analysis'].get('regime')
+        regime_adjustment = 0.8 if regime is not None and regime['regime'] == 'HIGH_VOLATILITY' else 1.0
+        
+        final_size = base_size * signal_adjustment * opportunity_adjustment * diversification_penalty * regime_adjustment
         
         # حدود أمان
         final_size = min(final_size, self.current_balance * 0.15)  # 15% حد أقصى
@@ -455,30 +766,62 @@ class AIONQuantumUltraMAX:
             stop_loss = current_price * (1 + (volatility * 1.5))
             take_profit = current_price * (1 - (volatility * 2.0))
         
+        # المستويات الفعلية: الوقف خلف أقرب مستوى والهدف قبل المستوى المعاكس
+        # (فقط إن وقعت داخل حدود التقلب)
+        support, resistance = self.nearest_price_levels(symbol, current_price)
+        buffer = 0.002
+        if direction == 'BUY':
+            if support is not None and stop_loss <= support * (1 - buffer) < current_price:
+                stop_loss = support * (1 - buffer)
+            if resistance is not None and current_price < resistance * (1 - buffer) <= take_profit:
+                take_profit = resistance * (1 - buffer)
+        else:
+            if resistance is not None and current_price < resistance * (1 + buffer) <= stop_loss:
+                stop_loss = resistance * (1 + buffer)
+            if support is not None and take_profit <= support * (1 + buffer) < current_price:
+                take_profit = support * (1 + buffer)
+        
         return stop_loss, take_profit
     
+    def nearest_price_levels(self, symbol, price, intervals=('1h', '15m')):
+        """أقرب دعم ومقاومة للسعر من فهرس المستويات (الإطار الأكبر أولاً)"""
+        support = resistance = None
+        for interval in intervals:
+            level_support, level_resistance = self.deep_learner.level_index.nearest_levels(symbol, interval, price)
+            support = support if support is not None else level_support
+            resistance = resistance if resistance is not None else level_resistance
+        return support, resistance
+    
     def record_trade_for_learning(self, trade, execution_result, market_data):
         """تسجيل الصفقة للتعلم المستقبلي"""
+        insights = self.extract_learning_insights(trade, execution_result)
         learning_record = {
-            'timestamp': datetime.now(),
+            'timestamp': clock.now(),
             'symbol': trade['symbol'],
+            'strategy': trade.get('strategy', 'default'),
             'direction': trade['direction'],
             'size': trade['position_size'],
             'profit': execution_result['profit'],
-            'market_conditions': {
-                'trend': trade['analysis']['trend'],
-                'volatility': trade['analysis']['volatility'],
-                'momentum': trade['analysis']['momentum']
-            },
+            'score': insights['strategy_effectiveness'],
+            'volatility': trade['analysis']['volatility']['current'],
             'outcome': 'WIN' if execution_result['profit'] > 0 else 'LOSS',
-            'learning_insights': self.extract_learning_insights(trade, execution_result)
+            'risk_reward': insights['risk_reward_ratio'],
+            'execution_quality': insights['execution_quality'],
+            'trend_alignment': insights['market_condition_impact']['trend_alignment']
         }
         
+        # نفس متجه الميزات الذي قُيّمت به الصفقة (للتدريب لاحقاً، بترتيب FEATURE_SCHEMA)
+        if self.cycle_features is not None and trade['symbol'] in self.cycle_features:
+            learning_record['features'] = self.cycle_features.row(trade['symbol'])
+        
         self.learning_data.append(learning_record)
+        
+        # التحليل الكامل لا يُحفظ مع الصفقة: ملخصه في سجل التعلم
         self.trade_history.append({
-            **trade,
+            **{key: value for key, value in trade.items() if key != 'analysis'},
+            'pattern_signature': trade['analysis']['patterns'].get('signature'),
             'execution_result': execution_result,
-            'learning_id': len(self.learning_data) - 1
+            'learning_id': self.learning_data.total - 1
         })
     
     def extract_learning_insights(self, trade, execution_result):
@@ -518,31 +861,23 @@ class AIONQuantumUltraMAX:
     
     def generate_mock_market_data(self, symbol):
         """توليد بيانات سوق محاكاة للاختبار"""
-        return {
-            '1h': pd.DataFrame({
-                'open': np.random.uniform(10, 500, 100),
-                'high': np.random.uniform(10, 500, 100),
-                'low': np.random.uniform(10, 500, 100),
-                'close': np.random.uniform(10, 500, 100),
-                'volume': np.random.uniform(1000, 10000, 100)
-            }),
-            '15m': pd.DataFrame({
-                'open': np.random.uniform(10, 500, 50),
-                'high': np.random.uniform(10, 500, 50),
-                'low': np.random.uniform(10, 500, 50),
-                'close': np.random.uniform(10, 500, 50),
-                'volume': np.random.uniform(1000, 10000, 50)
-            }),
-            '5m': pd.DataFrame({
-                'open': np.random.uniform(10, 500, 30),
-                'high': np.random.uniform(10, 500, 30),
-                'low': np.random.uniform(10, 500, 30),
-                'close': np.random.uniform(10, 500, 30),
-                'volume': np.random.uniform(1000, 10000, 30)
-            }),
-            'current_price': np.random.uniform(10, 500),
-            'symbol': symbol
-        }
+        # سلسلة 5m واحدة متجهة تُشتق منها الأطر الأكبر فتبقى متسقة فيما بينها
+        base_interval = self.config.base_interval
+        resampler_limits = self.smart_executor.resampler.base_limit(self.timeframe_limits)
+        start_price = self.smart_executor.get_current_market_price(symbol)
+        base = self.market_simulator.generate_series(resampler_limits, start_price, interval=base_interval)
+        
+        # النوافذ بلا رمز وإطار عمداً: البيانات المصطنعة لا تدخل متتبع النظام ولا فهرس
+        # المستويات ولا ذاكرة المؤشرات فلا تُزاح بها حالة البيانات الحقيقية
+        mock_data = {}
+        for interval, limit in self.timeframe_limits.items():
+            candles = base if interval == base_interval else resample_candles(base, interval)
+            mock_data[interval] = CandleWindow({column: values[-limit:] for column, values in candles.items()})
+        
+        mock_data['current_price'] = float(base['close'][-1])
+        mock_data['symbol'] = symbol
+        self.market_cache.set_price(symbol, mock_data['current_price'])
+        return mock_data
     
     def run_quantum_bot(self, cycle_interval=180):
         """تشغيل البوت الكمي الرئيسي"""
@@ -557,7 +892,7 @@ class AIONQuantumUltraMAX:
         try:
             while True:
                 cycle_count += 1
-                print(f"\n🌀 Quantum Cycle #{cycle_count} - {datetime.now().strftime('%H:%M:%S')}")
+                print(f"\n🌀 Quantum Cycle #{cycle_count} - {clock.now().strftime('%H:%M:%S')}")
                 
                 # تنفيذ الدورة الكمية
                 executed_trades, cycle_profit = self.execute_quantum_cycle()
@@ -572,7 +907,7 @@ class AIONQuantumUltraMAX:
                 
                 # حفظ التقدم كل 20 دورة
                 if cycle_count % 20 == 0:
-                    self.save_quantum_knowledge()
+                    self.learning_worker.request_save()
                     print(f"💾 Progress Saved | Total Profits: ${total_profits:.2f}")
                 
                 # التحقق من تحقيق الهدف
@@ -580,12 +915,28 @@ class AIONQuantumUltraMAX:
                     print("🎉 TARGET ACHIEVED! Mission Accomplished!")
                     break
                 
-                print(f"⏳ Next quantum cycle in {cycle_interval} seconds...")
-                time.sleep(cycle_interval)
-                
+                if self.kline_stream is not None:
+                    # الدورة التالية فور إغلاق شمعة جديدة بدل النوم لفترة ثابتة
+                    print(f"⏳ Next quantum cycle on bar close (max {cycle_interval} seconds)...")
+                    self.kline_stream.wait_for_bar_close(timeout=cycle_interval)
+                else:
+                    print(f"⏳ Next quantum cycle in {cycle_interval} seconds...")
+                    clock.sleep(cycle_interval)
+        
         except KeyboardInterrupt:
             print("🛑 Quantum Bot stopped by user")
             self.generate_final_quantum_report()
+        finally:
+            self.shutdown()
+    
+    def shutdown(self):
+        """إيقاف الخيوط الخلفية: إنهاء ما تبقى من تعلم وحفظ، والبث، ومجمع المسح"""
+        self.learning_worker.stop()
+        if self.kline_stream is not None:
+            self.kline_stream.stop()
+        if self.scan_pool is not None:
+            # الطلبات العالقة لا تُنتظر (تُلغى فقط المهام التي لم تبدأ)
+            self.scan_pool.shutdown(wait=False)
     
     def show_quantum_progress_report(self, cycle_count, total_profits):
         """عرض تقرير تقدم كمي"""
@@ -598,12 +949,44 @@ class AIONQuantumUltraMAX:
         print(f"🚀 Growth: {growth_rate:.1f}%")
         print(f"🎯 Win Rate: {self.performance_metrics.get('win_rate', 0):.1%}")
         print(f"🧠 Learning Progress: {self.performance_metrics.get('learning_progress', 0):.1%}")
+        outcome_model = self.deep_learner.outcome_model
+        if outcome_model.ready:
+            latency = outcome_model.latency_stats()
+            print(f"🤖 Outcome Model: v{outcome_model.version} ({outcome_model.n_samples} samples) | "
+                  f"Inference {latency['mean']:.2f}ms avg / {latency['p95']:.2f}ms p95")
+        if self.learning_worker.pending():
+            print(f"🧵 Learning Queue: {self.learning_worker.pending()} pending")
+        self.show_learning_statistics()
         print(f"🛡️ Protection Level: {self.drawdown_shield.get_protection_level():.1%}")
         
         # توقعات كمية
         if cycle_count >= 10:
             self.show_quantum_predictions()
     
+    def show_learning_statistics(self):
+        """إحصاءات التعلم بمصدريها المختلفين، كل منهما بعنوانه
+        
+        - النافذة: كل صفقات سجل التعلم المحفوظة (آخر capacity صفقة، بلا تناقص)
+        - المتناقصة: ترتيب المتعلم الحديث (StrategyStatsStore، نصف عمر زمني)
+        """
+        if len(self.learning_data) == 0:
+            return
+        
+        print(f"📚 Window Stats (last {len(self.learning_data)} of {self.learning_data.total} trades, undecayed): "
+              f"{self.learning_data.win_rate():.1%} win")
+        for strategy, stats in self.learning_data.strategy_stats().items():
+            trades = stats['wins'] + stats['losses']
+            print(f"   {strategy}: {trades} trades | {stats['wins'] / trades:.1%} win | "
+                  f"${stats['total_profit']:.2f} profit")
+        
+        half_life_days = self.deep_learner.strategy_statistics.half_life / 86400
+        decayed = self.deep_learner.get_best_strategies()
+        if decayed:
+            print(f"📉 Decayed Strategy Ranking (half-life {half_life_days:.0f}d):")
+            for stats in decayed:
+                print(f"   {stats['strategy']}: {stats['effective_trades']:.1f} effective trades | "
+                      f"{stats['win_rate']:.1%} win | ${stats['expectancy']:.2f} expectancy")
+    
     def show_quantum_predictions(self):
         """عرض تنبؤات كمية"""
         daily_growth = (self.current_balance / self.initial_balance) ** (1/30) - 1
@@ -635,7 +1018,7 @@ class AIONQuantumUltraMAX:
         
         total_profit = self.current_balance - self.initial_balance
         total_return = (total_profit / self.initial_balance) * 100
-        days_running = (datetime.now() - self.trade_history[0]['timestamp']).days if self.trade_history else 1
+        days_running = (clock.now() - self.trade_history[0]['timestamp']).days if self.trade_history else 1
         
         print(f"🎯 Mission: 10x Growth in 3 Months")
         print(f"💰 Initial Balance: ${self.initial_balance:.2f}")
@@ -645,7 +1028,8 @@ class AIONQuantumUltraMAX:
         print(f"📅 Days Running: {days_running}")
         print(f"🔢 Total Trades: {len(self.trade_history)}")
         print(f"🎯 Win Rate: {self.performance_metrics.get('win_rate', 0):.1%}")
-        print(f"📊 Learning Cycles: {len(self.learning_data)}")
+        print(f"📊 Learning Cycles: {self.learning_data.total}")
+        self.show_learning_statistics()
         
         if total_return >= 900:  # 10x تقريباً
             print("\n🎉 MISSION ACCOMPLISHED! Target Achieved! 🚀")
@@ -659,13 +1043,16 @@ class AIONQuantumUltraMAX:
             'total_return': total_return,
             'total_trades': len(self.trade_history),
             'win_rate': self.performance_metrics.get('win_rate', 0),
-            'learning_cycles': len(self.learning_data),
+            'learning_cycles': self.learning_data.total,
+            'window_win_rate': self.learning_data.win_rate(),
+            'window_strategy_stats': self.learning_data.strategy_stats(),
+            'decayed_strategy_stats': self.deep_learner.get_best_strategies(),
             'mission_status': 'ACCOMPLISHED' if total_return >= 900 else 'IN_PROGRESS'
         }
 
 # دالة مساعدة لإنشاء البوت
-def create_quantum_bot(initial_balance=50, mode='paper_trading'):
-    return AIONQuantumUltraMAX(initial_balance=initial_balance, mode=mode)
+def create_quantum_bot(initial_balance=50, mode='paper_trading', config=None):
+    return AIONQuantumUltraMAX(initial_balance=initial_balance, mode=mode, config=config)
 
 if __name__ == "__main__":
     bot = create_quantum_bot(initial_balance=50, mode='paper_trading')
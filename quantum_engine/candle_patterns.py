@@ -0,0 +1,166 @@
+import numpy as np
+
+# ===== محرك أنماط الشموع اليابانية =====
+# كل نمط يُقيّم على مصفوفات OHLC كاملة في تمريرة متجهة واحدة (المحور الأخير
+# هو الزمن، فتعمل نفس الدوال على عملة واحدة أو على مصفوفات العملات × الشموع).
+# الموضع i في النتيجة يعني أن النمط اكتمل بإغلاق الشمعة i.
+
+# الاتجاه والثقة لكل نمط (None = نمط تردد أو استمرار وليس انعكاساً)
+PATTERN_LIBRARY = {
+    'bullish_engulfing': {'direction': 'bullish', 'confidence': 0.7},
+    'bearish_engulfing': {'direction': 'bearish', 'confidence': 0.7},
+    'hammer': {'direction': 'bullish', 'confidence': 0.6},
+    'shooting_star': {'direction': 'bearish', 'confidence': 0.6},
+    'morning_star': {'direction': 'bullish', 'confidence': 0.75},
+    'evening_star': {'direction': 'bearish', 'confidence': 0.75},
+    'doji': {'direction': None, 'confidence': 0.3},
+    'inside_bar': {'direction': None, 'confidence': 0.4},
+    'outside_bar': {'direction': None, 'confidence': 0.4}
+}
+
+# المطرقة والشهاب انعكاس فقط بعد حركة سابقة: إغلاق الشمعة السابقة تحت/فوق
+# متوسط آخر TREND_PERIOD إغلاق حتى الشمعة السابقة
+TREND_PERIOD = 10
+
+# عدد الشموع الأخيرة اللازم لتقييم كل الأنماط عند آخر شمعة (مع سياق الاتجاه)
+LOOKBACK = TREND_PERIOD + 1
+
+def previous(values, lag=1):
+    """القيم مزاحة lag شمعة للخلف (أول lag موضع NaN)"""
+    shifted = np.full(values.shape, np.nan)
+    shifted[..., lag:] = values[..., :-lag]
+    return shifted
+
+def prior_trend(closes, period=TREND_PERIOD):
+    """(هابط، صاعد) قبل كل شمعة: إغلاق الشمعة السابقة مقابل متوسط period إغلاق حتى السابقة"""
+    sums = np.cumsum(closes, axis=-1)
+    sma = np.full(closes.shape, np.nan)
+    sma[..., period - 1:] = sums[..., period - 1:]
+    sma[..., period:] -= sums[..., :-period]
+    sma[..., period - 1:] /= period
+    
+    prev_close, prev_sma = previous(closes), previous(sma)
+    with np.errstate(invalid='ignore'):
+        return prev_close < prev_sma, prev_close > prev_sma
+
+def detect_patterns(opens, highs, lows, closes, names=None):
+    """كل أنماط المكتبة (أو names فقط) كمصفوفات منطقية بنفس شكل المدخلات"""
+    opens = np.asarray(opens, dtype=np.float64)
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    names = list(PATTERN_LIBRARY) if names is None else names
+    
+    body = np.abs(closes - opens)
+    candle_range = highs - lows
+    upper_shadow = highs - np.maximum(opens, closes)
+    lower_shadow = np.minimum(opens, closes) - lows
+    bullish = closes > opens
+    bearish = closes < opens
+    
+    prev_open, prev_close = previous(opens), previous(closes)
+    prev_high, prev_low = previous(highs), previous(lows)
+    prev_body = np.abs(prev_close - prev_open)
+    downtrend, uptrend = prior_trend(closes)
+    
+    results = {}
+    with np.errstate(invalid='ignore'):
+        for name in names:
+            if name == 'bullish_engulfing':
+                result = (prev_close < prev_open) & bullish & (opens < prev_close) & (closes > prev_open)
+            elif name == 'bearish_engulfing':
+                result = (prev_close > prev_open) & bearish & (opens > prev_close) & (closes < prev_open)
+            elif name == 'hammer':
+                result = downtrend & (body > 0) & (lower_shadow >= 2 * body) & (upper_shadow <= body)
+            elif name == 'shooting_star':
+                result = uptrend & (body > 0) & (upper_shadow >= 2 * body) & (lower_shadow <= body)
+            elif name == 'doji':
+                result = (candle_range > 0) & (body <= 0.1 * candle_range)
+            elif name == 'inside_bar':
+                result = (highs < prev_high) & (lows > prev_low)
+            elif name == 'outside_bar':
+                result = (highs > prev_high) & (lows < prev_low)
+            elif name in ('morning_star', 'evening_star'):
+                first_open, first_close = previous(opens, 2), previous(closes, 2)
+                first_body = np.abs(first_close - first_open)
+                first_range = previous(highs, 2) - previous(lows, 2)
+                first_mid = (first_open + first_close) / 2
+                # شمعة أولى قوية، ثم شمعة صغيرة، ثم شمعة معاكسة تغلق بعد منتصف الأولى
+                small_middle = prev_body <= 0.3 * first_body
+                strong_first = first_body >= 0.5 * first_range
+                if name == 'morning_star':
+                    result = (strong_first & (first_close < first_open) & small_middle
+                              & bullish & (closes > first_mid))
+                else:
+                    result = (strong_first & (first_close > first_open) & small_middle
+                              & bearish & (closes < first_mid))
+            else:
+                raise ValueError(f"Unknown candle pattern: {name}")
+            results[name] = result
+    
+    return results
+
+def reversal_signals(patterns):
+    """اتجاه (+1 صاعد / -1 هابط / 0) وثقة أقوى نمط انعكاسي في كل شمعة"""
+    shape = next(iter(patterns.values())).shape
+    direction = np.zeros(shape, dtype=np.int8)
+    confidence = np.zeros(shape)
+    
+    # الأنماط الأضعف أولاً فيغلب الأقوى عند التزامن
+    reversal = sorted(
+        (name for name in patterns if PATTERN_LIBRARY[name]['direction'] is not None),
+        key=lambda name: PATTERN_LIBRARY[name]['confidence']
+    )
+    for name in reversal:
+        spec = PATTERN_LIBRARY[name]
+        matched = patterns[name]
+        direction[matched] = 1 if spec['direction'] == 'bullish' else -1
+        confidence[matched] = spec['confidence']
+    
+    return direction, confidence
+
+def window_patterns(window, names=None):
+    """الأنماط على كامل تاريخ نافذة الشموع (للتوسيم والاختبار التاريخي)"""
+    return detect_patterns(window['open'], window['high'], window['low'], window['close'], names)
+
+def latest_patterns(window, names=None):
+    """الأنماط المكتملة عند آخر شمعة فقط (تُقيّم آخر LOOKBACK شمعة كعروض بدون نسخ)"""
+    tail = slice(-LOOKBACK, None)
+    patterns = detect_patterns(
+        np.asarray(window['open'])[tail], np.asarray(window['high'])[tail],
+        np.asarray(window['low'])[tail], np.asarray(window['close'])[tail], names
+    )
+    return {name: bool(matches[-1]) for name, matches in patterns.items()}
+
+def latest_reversal(window):
+    """أقوى نمط انعكاسي عند آخر شمعة: (الاسم، الاتجاه، الثقة) أو None"""
+    if len(window) == 0:
+        return None
+    
+    best = None
+    for name, matched in latest_patterns(window).items():
+        spec = PATTERN_LIBRARY[name]
+        if matched and spec['direction'] is not None and (best is None or spec['confidence'] > best[2]):
+            best = (name, spec['direction'], spec['confidence'])
+    return best
+
+def batch_latest_reversal(opens, highs, lows, closes):
+    """latest_reversal لكل صف من مصفوفات (العملات × الشموع): قائمة (الاسم، الاتجاه، الثقة) أو None"""
+    tail = slice(-LOOKBACK, None)
+    patterns = detect_patterns(opens[:, tail], highs[:, tail], lows[:, tail], closes[:, tail])
+    best_names = np.full(len(closes), None, dtype=object)
+    best_confidence = np.zeros(len(closes))
+    
+    # نفس ترتيب latest_reversal: أول نمط بأعلى ثقة يغلب
+    for name, matched in patterns.items():
+        spec = PATTERN_LIBRARY[name]
+        if spec['direction'] is None:
+            continue
+        stronger = matched[:, -1] & (spec['confidence'] > best_confidence)
+        best_names[stronger] = name
+        best_confidence[stronger] = spec['confidence']
+    
+    return [
+        (name, PATTERN_LIBRARY[name]['direction'], PATTERN_LIBRARY[name]['confidence']) if name is not None else None
+        for name in best_names
+    ]
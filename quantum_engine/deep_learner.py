@@ -1,24 +1,86 @@
 import numpy as np
 import pandas as pd
 import json
+import os
 import pickle
-from datetime import datetime
-from collections import deque
 import warnings
 warnings.filterwarnings('ignore')
 
+import clock
+from quantum_engine import indicators, candle_patterns
+from market_scanner.support_resistance import SupportResistanceIndex
+from quantum_engine.knowledge_journal import KnowledgeJournal
+from quantum_engine.insight_store import InsightStore, OUTCOMES
+from quantum_engine.outcome_model import OutcomeModel
+from quantum_engine.setup_index import SetupIndex
+from quantum_engine.pattern_signatures import PatternSignatureTable, pattern_signature
+from quantum_engine.regime_engine import RegimeEngine
+from quantum_engine.strategy_stats import StrategyStatsStore
+
+class LearnerSnapshot:
+    """حالة التعلم التي يقرؤها مسار التداول: نسخ لا تتغير بعد نشرها
+    
+    العامل الخلفي يطبق المهمة كاملة على نسخ العمل ثم ينشر لقطة جديدة
+    باستبدال مرجع واحد (كما في OutcomeModel.publish)، فالدورة ترى المهمة
+    كلها أو لا تراها.
+    """
+    
+    __slots__ = ('signature_table', 'strategy_statistics', 'pattern_database', 'outcome')
+    
+    def __init__(self, signature_table, strategy_statistics, pattern_database, outcome):
+        self.signature_table = signature_table
+        self.strategy_statistics = strategy_statistics
+        self.pattern_database = pattern_database
+        self.outcome = outcome
+
 class QuantumDeepLearner:
-    def __init__(self):
-        self.learning_memory = deque(maxlen=10000)
-        self.pattern_database = {}
-        self.strategy_performance = {}
+    def __init__(self, models_dir='data/models'):
+        # رؤى الصفقات كسجلات مهيكلة مضغوطة (بدون نسخ الصفقة وتحليلها)
+        self.learning_memory = InsightStore(capacity=10000)
+        # الإعدادات السابقة المشابهة: أقرب الجيران في فضاء الميزات مع نتائجها
+        self.pattern_database = SetupIndex(capacity=self.learning_memory.capacity)
         self.market_regime_knowledge = {}
         self.learning_progress = 0
         
-        # تحميل المعرفة السابقة
+        # أداء حديث (متناقص ونافذة ثابتة) لكل استراتيجية ونظام وعملة مع ترتيب جاهز
+        self.strategy_statistics = StrategyStatsStore()
+        
+        # كل ملفات المعرفة تحت مجلد واحد (الإعادة التاريخية تمرر مجلداً مؤقتاً)
+        self.models_dir = models_dir
+        
+        # سجل إلحاقي: كل حفظ يكتب الرؤى الجديدة فقط
+        self.knowledge_path = os.path.join(models_dir, 'quantum_knowledge.db')
+        self.journal = None
+        self.pending_insights = []
+        
+        # نتائج تاريخية متناقصة لكل توقيع إعداد (اتجاه، نظام، انعكاس، اختراق، حجم)
+        self.signature_table = PatternSignatureTable(path=os.path.join(models_dir, 'pattern_signatures.npz'))
+        self.primary_timeframe = '1h'
+        
+        # نظام السوق لكل عملة محدّث تراكمياً على الإطار الأساسي (قراءة O(1))
+        self.regime_engine = RegimeEngine(interval=self.primary_timeframe)
+        
+        # نموذج احتمال الربح المتعلم من ميزات الصفقات ونتائجها
+        self.outcome_model = OutcomeModel(directory=os.path.join(models_dir, 'outcome'))
+        
+        # مستويات الدعم والمقاومة لكل عملة وإطار (تُبنى تدريجياً من المحاور)
+        self.level_index = SupportResistanceIndex()
+        
+        # تحميل المعرفة السابقة ثم نشر أول لقطة لمسار التداول
+        self.snapshot = None
         self.load_knowledge_base()
+        self.publish_snapshot()
+    
+    def publish_snapshot(self):
+        """نشر نسخ العمل الحالية كلقطة جديدة (استبدال مرجع واحد)"""
+        self.snapshot = LearnerSnapshot(
+            self.signature_table.copy(),
+            self.strategy_statistics.copy(),
+            self.pattern_database.copy(),
+            self.outcome_model.published
+        )
     
-    def recognize_patterns(self, market_data):
+    def recognize_patterns(self, market_data, snapshot=None):
         """التعرف على الأنماط السوقية المتقدمة"""
         patterns = {
             'trend_patterns': self.analyze_trend_patterns(market_data),
@@ -28,11 +90,200 @@ class QuantumDeepLearner:
             'confidence': 0.0
         }
         
-        # حساب ثقة النمط
+        return self.finalize_patterns(patterns, market_data, snapshot)
+    
+    def finalize_patterns(self, patterns, market_data, snapshot=None):
+        """ثقة الأنماط وتوقيع الإعداد ونتائجه السابقة (مشتركة بين المسار الفردي والمجمع)"""
+        snapshot = self.snapshot if snapshot is None else snapshot
         patterns['confidence'] = self.calculate_pattern_confidence(patterns)
         
+        # توقيع الإعداد ونتائجه السابقة: الثقة تميل لنسبة الفوز الفعلية كلما كثرت العينات
+        window = self.primary_window(market_data)
+        if window is not None:
+            key = pattern_signature(patterns, self.classify_market_regime(window), self.analyze_volume_profile(window))
+            history = snapshot.signature_table.lookup(key)
+            history_weight = 0.5 * min(history['samples'] / 20, 1.0)
+            patterns['signature'] = key
+            patterns['signature_history'] = history
+            patterns['confidence'] = (1 - history_weight) * patterns['confidence'] + history_weight * history['win_rate']
+        
         return patterns
     
+    def recognize_patterns_batch(self, market_data, snapshot=None):
+        """recognize_patterns لكل العملات: {العملة: الأنماط} بنفس النتائج
+        
+        نوافذ كل إطار تُجمع في مصفوفات (العملات × الشموع) حسب الطول وتُحسب
+        مقاييس كل عائلات الأنماط لها في تمريرة متجهة واحدة، ثم تُدمج نتائج
+        الأطر لكل عملة بنفس ترتيب وقواعد الدمج في المسار الفردي.
+        """
+        windows_by_timeframe = {}
+        for symbol, data in market_data.items():
+            for timeframe, window in self.timeframe_items(data):
+                if not window.empty:
+                    windows_by_timeframe.setdefault(timeframe, {})[symbol] = window
+        
+        window_metrics = {}
+        for timeframe, windows in windows_by_timeframe.items():
+            for symbols, columns in indicators.stack_windows(windows, ('open', 'high', 'low', 'close', 'volume')):
+                group_metrics = self.batch_window_patterns(columns, [windows[symbol] for symbol in symbols])
+                for symbol, metrics in zip(symbols, group_metrics):
+                    window_metrics[(symbol, timeframe)] = metrics
+        
+        results = {}
+        for symbol, data in market_data.items():
+            timeframes = [
+                window_metrics[(symbol, timeframe)]
+                for timeframe, window in self.timeframe_items(data) if not window.empty
+            ]
+            results[symbol] = self.finalize_patterns(self.combine_window_patterns(timeframes), data, snapshot)
+        return results
+    
+    def batch_window_patterns(self, columns, windows):
+        """مقاييس الأنماط لمجموعة نوافذ بنفس الطول: قاموس لكل نافذة (None = الشرط غير متحقق)"""
+        opens, highs, lows = columns['open'], columns['high'], columns['low']
+        closes, volumes = columns['close'], columns['volume']
+        n_bars = closes.shape[1]
+        metrics = [
+            {'trend': None, 'reversal': None, 'divergence': None, 'consolidation': None, 'breakout': None}
+            for _ in windows
+        ]
+        
+        if n_bars >= 3:
+            for window_metrics, reversal in zip(metrics, candle_patterns.batch_latest_reversal(opens, highs, lows, closes)):
+                window_metrics['reversal'] = reversal
+        
+        if n_bars < 20:
+            return metrics
+        
+        # الاتجاه (calculate_trend_metrics)
+        sma_20 = indicators.batch_sma_last(closes, 20)
+        sma_50 = indicators.batch_sma_last(closes, min(50, n_bars))
+        trend_strength = np.abs(sma_20 - sma_50) / sma_50
+        acceleration = (closes[:, -1] / closes[:, -5] - 1) - (closes[:, -5] / closes[:, -10] - 1)
+        
+        # تباعد RSI: آخر خمس قيم تكفيها آخر 19 شمعة
+        rsi = indicators.batch_rsi(closes[:, -19:], 14)
+        price_trend = closes[:, -1] - closes[:, -5]
+        rsi_trend = rsi[:, -1] - rsi[:, -5]
+        
+        # التجميع واحتمالية الاختراق (calculate_breakout_probability)
+        volatility = indicators.batch_returns_volatility(closes) * np.sqrt(365)
+        price_range = (np.max(highs, axis=1) - np.min(lows, axis=1)) / np.mean(closes, axis=1)
+        consolidating = (volatility < 0.02) & (price_range < 0.05)
+        
+        recent_volume = np.mean(volumes[:, -5:], axis=1)
+        previous_volume = np.mean(volumes[:, -10:-5], axis=1)
+        recent_volatility = indicators.batch_returns_volatility(closes[:, -10:]) * np.sqrt(365)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_trend = np.where(previous_volume == 0, 0.5, np.minimum(recent_volume / previous_volume / 2, 1.0))
+            compression = np.where(volatility == 0, 0.5, 1 - np.minimum(recent_volatility / volatility, 1.0))
+        breakout_probability = np.minimum(volume_trend * 0.4 + compression * 0.3 + min(n_bars / 50, 1.0) * 0.3, 1.0)
+        
+        for row, window_metrics in enumerate(metrics):
+            window_metrics['trend'] = {
+                'is_uptrend': sma_20[row] > sma_50[row],
+                'is_downtrend': sma_20[row] < sma_50[row],
+                'strength': trend_strength[row],
+                'acceleration': acceleration[row]
+            }
+            if price_trend[row] > 0 and rsi_trend[row] < 0:
+                window_metrics['divergence'] = 'bearish'
+            elif price_trend[row] < 0 and rsi_trend[row] > 0:
+                window_metrics['divergence'] = 'bullish'
+            if consolidating[row]:
+                window_metrics['consolidation'] = (price_range[row], breakout_probability[row])
+        
+        if n_bars < 30:
+            return metrics
+        
+        # الاختراق: مستويات الدعم والمقاومة من فهرس المستويات لكل نافذة (حالة لكل عملة)
+        levels = np.array([self.identify_support_resistance(window) for window in windows], dtype=np.float64)
+        current_prices = closes[:, -1]
+        near_level = ((np.abs(levels[:, 1] - current_prices) / current_prices < 0.01)
+                      | (np.abs(levels[:, 0] - current_prices) / current_prices < 0.01))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strong_momentum = (closes[:, -1] / closes[:, -5] - 1 > 0.02) & (volumes[:, -1] / volumes[:, -5] - 1 > 0.1)
+        
+        for row in np.flatnonzero(near_level):
+            metrics[row]['breakout'] = 'bullish' if strong_momentum[row] else 'bearish'
+        return metrics
+    
+    def combine_window_patterns(self, timeframes):
+        """دمج مقاييس أطر العملة بنفس قواعد analyze_*_patterns (آخر إطار يغلب)"""
+        trends = {
+            'uptrend_detected': False,
+            'downtrend_detected': False,
+            'trend_strength': 0.0,
+            'trend_duration': 0,
+            'acceleration': 0.0
+        }
+        candlestick = {'reversal_detected': False, 'reversal_type': None, 'confidence': 0.0}
+        divergence = {'divergence_detected': False, 'reversal_type': None, 'confidence': 0.0}
+        consolidation = {
+            'in_consolidation': False,
+            'consolidation_range': 0.0,
+            'breakout_direction': None,
+            'breakout_probability': 0.0
+        }
+        breakout = {
+            'breakout_imminent': False,
+            'expected_direction': None,
+            'confidence': 0.0,
+            'target_levels': {'short_term': 0, 'medium_term': 0}
+        }
+        
+        for metrics in timeframes:
+            if metrics['trend'] is not None:
+                trend = metrics['trend']
+                trends['uptrend_detected'] |= trend['is_uptrend']
+                trends['downtrend_detected'] |= trend['is_downtrend']
+                trends['trend_strength'] = max(trends['trend_strength'], trend['strength'])
+                trends['acceleration'] = max(trends['acceleration'], trend['acceleration'])
+            if metrics['reversal'] is not None:
+                name, reversal_type, confidence = metrics['reversal']
+                candlestick.update(reversal_detected=True, reversal_type=reversal_type, confidence=confidence, pattern=name)
+            if metrics['divergence'] is not None:
+                divergence.update(divergence_detected=True, reversal_type=metrics['divergence'], confidence=0.6)
+            if metrics['consolidation'] is not None:
+                consolidation['in_consolidation'] = True
+                consolidation['consolidation_range'], consolidation['breakout_probability'] = metrics['consolidation']
+            if metrics['breakout'] is not None:
+                breakout.update(breakout_imminent=True, expected_direction=metrics['breakout'], confidence=0.7)
+        
+        reversals = {
+            'potential_reversal': False,
+            'reversal_type': None,  # 'bullish' or 'bearish'
+            'confidence': 0.0,
+            'trigger_level': 0.0
+        }
+        if candlestick['reversal_detected'] or divergence['divergence_detected']:
+            reversals['potential_reversal'] = True
+            reversals['confidence'] = max(candlestick['confidence'], divergence['confidence'])
+            reversals['reversal_type'] = candlestick.get('reversal_type') or divergence.get('reversal_type')
+        
+        return {
+            'trend_patterns': trends,
+            'reversal_patterns': reversals,
+            'consolidation_patterns': consolidation,
+            'breakout_patterns': breakout,
+            'confidence': 0.0
+        }
+    
+    def primary_window(self, market_data):
+        """نافذة الإطار الأساسي لعملة (أو أول إطار متاح)"""
+        timeframes = dict(self.timeframe_items(market_data))
+        window = timeframes.get(self.primary_timeframe)
+        if window is None or window.empty:
+            window = next((data for data in timeframes.values() if not data.empty), None)
+        return window
+    
+    def timeframe_items(self, market_data):
+        """أزواج (الإطار الزمني، النافذة) فقط دون الحقول الأخرى مثل السعر والرمز"""
+        return [
+            (timeframe, data) for timeframe, data in market_data.items()
+            if timeframe not in ('symbol', 'current_price') and hasattr(data, 'empty')
+        ]
+    
     def analyze_trend_patterns(self, market_data):
         """تحليل أنماط الاتجاه"""
         trends = {
@@ -44,8 +295,8 @@ class QuantumDeepLearner:
         }
         
         # تحليل متعدد الأطر الزمنية
-        for timeframe, data in market_data.items():
-            if timeframe != 'symbol' and not data.empty:
+        for timeframe, data in self.timeframe_items(market_data):
+            if not data.empty:
                 trend_analysis = self.calculate_trend_metrics(data)
                 trends['uptrend_detected'] |= trend_analysis['is_uptrend']
                 trends['downtrend_detected'] |= trend_analysis['is_downtrend']
@@ -59,11 +310,11 @@ class QuantumDeepLearner:
         if len(data) < 20:
             return {'is_uptrend': False, 'is_downtrend': False, 'strength': 0.0, 'acceleration': 0.0}
         
-        closes = data['close'].values
+        closes = np.asarray(data['close'])
         
         # المتوسطات المتحركة
-        sma_20 = np.mean(closes[-20:])
-        sma_50 = np.mean(closes[-min(50, len(closes)):])
+        sma_20 = indicators.window_sma(data, 20)
+        sma_50 = indicators.window_sma(data, min(50, len(closes)))
         
         # قوة الاتجاه
         trend_strength = abs(sma_20 - sma_50) / sma_50
@@ -90,15 +341,15 @@ class QuantumDeepLearner:
         }
         
         # تحليل الشموع اليابانية
-        candle_patterns = self.analyze_candlestick_patterns(market_data)
+        candlestick = self.analyze_candlestick_patterns(market_data)
         
         # تحليل الـ RSI divergence
         rsi_divergence = self.analyze_rsi_divergence(market_data)
         
-        if candle_patterns['reversal_detected'] or rsi_divergence['divergence_detected']:
+        if candlestick['reversal_detected'] or rsi_divergence['divergence_detected']:
             reversals['potential_reversal'] = True
-            reversals['confidence'] = max(candle_patterns['confidence'], rsi_divergence['confidence'])
-            reversals['reversal_type'] = candle_patterns.get('reversal_type') or rsi_divergence.get('reversal_type')
+            reversals['confidence'] = max(candlestick['confidence'], rsi_divergence['confidence'])
+            reversals['reversal_type'] = candlestick.get('reversal_type') or rsi_divergence.get('reversal_type')
         
         return reversals
     
@@ -110,45 +361,33 @@ class QuantumDeepLearner:
             'confidence': 0.0
         }
         
-        # تحليل مبسط للشموع (في التطبيق الحقيقي يستخدم مكتبة متخصصة)
-        for timeframe, data in market_data.items():
-            if timeframe != 'symbol' and not data.empty and len(data) >= 3:
-                recent_candles = data.tail(3)
-                
-                # نمط engulfing
-                if self.is_bullish_engulfing(recent_candles):
-                    patterns['reversal_detected'] = True
-                    patterns['reversal_type'] = 'bullish'
-                    patterns['confidence'] = 0.7
+        # محرك الأنماط المتجه: أقوى نمط انعكاسي مكتمل عند آخر شمعة
+        for timeframe, data in self.timeframe_items(market_data):
+            if not data.empty and len(data) >= 3:
+                reversal = candle_patterns.latest_reversal(data)
                 
-                elif self.is_bearish_engulfing(recent_candles):
+                if reversal is not None:
+                    name, reversal_type, confidence = reversal
                     patterns['reversal_detected'] = True
-                    patterns['reversal_type'] = 'bearish'
-                    patterns['confidence'] = 0.7
+                    patterns['reversal_type'] = reversal_type
+                    patterns['confidence'] = confidence
+                    patterns['pattern'] = name
         
         return patterns
     
     def is_bullish_engulfing(self, candles):
-        """الكشف عن نمط الـ Bullish Engulfing"""
+        """الكشف عن نمط الـ Bullish Engulfing عند آخر شمعة"""
         if len(candles) < 2:
             return False
         
-        prev, curr = candles.iloc[-2], candles.iloc[-1]
-        return (prev['close'] < prev['open'] and  # شمعة هابطة سابقة
-                curr['close'] > curr['open'] and  # شمعة صاعدة حالية
-                curr['open'] < prev['close'] and   # فتح الحالية أقل من إغلاق السابقة
-                curr['close'] > prev['open'])      # إغلاق الحالية أعلى من فتح السابقة
+        return candle_patterns.latest_patterns(candles, ['bullish_engulfing'])['bullish_engulfing']
     
     def is_bearish_engulfing(self, candles):
-        """الكشف عن نمط الـ Bearish Engulfing"""
+        """الكشف عن نمط الـ Bearish Engulfing عند آخر شمعة"""
         if len(candles) < 2:
             return False
         
-        prev, curr = candles.iloc[-2], candles.iloc[-1]
-        return (prev['close'] > prev['open'] and  # شمعة صاعدة سابقة
-                curr['close'] < curr['open'] and  # شمعة هابطة حالية
-                curr['open'] > prev['close'] and   # فتح الحالية أعلى من إغلاق السابقة
-                curr['close'] < prev['open'])      # إغلاق الحالية أقل من فتح السابقة
+        return candle_patterns.latest_patterns(candles, ['bearish_engulfing'])['bearish_engulfing']
     
     def analyze_rsi_divergence(self, market_data):
         """تحليل الـ RSI divergence"""
@@ -159,10 +398,10 @@ class QuantumDeepLearner:
         }
         
         # تحليل مبسط للـ divergence
-        for timeframe, data in market_data.items():
-            if timeframe != 'symbol' and not data.empty and len(data) >= 20:
-                rsi = self.calculate_rsi(data['close'], 14)
-                prices = data['close'].values
+        for timeframe, data in self.timeframe_items(market_data):
+            if not data.empty and len(data) >= 20:
+                prices = np.asarray(data['close'])
+                rsi = indicators.window_rsi(data, 14)
                 
                 if len(rsi) >= 5:
                     # تح divergence بين السعر والـ RSI
@@ -183,23 +422,7 @@ class QuantumDeepLearner:
     
     def calculate_rsi(self, prices, period=14):
         """حساب مؤشر RSI"""
-        if len(prices) < period:
-            return np.array([50] * len(prices))
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gains = np.convolve(gains, np.ones(period)/period, mode='valid')
-        avg_losses = np.convolve(losses, np.ones(period)/period, mode='valid')
-        
-        rs = avg_gains / (avg_losses + 1e-10)
-        rsi = 100 - (100 / (1 + rs))
-        
-        # إضافة قيم للبداية لتتناسب مع طول prices
-        rsi_full = np.concatenate([np.array([50] * (len(prices) - len(rsi))), rsi])
-        
-        return rsi_full
+        return indicators.rsi(prices, period)
     
     def analyze_consolidation_patterns(self, market_data):
         """تحليل أنماط التجميع"""
@@ -210,10 +433,10 @@ class QuantumDeepLearner:
             'breakout_probability': 0.0
         }
         
-        for timeframe, data in market_data.items():
-            if timeframe != 'symbol' and not data.empty and len(data) >= 20:
+        for timeframe, data in self.timeframe_items(market_data):
+            if not data.empty and len(data) >= 20:
                 volatility = self.calculate_volatility(data)
-                price_range = (data['high'].max() - data['low'].min()) / data['close'].mean()
+                price_range = (np.max(data['high']) - np.min(data['low'])) / np.mean(data['close'])
                 
                 if volatility < 0.02 and price_range < 0.05:  # تقلب منخفض ونطاق سعري ضيق
                     consolidation['in_consolidation'] = True
@@ -231,11 +454,11 @@ class QuantumDeepLearner:
             'target_levels': {'short_term': 0, 'medium_term': 0}
         }
         
-        for timeframe, data in market_data.items():
-            if timeframe != 'symbol' and not data.empty and len(data) >= 30:
+        for timeframe, data in self.timeframe_items(market_data):
+            if not data.empty and len(data) >= 30:
                 # تحليل مستويات الدعم والمقاومة
                 support, resistance = self.identify_support_resistance(data)
-                current_price = data['close'].iloc[-1]
+                current_price = np.asarray(data['close'])[-1]
                 
                 # تحديد قرب السعر من المستويات الحرجة
                 distance_to_resistance = abs(resistance - current_price) / current_price
@@ -255,8 +478,7 @@ class QuantumDeepLearner:
     
     def calculate_volatility(self, data):
         """حساب التقلب"""
-        returns = data['close'].pct_change().dropna()
-        return returns.std() * np.sqrt(365)  # تقلب سنوي
+        return indicators.window_volatility(data) * np.sqrt(365)  # تقلب سنوي
     
     def calculate_breakout_probability(self, data):
         """حساب احتمالية الاختراق"""
@@ -276,7 +498,7 @@ class QuantumDeepLearner:
         if len(data) < 10:
             return 0.5
         
-        volumes = data['volume'].values
+        volumes = np.asarray(data['volume'])
         recent_volume = np.mean(volumes[-5:])
         previous_volume = np.mean(volumes[-10:-5])
         
@@ -303,11 +525,24 @@ class QuantumDeepLearner:
     def identify_support_resistance(self, data):
         """تحديد مستويات الدعم والمقاومة"""
         if len(data) < 20:
-            return data['low'].min(), data['high'].max()
-        
-        # طريقة مبسطة لتحديد الدعم والمقاومة
-        support = data['low'].tail(20).min()
-        resistance = data['high'].tail(20).max()
+            return np.min(data['low']), np.max(data['high'])
+        
+        # الافتراضي: أدنى وأعلى آخر 20 شمعة
+        support = np.min(np.asarray(data['low'])[-20:])
+        resistance = np.max(np.asarray(data['high'])[-20:])
+        
+        # المستويات الفعلية من المحاور عندما تحمل النافذة رمزها وإطارها
+        symbol = getattr(data, 'symbol', None)
+        interval = getattr(data, 'interval', None)
+        if symbol is not None and interval is not None:
+            self.level_index.update(symbol, interval, data)
+            level_support, level_resistance = self.level_index.nearest_levels(
+                symbol, interval, float(np.asarray(data['close'])[-1])
+            )
+            if level_support is not None:
+                support = level_support
+            if level_resistance is not None:
+                resistance = level_resistance
         
         return support, resistance
     
@@ -316,8 +551,9 @@ class QuantumDeepLearner:
         if len(data) < 10:
             return False
         
-        recent_gain = (data['close'].iloc[-1] / data['close'].iloc[-5] - 1)
-        volume_increase = (data['volume'].iloc[-1] / data['volume'].iloc[-5] - 1)
+        closes, volumes = np.asarray(data['close']), np.asarray(data['volume'])
+        recent_gain = (closes[-1] / closes[-5] - 1)
+        volume_increase = (volumes[-1] / volumes[-5] - 1)
         
         return recent_gain > 0.02 and volume_increase > 0.1
     
@@ -339,27 +575,112 @@ class QuantumDeepLearner:
         
         return sum(confidence_factors) if confidence_factors else 0.0
     
-    def update_learning(self, recent_trades, market_data):
-        """تحديث التعلم من الصفقات الحديثة"""
+    def update_learning(self, recent_trades, market_data, features=None):
+        """تحديث التعلم من الصفقات الحديثة (features: مصفوفة ميزات الدورة إن وُجدت)"""
+        new_insights = []
         for trade in recent_trades:
-            learning_insight = {
-                'trade_data': trade,
-                'market_conditions': self.extract_market_conditions(trade, market_data),
-                'outcome': 'WIN' if trade['execution_result']['profit'] > 0 else 'LOSS',
-                'timestamp': datetime.now(),
-                'lessons_learned': self.extract_lessons(trade)
-            }
+            learning_insight = self.compact_insight(
+                trade,
+                self.extract_market_conditions(trade, market_data, features),
+                clock.now(),
+                self.extract_lessons(trade)
+            )
+            if features is not None and trade['symbol'] in features:
+                learning_insight['features'] = features.row(trade['symbol']).copy()
             
             self.learning_memory.append(learning_insight)
-            self.update_strategy_performance(learning_insight)
+            self.pending_insights.append(learning_insight)
+            new_insights.append(learning_insight)
+            self.strategy_statistics.record(
+                learning_insight['strategy'], learning_insight['profit'],
+                learning_insight['market_regime'], learning_insight['symbol']
+            )
+            
+            if trade.get('pattern_signature') is not None:
+                self.signature_table.record(trade['pattern_signature'], trade['execution_result']['profit'])
         
+        self.train_outcome_model(new_insights)
         self.learning_progress = min(len(self.learning_memory) / 1000, 1.0)
+        
+        # مسار التداول يرى المهمة بعد اكتمالها فقط
+        self.publish_snapshot()
+    
+    def train_outcome_model(self, insights):
+        """دفعة partial_fit من الرؤى التي تحمل متجه ميزات"""
+        labeled = [insight for insight in insights if insight.get('features') is not None]
+        if not labeled:
+            return 0
+        
+        features = np.stack([insight['features'] for insight in labeled])
+        outcomes = np.array([insight['outcome'] == 'WIN' for insight in labeled], dtype=np.int64)
+        trained = self.outcome_model.learn(features, outcomes)
+        if trained:
+            self.outcome_model.publish()
+        
+        # نفس الصفقات المحسومة تدخل فهرس التشابه
+        self.pattern_database.add(features, outcomes, [insight['profit'] for insight in labeled])
+        return trained
+    
+    def predict_outcomes(self, features, snapshot=None):
+        """{العملة: احتمال الربح} لكل عملات مصفوفة الميزات (فارغ قبل جاهزية النموذج)"""
+        snapshot = self.snapshot if snapshot is None else snapshot
+        return self.outcome_model.score_matrix(features, snapshot.outcome)
+    
+    def outcome_weight(self, snapshot=None):
+        """وزن نموذج النتائج في درجة الفرصة حسب النسخة المنشورة في اللقطة"""
+        snapshot = self.snapshot if snapshot is None else snapshot
+        return self.outcome_model.weight_of(snapshot.outcome)
+    
+    def similar_setups(self, features, k=20, snapshot=None):
+        """{العملة: نسبة فوز ومتوسط ربح أقرب k صفقة سابقة} لكل عملات الدورة باستعلام واحد"""
+        pattern_database = (self.snapshot if snapshot is None else snapshot).pattern_database
+        stats = pattern_database.neighbor_stats(features.values, k)
+        if stats is None:
+            return {}
+        
+        # وزن نسبة فوز الجيران في درجة الفرصة: يكبر مع حجم الفهرس حتى 0.2
+        weight = 0.2 * min(stats['neighbors'] / k, 1.0) * min(len(pattern_database) / 500, 1.0)
+        return {
+            symbol: {
+                'win_rate': float(stats['win_rate'][row]),
+                'avg_profit': float(stats['avg_profit'][row]),
+                'distance': float(stats['distance'][row]),
+                'neighbors': stats['neighbors'],
+                'weight': weight
+            }
+            for row, symbol in enumerate(features.symbols)
+        }
+    
+    def compact_insight(self, trade, market_conditions, timestamp, lessons_learned):
+        """الرؤية كحقول مسطحة صغيرة (ما يحتاجه التعلم فقط من الصفقة)"""
+        profit = trade['execution_result']['profit']
+        return {
+            'timestamp': timestamp,
+            'symbol': trade['symbol'],
+            'strategy': trade.get('strategy', 'default'),
+            'direction': trade.get('direction'),
+            'outcome': 'WIN' if profit > 0 else 'LOSS',
+            'profit': profit,
+            'expected_profit': trade.get('expected_profit'),
+            'size': trade.get('position_size'),
+            'score': trade.get('score'),
+            'trend_strength': market_conditions.get('trend_strength'),
+            'volatility': market_conditions.get('volatility'),
+            'market_regime': market_conditions.get('market_regime'),
+            'volume_profile': market_conditions.get('volume_profile'),
+            'lessons_learned': lessons_learned
+        }
     
-    def extract_market_conditions(self, trade, market_data):
+    def extract_market_conditions(self, trade, market_data, features=None):
         """استخراج ظروف السوق أثناء الصفقة"""
         symbol = trade['symbol']
-        if symbol in market_data:
-            data = market_data[symbol]
+        if features is not None and symbol in features:
+            # محسوبة مسبقاً في مصفوفة ميزات الدورة
+            return features.conditions(symbol)
+        
+        # market_data[symbol] قاموس أطر زمنية: المقاييس تُحسب على نافذة الإطار الأساسي
+        data = self.primary_window(market_data[symbol]) if symbol in market_data else None
+        if data is not None:
             return {
                 'trend_strength': self.calculate_trend_metrics(data)['strength'],
                 'volatility': self.calculate_volatility(data),
@@ -373,8 +694,9 @@ class QuantumDeepLearner:
         if len(data) < 10:
             return 'UNKNOWN'
         
-        recent_volume = data['volume'].tail(5).mean()
-        historical_volume = data['volume'].mean()
+        volumes = np.asarray(data['volume'])
+        recent_volume = np.mean(volumes[-5:])
+        historical_volume = np.mean(volumes)
         
         if recent_volume > historical_volume * 1.5:
             return 'HIGH_VOLUME'
@@ -384,7 +706,13 @@ class QuantumDeepLearner:
             return 'NORMAL_VOLUME'
     
     def classify_market_regime(self, data):
-        """تصنيف النظام السوقي"""
+        """تصنيف النظام السوقي (من محرك الأنظمة إن حملت النافذة رمزها على الإطار الأساسي)"""
+        symbol = getattr(data, 'symbol', None)
+        if symbol is not None and getattr(data, 'interval', None) == self.regime_engine.interval:
+            state = self.regime_engine.update(symbol, data)
+            if state is not None:
+                return state['regime']
+        
         volatility = self.calculate_volatility(data)
         trend_strength = self.calculate_trend_metrics(data)['strength']
         
@@ -415,74 +743,101 @@ class QuantumDeepLearner:
         
         return lessons
     
-    def update_strategy_performance(self, learning_insight):
-        """تحديث أداء الاستراتيجيات"""
-        strategy = learning_insight['trade_data'].get('strategy', 'default')
-        outcome = learning_insight['outcome']
-        
-        if strategy not in self.strategy_performance:
-            self.strategy_performance[strategy] = {'wins': 0, 'losses': 0, 'total_profit': 0}
-        
-        if outcome == 'WIN':
-            self.strategy_performance[strategy]['wins'] += 1
-            self.strategy_performance[strategy]['total_profit'] += learning_insight['trade_data']['execution_result']['profit']
-        else:
-            self.strategy_performance[strategy]['losses'] += 1
-            self.strategy_performance[strategy]['total_profit'] += learning_insight['trade_data']['execution_result']['profit']
-    
-    def get_best_strategies(self, top_n=3):
-        """الحصول على أفضل الاستراتيجيات أداءً"""
-        if not self.strategy_performance:
-            return []
-        
-        strategies = []
-        for strategy, performance in self.strategy_performance.items():
-            total_trades = performance['wins'] + performance['losses']
-            win_rate = performance['wins'] / total_trades if total_trades > 0 else 0
-            avg_profit = performance['total_profit'] / total_trades if total_trades > 0 else 0
-            
-            strategies.append({
-                'strategy': strategy,
-                'win_rate': win_rate,
-                'avg_profit': avg_profit,
-                'total_trades': total_trades,
-                'score': win_rate * avg_profit * min(total_trades / 10, 1.0)
-            })
-        
-        strategies.sort(key=lambda x: x['score'], reverse=True)
-        return strategies[:top_n]
+    def get_best_strategies(self, top_n=3, market_regime=None, symbol=None, snapshot=None):
+        """أفضل الاستراتيجيات بالأداء الحديث (اختيارياً داخل نظام سوق و/أو عملة)"""
+        snapshot = self.snapshot if snapshot is None else snapshot
+        return snapshot.strategy_statistics.top(top_n, market_regime, symbol)
+    
+    def rebuild_strategy_statistics(self, records):
+        """إعادة تشغيل الرؤى المحفوظة بالترتيب الزمني في إحصاءات الاستراتيجيات"""
+        vocabularies = self.learning_memory.vocabularies
+        columns = (records['strategy'], records['market_regime'], records['symbol'], records['profit'], records['timestamp'])
+        for strategy, regime, symbol, profit, timestamp in zip(*columns):
+            self.strategy_statistics.record(
+                vocabularies['strategy'].name(strategy), float(profit),
+                vocabularies['market_regime'].name(regime), vocabularies['symbol'].name(symbol),
+                float(timestamp) if np.isfinite(timestamp) else None
+            )
+    
+    def knowledge_state(self):
+        """الحالة الصغيرة التي تُحفظ كلقطة (بدون ذاكرة الرؤى)"""
+        return {
+            'market_regime_knowledge': self.market_regime_knowledge,
+            'learning_progress': self.learning_progress,
+            'last_updated': clock.now().isoformat()
+        }
     
     def save_model(self):
-        """حفظ نموذج التعلم"""
+        """حفظ نموذج التعلم: إلحاق الرؤى الجديدة فقط مع لقطة الحالة"""
         try:
-            knowledge = {
-                'learning_memory': list(self.learning_memory),
-                'pattern_database': self.pattern_database,
-                'strategy_performance': self.strategy_performance,
-                'market_regime_knowledge': self.market_regime_knowledge,
-                'learning_progress': self.learning_progress,
-                'last_updated': datetime.now().isoformat()
-            }
+            if self.journal is None:
+                self.journal = KnowledgeJournal(self.knowledge_path, max_records=self.learning_memory.capacity)
             
-            with open('data/models/quantum_knowledge.pkl', 'wb') as f:
-                pickle.dump(knowledge, f)
+            saved = self.journal.append(self.pending_insights)
+            self.journal.save_state(self.knowledge_state())
+            self.pending_insights = []
+            self.signature_table.save()
             
-            print("💾 Quantum learning model saved")
+            checkpoint = self.outcome_model.save_checkpoint()
+            if checkpoint:
+                print(f"💾 Outcome model checkpoint v{self.outcome_model.version} ({self.outcome_model.n_samples} samples)")
+            
+            print(f"💾 Quantum learning model saved ({saved} new insights)")
         except Exception as e:
             print(f"⚠️ Error saving quantum model: {e}")
     
     def load_knowledge_base(self):
-        """تحميل قاعدة المعرفة"""
+        """تحميل قاعدة المعرفة: آخر لقطة للحالة ثم ذيل السجل"""
         try:
-            with open('data/models/quantum_knowledge.pkl', 'rb') as f:
-                knowledge = pickle.load(f)
-                
-            self.learning_memory = deque(knowledge.get('learning_memory', []), maxlen=10000)
-            self.pattern_database = knowledge.get('pattern_database', {})
-            self.strategy_performance = knowledge.get('strategy_performance', {})
-            self.market_regime_knowledge = knowledge.get('market_regime_knowledge', {})
-            self.learning_progress = knowledge.get('learning_progress', 0)
+            self.journal = KnowledgeJournal(self.knowledge_path, max_records=self.learning_memory.capacity)
+            self.signature_table.load()
+            
+            if self.journal.is_empty():
+                self.import_legacy_knowledge()
             
-            print("🧠 Quantum knowledge base loaded")
-        except:
-            print("🆕 Starting with fresh quantum knowledge")
+            state, insights = self.journal.load()
+            if state is None and not insights:
+                print("🆕 Starting with fresh quantum knowledge")
+                return
+            
+            state = state or {}
+            self.learning_memory.extend(insights)
+            self.market_regime_knowledge = state.get('market_regime_knowledge', {})
+            self.learning_progress = state.get('learning_progress', 0)
+            
+            # فهرس التشابه يُعاد بناؤه من الرؤى المحفوظة (لا يُحفظ منفصلاً)
+            records = self.learning_memory.view()
+            wins = records['outcome'] == OUTCOMES.index('WIN')
+            self.pattern_database.add(records['features'], wins, records['profit'])
+            self.rebuild_strategy_statistics(records)
+            
+            # بدون نقطة محفوظة متوافقة: تدريب أولي على الرؤى المحفوظة
+            if not self.outcome_model.load_latest():
+                self.outcome_model.learn(records['features'], wins)
+                self.outcome_model.publish()
+            
+            print(f"🧠 Quantum knowledge base loaded ({len(self.learning_memory)} insights)")
+        except Exception as e:
+            print(f"🆕 Starting with fresh quantum knowledge ({e})")
+    
+    def import_legacy_knowledge(self, legacy_path=None):
+        """نقل ملف pickle القديم (إن وُجد) إلى السجل مرة واحدة"""
+        legacy_path = legacy_path or os.path.join(self.models_dir, 'quantum_knowledge.pkl')
+        if not os.path.exists(legacy_path):
+            return
+        
+        with open(legacy_path, 'rb') as f:
+            knowledge = pickle.load(f)
+        
+        # الرؤى القديمة تحمل الصفقة كاملة: تُحوّل إلى الشكل المضغوط قبل الإلحاق
+        self.journal.append([
+            self.compact_insight(
+                insight['trade_data'], insight.get('market_conditions', {}),
+                insight.get('timestamp'), insight.get('lessons_learned', [])
+            )
+            for insight in knowledge.get('learning_memory', [])
+        ])
+        self.journal.save_state({
+            key: value for key, value in knowledge.items() if key not in ('learning_memory', 'strategy_performance', 'pattern_database')
+        })
+        print(f"📦 Imported legacy knowledge from {legacy_path}")
@@ -0,0 +1,191 @@
+import numpy as np
+
+from quantum_engine import indicators
+
+# ترتيب ثابت للأعمدة: أي تغيير فيه يغير FEATURE_SCHEMA_VERSION
+FEATURE_SCHEMA = (
+    'score',
+    'trend_quality',
+    'momentum_quality',
+    'volatility_quality',
+    'volume_quality',
+    'liquidity_quality',
+    'rsi',
+    'macd',
+    'macd_signal',
+    'stochastic',
+    'daily_volatility',
+    'trend_strength',
+    'acceleration',
+    'volatility',
+    'volume_ratio',
+    'market_regime',
+    'pattern_confidence',
+    'reversal_direction',
+    'support_distance',
+    'resistance_distance',
+    'trend_signal',
+    'momentum_strength',
+    'volatility_current'
+)
+FEATURE_SCHEMA_VERSION = 2
+
+MARKET_REGIMES = ('SIDEWAYS', 'TRENDING', 'HIGH_VOLATILITY')
+
+# قيمة الاتجاه الرئيسي من محلل الاتجاه في درجة الفرصة (أي اتجاه آخر 0.2)
+PRIMARY_TREND_SIGNALS = {'STRONG_UPTREND': 0.8, 'UPTREND': 0.6, 'SIDEWAYS': 0.4}
+
+# أعمدة score_batch → أعمدة المصفوفة
+BATCH_COLUMNS = {
+    'score': 'score',
+    'trend_quality': 'trend',
+    'momentum_quality': 'momentum',
+    'volatility_quality': 'volatility',
+    'volume_quality': 'volume',
+    'liquidity_quality': 'liquidity',
+    'rsi': 'rsi',
+    'macd': 'macd',
+    'macd_signal': 'macd_signal',
+    'stochastic': 'stochastic',
+    'daily_volatility': 'daily_volatility'
+}
+
+class FeatureMatrix:
+    """مصفوفة ميزات float32 متصلة (العملات × الميزات) لدورة واحدة"""
+    
+    def __init__(self, symbols, values, schema=FEATURE_SCHEMA):
+        self.symbols = list(symbols)
+        self.values = values
+        self.schema = schema
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.columns = {name: column for column, name in enumerate(schema)}
+    
+    def __contains__(self, symbol):
+        return symbol in self.index
+    
+    def __len__(self):
+        return len(self.symbols)
+    
+    def row(self, symbol):
+        """ميزات العملة كعرض بدون نسخ"""
+        return self.values[self.index[symbol]]
+    
+    def column(self, name):
+        return self.values[:, self.columns[name]]
+    
+    def get(self, symbol, name):
+        return float(self.values[self.index[symbol], self.columns[name]])
+    
+    def conditions(self, symbol):
+        """ظروف السوق للعملة بنفس شكل QuantumDeepLearner.extract_market_conditions"""
+        row = self.row(symbol)
+        volume_ratio = float(row[self.columns['volume_ratio']])
+        if np.isnan(volume_ratio):
+            volume_profile = 'UNKNOWN'
+        elif volume_ratio > 1.5:
+            volume_profile = 'HIGH_VOLUME'
+        elif volume_ratio < 0.5:
+            volume_profile = 'LOW_VOLUME'
+        else:
+            volume_profile = 'NORMAL_VOLUME'
+        
+        return {
+            'trend_strength': float(row[self.columns['trend_strength']]),
+            'volatility': float(row[self.columns['volatility']]),
+            'volume_profile': volume_profile,
+            'market_regime': MARKET_REGIMES[int(row[self.columns['market_regime']])]
+        }
+
+class FeatureBuilder:
+    """بناء مصفوفة الميزات مرة واحدة في الدورة من نوافذ كل العملات
+    
+    المؤشرات تُحسب مجمعة على مصفوفات (العملات × الشموع)، ونفس المصفوفة
+    تغذي التقييم والمتعلم وتسجيل الصفقات بدل إعادة بناء القواميس.
+    """
+    
+    def __init__(self, opportunity_finder, level_index=None, timeframe='1h', regime_engine=None):
+        self.opportunity_finder = opportunity_finder
+        self.level_index = level_index
+        self.timeframe = timeframe
+        self.regime_engine = regime_engine
+    
+    def build(self, market_data, analysis=None):
+        symbols = [symbol for symbol in market_data if symbol != 'symbol']
+        values = np.full((len(symbols), len(FEATURE_SCHEMA)), np.nan, dtype=np.float32)
+        matrix = FeatureMatrix(symbols, values)
+        columns = matrix.columns
+        
+        # 1. درجات الماسح ومؤشراته (تمريرة مجمعة واحدة)
+        batch_scores = self.opportunity_finder.score_batch(market_data)
+        for row, symbol in enumerate(symbols):
+            scores = batch_scores[symbol]
+            for name, key in BATCH_COLUMNS.items():
+                if key in scores:
+                    values[row, columns[name]] = scores[key]
+        
+        # 2. مقاييس المتعلم على الإطار الأساسي (نفس معادلات QuantumDeepLearner)
+        windows = {symbol: market_data[symbol][self.timeframe] for symbol in symbols}
+        values[:, columns['trend_strength']] = 0.0
+        values[:, columns['acceleration']] = 0.0
+        for group, stacked in indicators.stack_windows(windows, ('close', 'volume')):
+            group_rows = [matrix.index[symbol] for symbol in group]
+            self.fill_learner_features(values, group_rows, columns, stacked['close'], stacked['volume'])
+        
+        # 3. إشارات البوت (الاتجاه والزخم والتقلب) والأنماط والمستويات ونظام السوق المخزن
+        for row, symbol in enumerate(symbols):
+            symbol_analysis = (analysis or {}).get(symbol, {})
+            if 'trend' in symbol_analysis:
+                values[row, columns['trend_signal']] = PRIMARY_TREND_SIGNALS.get(
+                    symbol_analysis['trend']['primary_trend'], 0.2
+                )
+            if 'momentum' in symbol_analysis:
+                values[row, columns['momentum_strength']] = symbol_analysis['momentum']['strength']
+            if 'volatility' in symbol_analysis:
+                values[row, columns['volatility_current']] = symbol_analysis['volatility']['current']
+            
+            regime = self.regime_engine.get(symbol) if self.regime_engine is not None else None
+            if regime is not None:
+                values[row, columns['market_regime']] = regime['regime_code']
+            
+            patterns = symbol_analysis.get('patterns')
+            if patterns is not None:
+                reversal = patterns['reversal_patterns']
+                values[row, columns['pattern_confidence']] = patterns['confidence']
+                values[row, columns['reversal_direction']] = {'bullish': 1, 'bearish': -1}.get(reversal['reversal_type'], 0)
+            
+            if self.level_index is not None and len(windows[symbol]):
+                price = float(np.asarray(windows[symbol]['close'])[-1])
+                support, resistance = self.level_index.nearest_levels(symbol, self.timeframe, price)
+                if support is not None:
+                    values[row, columns['support_distance']] = (price - support) / price
+                if resistance is not None:
+                    values[row, columns['resistance_distance']] = (resistance - price) / price
+        
+        return matrix
+    
+    def fill_learner_features(self, values, rows, columns, closes, volumes):
+        """الاتجاه والتسارع والتقلب والحجم ونظام السوق لمجموعة عملات بنفس الطول"""
+        n_bars = closes.shape[1]
+        if n_bars == 0:
+            return
+        
+        volatility = indicators.batch_returns_volatility(closes) * np.sqrt(365)
+        values[rows, columns['volatility']] = volatility
+        
+        trend_strength = np.zeros(len(rows))
+        if n_bars >= 20:
+            sma_20 = indicators.batch_sma_last(closes, 20)
+            sma_50 = indicators.batch_sma_last(closes, min(50, n_bars))
+            trend_strength = np.abs(sma_20 - sma_50) / sma_50
+            
+            recent_momentum = closes[:, -1] / closes[:, -5] - 1
+            previous_momentum = closes[:, -5] / closes[:, -10] - 1
+            values[rows, columns['trend_strength']] = trend_strength
+            values[rows, columns['acceleration']] = recent_momentum - previous_momentum
+        
+        if n_bars >= 10:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values[rows, columns['volume_ratio']] = np.mean(volumes[:, -5:], axis=1) / np.mean(volumes, axis=1)
+        
+        regime = np.where(volatility > 0.03, 2, np.where(trend_strength > 0.05, 1, 0))
+        values[rows, columns['market_regime']] = regime
@@ -0,0 +1,317 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ===== مؤشرات على مصفوفات خام =====
+
+def rolling_window(values, period):
+    """نوافذ متحركة على المحور الأخير كعرض بدون نسخ
+    
+    مصفوفة 1D تعطي (عدد النوافذ × الفترة) و 2D تعطي (العملات × عدد النوافذ × الفترة).
+    """
+    values = np.ascontiguousarray(values)
+    shape = values.shape[:-1] + (values.shape[-1] - period + 1, period)
+    strides = values.strides + (values.strides[-1],)
+    return np.lib.stride_tricks.as_strided(values, shape=shape, strides=strides, writeable=False)
+
+def sma_last(values, period):
+    """متوسط آخر period قيمة"""
+    return np.mean(values[-period:])
+
+def rsi(prices, period=14):
+    """مؤشر RSI بمتوسطات بسيطة للمكاسب والخسائر"""
+    if len(prices) < period:
+        return np.array([50] * len(prices))
+    
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    
+    avg_gains = np.convolve(gains, np.ones(period)/period, mode='valid')
+    avg_losses = np.convolve(losses, np.ones(period)/period, mode='valid')
+    
+    rs = avg_gains / (avg_losses + 1e-10)
+    rsi_values = 100 - (100 / (1 + rs))
+    
+    # إضافة قيم للبداية لتتناسب مع طول prices
+    return np.concatenate([np.array([50] * (len(prices) - len(rsi_values))), rsi_values])
+
+def ewm_mean(values, span):
+    """متوسط أسي مطابق لـ pandas ewm(span=span).mean() (adjust=True)
+    
+    نفس العمليات وبنفس الترتيب فالنتيجة مطابقة بت ببت، بدون كلفة
+    إنشاء Series لكل استدعاء.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    output = np.empty(len(values))
+    if len(values) == 0:
+        return output
+    
+    com = (span - 1) / 2
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    
+    series = values.tolist()
+    weighted = series[0]
+    observations = int(weighted == weighted)
+    old_wt = 1.
+    output[0] = weighted if observations else np.nan
+    
+    for i in range(1, len(series)):
+        cur = series[i]
+        is_observation = cur == cur
+        observations += is_observation
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = ((old_wt * weighted) + cur) / (old_wt + 1.)
+                old_wt += 1.
+        elif is_observation:
+            weighted = cur
+        output[i] = weighted if observations else np.nan
+    
+    return output
+
+def macd(prices, fast=12, slow=26, signal=9):
+    """مؤشر MACD وخط الإشارة"""
+    if len(prices) < slow:
+        return np.array([0] * len(prices)), np.array([0] * len(prices))
+    
+    macd_line = ewm_mean(prices, fast) - ewm_mean(prices, slow)
+    return macd_line, ewm_mean(macd_line, signal)
+
+def stochastic(highs, lows, closes, period=14):
+    """مؤشر Stochastic %K"""
+    if len(closes) < period:
+        return np.array([50] * len(closes))
+    
+    closes = np.asarray(closes, dtype=np.float64)
+    lowest = rolling_window(np.asarray(lows, dtype=np.float64), period).min(axis=1)
+    highest = rolling_window(np.asarray(highs, dtype=np.float64), period).max(axis=1)
+    
+    stoch = np.full(len(closes), 50.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 * (closes[period - 1:] - lowest) / (highest - lowest)
+    stoch[period - 1:] = np.where(np.isnan(values), 50.0, values)
+    return stoch
+
+def returns_volatility(closes):
+    """الانحراف المعياري للعوائد النسبية (NaN إن قلت العوائد عن اثنين)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    returns = closes[1:] / closes[:-1] - 1
+    if len(returns) < 2:
+        return np.nan
+    return np.std(returns, ddof=1)
+
+# ===== مؤشرات مجمعة على مصفوفات (العملات × الشموع) =====
+
+def stack_windows(windows, columns=('close',)):
+    """تجميع نوافذ العملات في مصفوفات 2D حسب طول النافذة
+    
+    يعيد قائمة (العملات، {العمود: مصفوفة العملات × الشموع}) لكل طول، فكل
+    عملة تُحسب على نافذتها الكاملة كما في المسار الفردي.
+    """
+    groups = {}
+    for symbol, window in windows.items():
+        groups.setdefault(len(window), []).append(symbol)
+    
+    return [
+        (symbols, {
+            column: np.array([np.asarray(windows[symbol][column], dtype=np.float64) for symbol in symbols]).reshape(len(symbols), length)
+            for column in columns
+        })
+        for length, symbols in groups.items()
+    ]
+
+def batch_sma_last(values, period):
+    """متوسط آخر period قيمة لكل عملة"""
+    return np.mean(values[:, -period:], axis=1)
+
+def batch_rsi(prices, period=14):
+    """RSI لكل عملة (نفس خوارزمية rsi على كل صف)"""
+    n_symbols, n_bars = prices.shape
+    if n_bars < period:
+        return np.full((n_symbols, n_bars), 50.0)
+    
+    deltas = np.diff(prices, axis=1)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    
+    if n_bars == period:
+        # مثل np.convolve عندما تكون النافذة أطول من التغيرات: قيمتان بمجموع كل التغيرات
+        avg_gains = np.repeat(gains.sum(axis=1, keepdims=True) / period, 2, axis=1)
+        avg_losses = np.repeat(losses.sum(axis=1, keepdims=True) / period, 2, axis=1)
+    else:
+        avg_gains = rolling_window(gains, period).mean(axis=2)
+        avg_losses = rolling_window(losses, period).mean(axis=2)
+    
+    rs = avg_gains / (avg_losses + 1e-10)
+    output = np.full((n_symbols, n_bars), 50.0)
+    output[:, n_bars - rs.shape[1]:] = 100 - (100 / (1 + rs))
+    return output
+
+def batch_ewm_mean(values, span):
+    """ewm_mean لكل صف: حلقة على الشموع فقط وكل خطوة متجهة عبر العملات
+    
+    نفس العمليات لكل عنصر فالنتيجة مطابقة لـ ewm_mean صفاً صفاً.
+    """
+    # (الشموع × العملات) حتى يكون كل عمود زمني متصلاً في الذاكرة
+    values = np.ascontiguousarray(np.asarray(values, dtype=np.float64).T)
+    output = np.empty(values.shape)
+    if len(values) == 0:
+        return output.T
+    
+    com = (span - 1) / 2
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    weighted = values[0].copy()
+    
+    if not np.isnan(values).any():
+        # بدون قيم مفقودة يتطور الوزن بنفس الشكل لكل العملات فيكفي رقم واحد
+        old_wt = 1.
+        output[0] = weighted
+        for i in range(1, len(values)):
+            cur = values[i]
+            old_wt *= old_wt_factor
+            blended = ((old_wt * weighted) + cur) / (old_wt + 1.)
+            np.copyto(blended, weighted, where=weighted == cur)
+            weighted = blended
+            old_wt += 1.
+            output[i] = weighted
+        return output.T
+    
+    observations = (weighted == weighted).astype(np.int64)
+    old_wt = np.ones(values.shape[1])
+    output[0] = np.where(observations > 0, weighted, np.nan)
+    
+    for i in range(1, len(values)):
+        cur = values[i]
+        is_observation = cur == cur
+        observations += is_observation
+        valid = weighted == weighted
+        
+        old_wt = np.where(valid, old_wt * old_wt_factor, old_wt)
+        with np.errstate(invalid='ignore'):
+            blended = ((old_wt * weighted) + cur) / (old_wt + 1.)
+        weighted = np.where(valid & is_observation & (weighted != cur), blended, weighted)
+        old_wt = np.where(valid & is_observation, old_wt + 1., old_wt)
+        weighted = np.where(~valid & is_observation, cur, weighted)
+        output[i] = np.where(observations > 0, weighted, np.nan)
+    
+    return output.T
+
+def batch_macd(prices, fast=12, slow=26, signal=9):
+    """MACD وخط الإشارة لكل عملة"""
+    if prices.shape[1] < slow:
+        return np.zeros(prices.shape), np.zeros(prices.shape)
+    
+    macd_line = batch_ewm_mean(prices, fast) - batch_ewm_mean(prices, slow)
+    return macd_line, batch_ewm_mean(macd_line, signal)
+
+def batch_stochastic(highs, lows, closes, period=14):
+    """Stochastic %K لكل عملة"""
+    if closes.shape[1] < period:
+        return np.full(closes.shape, 50.0)
+    
+    lowest = rolling_window(lows, period).min(axis=2)
+    highest = rolling_window(highs, period).max(axis=2)
+    
+    stoch = np.full(closes.shape, 50.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 * (closes[:, period - 1:] - lowest) / (highest - lowest)
+    stoch[:, period - 1:] = np.where(np.isnan(values), 50.0, values)
+    return stoch
+
+def batch_returns_volatility(closes):
+    """الانحراف المعياري للعوائد النسبية لكل عملة"""
+    returns = closes[:, 1:] / closes[:, :-1] - 1
+    if returns.shape[1] < 2:
+        return np.full(len(closes), np.nan)
+    return np.std(returns, axis=1, ddof=1)
+
+# ===== ذاكرة المؤشرات المشتركة =====
+
+class IndicatorCache:
+    """حفظ نتائج المؤشرات لكل (عملة، إطار، آخر شمعة) ليُحسب كل مؤشر مرة في الدورة
+    
+    المفتاح يشمل طول النافذة وإغلاق وحجم آخر شمعة حتى لا تُعاد نتيجة
+    قديمة عندما تتحدث الشمعة الجارية في مكانها. النوافذ بدون رمز وإطار
+    (مثل DataFrame) تُحسب مباشرة بدون حفظ.
+    """
+    
+    def __init__(self, max_entries=8192):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+    
+    def window_key(self, window):
+        """مفتاح النافذة أو None إن لم تحمل رمزاً وإطاراً"""
+        symbol = getattr(window, 'symbol', None)
+        interval = getattr(window, 'interval', None)
+        if symbol is None or interval is None or len(window) == 0:
+            return None
+        return (symbol, interval, len(window), int(window['timestamp'][-1]),
+                float(window['close'][-1]), float(window['volume'][-1]))
+    
+    def get(self, window, name, compute):
+        """نتيجة المؤشر name للنافذة (تُحسب عند أول طلب فقط)"""
+        key = self.window_key(window)
+        if key is None:
+            return compute()
+        
+        key = key + (name,)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.entries[key]
+        
+        value = compute()
+        for array in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(array, np.ndarray):
+                # النتيجة مشتركة بين المستهلكين فلا يجوز تعديلها
+                array.flags.writeable = False
+        
+        with self.lock:
+            self.stats['misses'] += 1
+            self.entries[key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def get_statistics(self):
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self.entries),
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+            }
+
+# الذاكرة المشتركة بين الماسح والمتعلم
+shared_indicator_cache = IndicatorCache()
+
+# ===== مؤشرات على نوافذ الشموع (مع الحفظ) =====
+
+def window_sma(window, period, cache=shared_indicator_cache):
+    return cache.get(window, ('sma', period), lambda: sma_last(np.asarray(window['close']), period))
+
+def window_rsi(window, period=14, cache=shared_indicator_cache):
+    return cache.get(window, ('rsi', period), lambda: rsi(np.asarray(window['close']), period))
+
+def window_macd(window, fast=12, slow=26, signal=9, cache=shared_indicator_cache):
+    return cache.get(window, ('macd', fast, slow, signal), lambda: macd(np.asarray(window['close']), fast, slow, signal))
+
+def window_stochastic(window, period=14, cache=shared_indicator_cache):
+    return cache.get(window, ('stochastic', period),
+                     lambda: stochastic(window['high'], window['low'], window['close'], period))
+
+def window_volatility(window, cache=shared_indicator_cache):
+    return cache.get(window, ('volatility',), lambda: returns_volatility(window['close']))
@@ -0,0 +1,202 @@
+from datetime import datetime
+
+import numpy as np
+
+from quantum_engine.feature_builder import FEATURE_SCHEMA, MARKET_REGIMES
+
+OUTCOMES = ('LOSS', 'WIN')
+DIRECTIONS = ('HOLD', 'BUY', 'SELL')
+VOLUME_PROFILES = ('UNKNOWN', 'HIGH_VOLUME', 'LOW_VOLUME', 'NORMAL_VOLUME')
+
+# الدروس كبتات في حقل واحد (قد تجتمع أكثر من درس في الرؤية)
+LESSONS = (
+    'STRONG_SIGNAL_CONFIRMATION',
+    'MODERATE_SUCCESS',
+    'RISK_MANAGEMENT_WORKED',
+    'NEED_BETTER_ENTRY'
+)
+
+# سجل رؤية واحد بحجم ثابت (~150 بايت) بدل قاموس يحمل الصفقة وتحليلها كاملين
+INSIGHT_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('symbol', 'i4'),
+    ('strategy', 'i2'),
+    ('direction', 'i1'),
+    ('outcome', 'i1'),
+    ('market_regime', 'i1'),
+    ('volume_profile', 'i1'),
+    ('lessons', 'u1'),
+    ('profit', 'f8'),
+    ('expected_profit', 'f4'),
+    ('size', 'f4'),
+    ('score', 'f4'),
+    ('trend_strength', 'f4'),
+    ('volatility', 'f4'),
+    ('trend_alignment', 'f4'),
+    ('risk_reward', 'f4'),
+    ('execution_quality', 'f4'),
+    ('features', 'f4', (len(FEATURE_SCHEMA),))
+])
+
+# الحقول النصية وقاموس ترميزها (المفتوحة تُضاف قيمها عند أول ظهور)
+CATEGORICAL_FIELDS = ('symbol', 'strategy', 'direction', 'outcome', 'market_regime', 'volume_profile')
+NUMERIC_FIELDS = (
+    'profit', 'expected_profit', 'size', 'score', 'trend_strength', 'volatility',
+    'trend_alignment', 'risk_reward', 'execution_quality'
+)
+
+class Vocabulary:
+    """ترميز نصوص متكررة (العملات، الاستراتيجيات، الأنظمة...) كأعداد صغيرة"""
+    
+    def __init__(self, names=()):
+        self.names = []
+        self.codes = {}
+        for name in names:
+            self.code(name)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self.codes[name] = code
+            self.names.append(name)
+        return code
+    
+    def lookup(self, name):
+        """رمز الاسم دون إضافته (-1 إن لم يظهر بعد)"""
+        return self.codes.get(name, -1)
+    
+    def name(self, code):
+        return self.names[code] if code >= 0 else None
+
+class InsightStore:
+    """مخزن رؤى التداول كمصفوفة NumPy مهيكلة بسعة ثابتة (حلقي)
+    
+    الاستعلامات (أداء الاستراتيجيات، نسب الفوز) عمليات متجهة على الأعمدة،
+    والسجلات تُفك إلى قواميس صغيرة فقط عند الحاجة (الحفظ والعرض).
+    """
+    
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=INSIGHT_DTYPE)
+        self.size = 0
+        self.head = 0
+        self.total = 0
+        self.vocabularies = {
+            'symbol': Vocabulary(),
+            'strategy': Vocabulary(['default']),
+            'direction': Vocabulary(DIRECTIONS),
+            'outcome': Vocabulary(OUTCOMES),
+            'market_regime': Vocabulary(MARKET_REGIMES),
+            'volume_profile': Vocabulary(VOLUME_PROFILES)
+        }
+        self.lesson_bits = {lesson: 1 << bit for bit, lesson in enumerate(LESSONS)}
+    
+    def __len__(self):
+        return self.size
+    
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+    
+    def append(self, insight):
+        """إضافة رؤية من قاموس مفكوك (الحقول الناقصة NaN أو -1)"""
+        record = self.records[self.head]
+        timestamp = insight.get('timestamp')
+        record['timestamp'] = timestamp.timestamp() if isinstance(timestamp, datetime) else (timestamp or np.nan)
+        
+        for field in CATEGORICAL_FIELDS:
+            value = insight.get(field)
+            record[field] = -1 if value is None else self.vocabularies[field].code(value)
+        
+        record['lessons'] = 0
+        for lesson in insight.get('lessons_learned', ()):
+            record['lessons'] |= self.lesson_bits.get(lesson, 0)
+        
+        for field in NUMERIC_FIELDS:
+            value = insight.get(field)
+            record[field] = np.nan if value is None else value
+        
+        features = insight.get('features')
+        record['features'] = np.nan
+        if features is not None:
+            # متجهات مخطط أقدم: الأعمدة المضافة لاحقاً (في آخر المخطط) تبقى NaN
+            features = np.asarray(features)
+            self.records['features'][self.head, :len(features)] = features
+        
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.total += 1
+    
+    def extend(self, insights):
+        for insight in insights:
+            self.append(insight)
+    
+    def view(self):
+        """الرؤى المحفوظة بالترتيب الزمني (نسخة فقط عند التفاف الحلقة)"""
+        if self.size < self.capacity:
+            return self.records[:self.size]
+        return np.concatenate((self.records[self.head:], self.records[:self.head]))
+    
+    def active(self):
+        """الرؤى المحفوظة بدون ترتيب (عرض بدون نسخ، يكفي للتجميع)"""
+        return self.records[:self.size]
+    
+    def decode(self, record):
+        """سجل واحد → قاموس (نفس مفاتيح append)"""
+        insight = {
+            'timestamp': datetime.fromtimestamp(record['timestamp']) if np.isfinite(record['timestamp']) else None,
+            'lessons_learned': [lesson for lesson, bit in self.lesson_bits.items() if record['lessons'] & bit]
+        }
+        for field in CATEGORICAL_FIELDS:
+            insight[field] = self.vocabularies[field].name(int(record[field]))
+        for field in NUMERIC_FIELDS:
+            value = float(record[field])
+            insight[field] = None if np.isnan(value) else value
+        features = record['features']
+        insight['features'] = None if np.isnan(features).all() else features.copy()
+        return insight
+    
+    def mask(self, **filters):
+        """قناع منطقي للرؤى المحفوظة حسب قيم الحقول النصية (مثل strategy='trend')"""
+        records = self.active()
+        selected = np.ones(len(records), dtype=bool)
+        for field, value in filters.items():
+            code = self.vocabularies[field].lookup(value)
+            if code < 0:
+                # قيمة لم تُسجل قط؛ و-1 هو أيضاً رمز الحقل الناقص فلا يُقارن به
+                return np.zeros(len(records), dtype=bool)
+            selected &= records[field] == code
+        return selected
+    
+    def win_rate(self, **filters):
+        records = self.active()[self.mask(**filters)] if filters else self.active()
+        if len(records) == 0:
+            return 0.0
+        return float(np.mean(records['outcome'] == OUTCOMES.index('WIN')))
+    
+    def strategy_stats(self):
+        """{الاستراتيجية: wins, losses, total_profit} بتجميع bincount واحد لكل عمود"""
+        records = self.active()
+        codes = records['strategy']
+        known = codes >= 0
+        codes = codes[known]
+        if len(codes) == 0:
+            return {}
+        
+        vocabulary = self.vocabularies['strategy']
+        wins = np.bincount(codes, weights=records['outcome'][known] == OUTCOMES.index('WIN'), minlength=len(vocabulary))
+        trades = np.bincount(codes, minlength=len(vocabulary))
+        profits = np.bincount(codes, weights=np.nan_to_num(records['profit'][known]), minlength=len(vocabulary))
+        
+        return {
+            vocabulary.name(code): {
+                'wins': int(wins[code]),
+                'losses': int(trades[code] - wins[code]),
+                'total_profit': float(profits[code])
+            }
+            for code in np.flatnonzero(trades)
+        }
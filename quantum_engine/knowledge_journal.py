@@ -0,0 +1,113 @@
+import os
+import pickle
+import sqlite3
+import threading
+
+class KnowledgeJournal:
+    """سجل إلحاقي لمعرفة المتعلم في SQLite (وضع WAL)
+    
+    كل حفظ يكتب الرؤى الجديدة فقط في معاملة واحدة، والحالة الصغيرة
+    (معرفة أنظمة السوق وتقدم التعلم ووقت آخر تحديث) تُستبدل كلقطة واحدة.
+    الضغط الدوري يحذف ما زاد عن آخر max_records رؤية فيبقى الملف محدوداً.
+    جدول توقيعات الأنماط يُحفظ منفصلاً، وإحصاءات الاستراتيجيات تُعاد بناؤها
+    بإعادة تشغيل الرؤى عند التحميل.
+    """
+    
+    def __init__(self, path='data/models/quantum_knowledge.db', max_records=10000, compact_every=1000):
+        self.path = path
+        self.max_records = max_records
+        self.compact_every = compact_every
+        self.appended_since_compact = 0
+        self.lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS insights (id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, payload BLOB NOT NULL)'
+        )
+    
+    def append(self, records):
+        """إلحاق رؤى جديدة (الكلفة تتناسب مع عددها فقط)"""
+        if not records:
+            return 0
+        
+        rows = [(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL),) for record in records]
+        with self.lock:
+            with self.transaction():
+                self.connection.executemany('INSERT INTO insights (payload) VALUES (?)', rows)
+            
+            self.appended_since_compact += len(rows)
+            if self.appended_since_compact >= self.compact_every:
+                self.compact_locked()
+        return len(rows)
+    
+    def save_state(self, state):
+        """استبدال لقطة الحالة (قاموس صغير)"""
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO snapshot (key, payload) VALUES (?, ?)', ('state', payload))
+    
+    def load(self):
+        """(آخر لقطة للحالة أو None، آخر max_records رؤية بالترتيب)"""
+        with self.lock:
+            row = self.connection.execute("SELECT payload FROM snapshot WHERE key = 'state'").fetchone()
+            records = self.connection.execute(
+                'SELECT payload FROM (SELECT id, payload FROM insights ORDER BY id DESC LIMIT ?) ORDER BY id',
+                (self.max_records,)
+            ).fetchall()
+        
+        state = pickle.loads(row[0]) if row else None
+        return state, [pickle.loads(payload) for (payload,) in records]
+    
+    def is_empty(self):
+        with self.lock:
+            has_state = self.connection.execute('SELECT 1 FROM snapshot LIMIT 1').fetchone()
+            has_records = self.connection.execute('SELECT 1 FROM insights LIMIT 1').fetchone()
+        return not has_state and not has_records
+    
+    def compact(self):
+        with self.lock:
+            return self.compact_locked()
+    
+    def compact_locked(self):
+        """حذف الرؤى الأقدم من آخر max_records ونقل WAL إلى الملف الرئيسي"""
+        with self.transaction():
+            deleted = self.connection.execute(
+                'DELETE FROM insights WHERE id <= (SELECT MAX(id) FROM insights) - ?', (self.max_records,)
+            ).rowcount
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.appended_since_compact = 0
+        return deleted
+    
+    def transaction(self):
+        return JournalTransaction(self.connection)
+    
+    def count(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM insights').fetchone()[0]
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class JournalTransaction:
+    """BEGIN/COMMIT صريحة (مع ROLLBACK عند الخطأ) لاتصال بلا معاملات ضمنية"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def __enter__(self):
+        self.connection.execute('BEGIN')
+        return self.connection
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+
+class LearningWorker:
+    """خيط خلفي للتعلم والحفظ حتى لا يتأخر مسار التداول
+    
+    مسار التداول يضع مهام التعلم في طابور ويعود فوراً؛ الخيط ينفذها
+    بالترتيب على نسخ العمل ثم ينشر المتعلم لقطة جديدة (LearnerSnapshot:
+    جدول التوقيعات وإحصاءات الاستراتيجيات وفهرس التشابه ونسخة النموذج
+    المنشورة) باستبدال مرجع واحد، ومسار التداول يقرأ آخر لقطة فقط فلا
+    يرى مهمة نصف مطبقة. المهمة تحمل نسخاً من البيانات التي قد تعدلها
+    الدورة التالية. في الوضع المتزامن (inline) تُنفذ المهام فوراً في نفس
+    الخيط (للإعادة التاريخية القابلة للتكرار).
+    """
+    
+    def __init__(self, learn, save, inline=False):
+        self.learn = learn
+        self.save = save
+        self.inline = inline
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.stats = {'processed': 0, 'saves': 0, 'errors': 0, 'last_duration': 0.0}
+    
+    def start(self):
+        if self.inline or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name='learning-worker', daemon=True)
+        self.thread.start()
+    
+    def submit(self, job):
+        """إضافة مهمة تعلم (لا تنتظر تنفيذها إلا في الوضع المتزامن)"""
+        if self.inline or self.thread is None:
+            self._process(('learn', job))
+        else:
+            self.jobs.put(('learn', job))
+    
+    def request_save(self):
+        """طلب حفظ المعرفة بعد انتهاء المهام السابقة في الطابور"""
+        if self.inline or self.thread is None:
+            self._process(('save', None))
+        else:
+            self.jobs.put(('save', None))
+    
+    def pending(self):
+        return self.jobs.qsize()
+    
+    def drain(self):
+        """انتظار تنفيذ كل المهام الموجودة في الطابور"""
+        if self.thread is not None:
+            self.jobs.join()
+    
+    def stop(self, timeout=30):
+        """تنفيذ ما تبقى في الطابور ثم إيقاف الخيط"""
+        if self.thread is None:
+            return
+        self.jobs.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+    
+    def _run(self):
+        while True:
+            item = self.jobs.get()
+            try:
+                if item is None:
+                    return
+                self._process(item)
+            finally:
+                self.jobs.task_done()
+    
+    def _process(self, item):
+        kind, job = item
+        started = time.perf_counter()
+        try:
+            if kind == 'learn':
+                self.learn(job)
+                self.stats['processed'] += 1
+            else:
+                self.save()
+                self.stats['saves'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"⚠️ Learning worker error: {e}")
+        self.stats['last_duration'] = time.perf_counter() - started
@@ -0,0 +1,173 @@
+import copy
+import glob
+import os
+import pickle
+import re
+import time
+from collections import deque
+
+import numpy as np
+import sklearn
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+import clock
+from quantum_engine.feature_builder import FEATURE_SCHEMA, FEATURE_SCHEMA_VERSION
+
+# اسم خسارة الانحدار اللوجستي تغير في scikit-learn 1.1
+LOG_LOSS = 'log_loss' if tuple(int(part) for part in sklearn.__version__.split('.')[:2]) >= (1, 1) else 'log'
+
+class OutcomeModel:
+    """نموذج تعلم متزايد لاحتمال ربح الصفقة من متجه ميزاتها
+    
+    يُدرّب بـ partial_fit على كل دفعة صفقات جديدة (تطبيع متزايد ثم
+    انحدار لوجستي SGD)، ويقيّم كل عملات الدورة باستدعاء predict_proba
+    واحد على مصفوفة الميزات. النقاط المحفوظة مرقمة بإصدار ومقيدة
+    بإصدار مخطط الميزات الذي دُرّبت عليه.
+    
+    التدريب يعدّل نسخة العمل، والاستدلال يقرأ فقط النسخة المنشورة
+    (publish) فيمكن التدريب في خيط خلفي أثناء تقييم الدورة.
+    """
+    
+    def __init__(self, directory='data/models/outcome', min_samples=50, keep_checkpoints=5):
+        self.directory = directory
+        self.min_samples = min_samples
+        self.keep_checkpoints = keep_checkpoints
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss=LOG_LOSS, alpha=1e-4, random_state=42)
+        self.n_samples = 0
+        self.version = 0
+        self.dirty = False
+        self.latency_ms = deque(maxlen=1000)
+        # (المطبّع، المصنف، عدد العينات) كما نُشرت آخر مرة
+        self.published = None
+    
+    @property
+    def ready(self):
+        return self.is_ready(self.published)
+    
+    @property
+    def blend_weight(self):
+        return self.weight_of(self.published)
+    
+    def is_ready(self, published):
+        return published is not None and published[2] >= self.min_samples
+    
+    def weight_of(self, published):
+        """وزن النموذج في درجة الفرصة: يكبر مع عدد الصفقات المتعلمة حتى 0.3"""
+        if not self.is_ready(published):
+            return 0.0
+        return 0.3 * min(published[2] / 500, 1.0)
+    
+    def publish(self):
+        """نسخ نسخة العمل للاستدلال (استبدال مرجع واحد)"""
+        self.published = (copy.deepcopy(self.scaler), copy.deepcopy(self.classifier), self.n_samples)
+    
+    def prepare(self, features, scaler=None):
+        """تطبيع الميزات؛ القيم الناقصة (NaN) تصبح المتوسط أي صفراً بعد التطبيع"""
+        scaler = self.scaler if scaler is None else scaler
+        return np.nan_to_num(scaler.transform(features), nan=0.0, posinf=0.0, neginf=0.0)
+    
+    def learn(self, features, outcomes):
+        """دفعة تدريب متزايدة: features (صفقات × ميزات) و outcomes (1 ربح / 0 خسارة)"""
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_SCHEMA))
+        outcomes = np.asarray(outcomes, dtype=np.int64)
+        # صفقات بلا أي ميزة معروفة لا تفيد التدريب
+        usable = ~np.isnan(features).all(axis=1)
+        features, outcomes = features[usable], outcomes[usable]
+        if len(features) == 0:
+            return 0
+        
+        self.scaler.partial_fit(features)
+        self.classifier.partial_fit(self.prepare(features), outcomes, classes=np.array([0, 1]))
+        self.n_samples += len(features)
+        self.dirty = True
+        return len(features)
+    
+    def predict_proba(self, features, published=None):
+        """احتمال الربح لكل صف (None قبل اكتمال min_samples)
+        
+        published: نسخة منشورة بعينها (من لقطة المتعلم) بدل آخر نسخة.
+        """
+        published = self.published if published is None else published
+        if not self.is_ready(published) or len(features) == 0:
+            return None
+        
+        scaler, classifier, _ = published
+        started = time.perf_counter()
+        probabilities = classifier.predict_proba(self.prepare(np.asarray(features, dtype=np.float64), scaler))[:, 1]
+        self.latency_ms.append((time.perf_counter() - started) * 1000)
+        return probabilities
+    
+    def score_matrix(self, feature_matrix, published=None):
+        """{العملة: احتمال الربح} لكل عملات مصفوفة الميزات في استدعاء واحد"""
+        probabilities = self.predict_proba(feature_matrix.values, published)
+        if probabilities is None:
+            return {}
+        return dict(zip(feature_matrix.symbols, probabilities.tolist()))
+    
+    def latency_stats(self):
+        """زمن الاستدلال بالمللي ثانية: آخر قيمة، المتوسط، والمئين 95"""
+        if not self.latency_ms:
+            return {'last': 0.0, 'mean': 0.0, 'p95': 0.0}
+        latencies = np.fromiter(self.latency_ms, dtype=np.float64)
+        return {'last': float(latencies[-1]), 'mean': float(latencies.mean()), 'p95': float(np.percentile(latencies, 95))}
+    
+    def checkpoint_path(self, version):
+        return os.path.join(self.directory, f"outcome_model_v{version:05d}.pkl")
+    
+    def checkpoints(self):
+        """[(الإصدار، المسار)] مرتبة تصاعدياً"""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, 'outcome_model_v*.pkl')):
+            match = re.search(r'_v(\d+)\.pkl$', path)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+    
+    def save_checkpoint(self):
+        """حفظ نقطة جديدة بإصدار تالٍ (فقط عند وجود تدريب جديد) وحذف الأقدم"""
+        if not self.dirty:
+            return None
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self.version += 1
+        checkpoint = {
+            'model_version': self.version,
+            'feature_schema': FEATURE_SCHEMA,
+            'feature_schema_version': FEATURE_SCHEMA_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'n_samples': self.n_samples,
+            'scaler': self.scaler,
+            'classifier': self.classifier,
+            'saved_at': clock.now().isoformat()
+        }
+        
+        # كتابة ذرية: ملف مؤقت ثم إعادة تسمية
+        path = self.checkpoint_path(self.version)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        self.dirty = False
+        
+        for _, old_path in self.checkpoints()[:-self.keep_checkpoints]:
+            os.remove(old_path)
+        return path
+    
+    def load_latest(self):
+        """تحميل أحدث نقطة متوافقة مع مخطط الميزات الحالي (True عند النجاح)"""
+        for version, path in reversed(self.checkpoints()):
+            with open(path, 'rb') as f:
+                checkpoint = pickle.load(f)
+            
+            self.version = max(self.version, version)
+            if checkpoint.get('feature_schema_version') != FEATURE_SCHEMA_VERSION:
+                continue
+            
+            self.scaler = checkpoint['scaler']
+            self.classifier = checkpoint['classifier']
+            self.n_samples = checkpoint['n_samples']
+            self.dirty = False
+            self.publish()
+            return True
+        return False
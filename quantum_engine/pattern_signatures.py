@@ -0,0 +1,125 @@
+import copy
+import os
+import threading
+
+import numpy as np
+
+import clock
+from quantum_engine.feature_builder import MARKET_REGIMES
+from quantum_engine.insight_store import VOLUME_PROFILES
+
+# حدود فئات قوة الاتجاه (|SMA20 - SMA50| / SMA50)
+STRENGTH_BUCKETS = (0.01, 0.03, 0.06)
+DIRECTIONS = {None: 0, 'bullish': 1, 'bearish': 2}
+
+# مواضع البتات في المفتاح: الاتجاه(2) القوة(2) النظام(2) الانعكاس(2) الاختراق(2) التجميع(1) الحجم(2)
+SIGNATURE_BITS = 13
+
+def pattern_signature(patterns, market_regime, volume_profile):
+    """مفتاح صحيح مضغوط (0..8191) لسمات الإعداد الأساسية"""
+    trends = patterns['trend_patterns']
+    trend = int(trends['uptrend_detected']) | int(trends['downtrend_detected']) << 1
+    strength = int(np.searchsorted(STRENGTH_BUCKETS, trends['trend_strength'], side='right'))
+    regime = MARKET_REGIMES.index(market_regime) if market_regime in MARKET_REGIMES else 0
+    reversal = DIRECTIONS.get(patterns['reversal_patterns']['reversal_type'], 0)
+    breakout = DIRECTIONS.get(patterns['breakout_patterns']['expected_direction'], 0) if patterns['breakout_patterns']['breakout_imminent'] else 0
+    consolidation = int(patterns['consolidation_patterns']['in_consolidation'])
+    volume = VOLUME_PROFILES.index(volume_profile) if volume_profile in VOLUME_PROFILES else 0
+    
+    return (trend | strength << 2 | regime << 4 | reversal << 6
+            | breakout << 8 | consolidation << 10 | volume << 11)
+
+class PatternSignatureTable:
+    """عدادات فوز/خسارة/ربح متناقصة أسياً لكل مفتاح إعداد
+    
+    الجدول مصفوفات كثيفة بحجم كل المفاتيح الممكنة فالبحث والتحديث فهرسة
+    مباشرة O(1). التناقص كسول: كل مفتاح يحفظ وقت آخر تحديث ويُضرب في
+    0.5 ** (المدة / half_life) عند القراءة أو التحديث التالي.
+    """
+    
+    def __init__(self, half_life=7 * 86400, path='data/models/pattern_signatures.npz'):
+        self.half_life = half_life
+        self.path = path
+        size = 1 << SIGNATURE_BITS
+        self.wins = np.zeros(size)
+        self.losses = np.zeros(size)
+        self.pnl = np.zeros(size)
+        self.updated = np.zeros(size)
+        self.lock = threading.Lock()
+    
+    def copy(self):
+        """نسخة مستقلة للنشر في لقطة المتعلم (لا تتأثر بتحديثات لاحقة)"""
+        with self.lock:
+            clone = copy.copy(self)
+            for name in ('wins', 'losses', 'pnl', 'updated'):
+                setattr(clone, name, getattr(self, name).copy())
+        clone.lock = threading.Lock()
+        return clone
+    
+    def decay(self, key, now):
+        elapsed = max(now - self.updated[key], 0.0)
+        return 0.5 ** (elapsed / self.half_life)
+    
+    def record(self, key, profit, timestamp=None):
+        """تحديث المفتاح بنتيجة صفقة محسومة"""
+        now = clock.timestamp() if timestamp is None else timestamp
+        with self.lock:
+            factor = self.decay(key, now)
+            self.wins[key] = self.wins[key] * factor + (profit > 0)
+            self.losses[key] = self.losses[key] * factor + (profit <= 0)
+            self.pnl[key] = self.pnl[key] * factor + profit
+            self.updated[key] = now
+    
+    def lookup(self, key, timestamp=None):
+        """العدادات المتناقصة حتى الآن للمفتاح (بدون تعديل الجدول)"""
+        now = clock.timestamp() if timestamp is None else timestamp
+        with self.lock:
+            factor = self.decay(key, now)
+            wins = float(self.wins[key] * factor)
+            losses = float(self.losses[key] * factor)
+            pnl = float(self.pnl[key] * factor)
+        
+        samples = wins + losses
+        return {
+            'wins': wins,
+            'losses': losses,
+            'pnl': pnl,
+            'samples': samples,
+            'win_rate': wins / samples if samples > 0 else 0.5
+        }
+    
+    def save(self, path=None):
+        """حفظ المفاتيح المستخدمة فقط في ملف npz (كتابة ذرية)"""
+        path = path or self.path
+        with self.lock:
+            used = np.flatnonzero(self.updated)
+            arrays = {
+                'keys': used.astype(np.uint16),
+                'wins': self.wins[used],
+                'losses': self.losses[used],
+                'pnl': self.pnl[used],
+                'updated': self.updated[used],
+                'half_life': np.array(self.half_life)
+            }
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(path + '.tmp', path)
+    
+    def load(self, path=None):
+        """تحميل الجدول المحفوظ (False إن لم يوجد)"""
+        path = path or self.path
+        if not os.path.exists(path):
+            return False
+        
+        with np.load(path) as saved:
+            keys = saved['keys'].astype(np.int64)
+            with self.lock:
+                self.wins[keys] = saved['wins']
+                self.losses[keys] = saved['losses']
+                self.pnl[keys] = saved['pnl']
+                self.updated[keys] = saved['updated']
+        return True
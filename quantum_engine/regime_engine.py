@@ -0,0 +1,107 @@
+import math
+import threading
+
+import numpy as np
+
+from quantum_engine.feature_builder import MARKET_REGIMES
+from quantum_engine.streaming_indicators import StreamingSMA, StreamingVolatility
+
+class RegimeTracker:
+    """نظام السوق لعملة واحدة محدّث تراكمياً مع كل شمعة مغلقة
+    
+    نفس مقاييس QuantumDeepLearner.classify_market_regime (تقلب العوائد
+    السنوي و |SMA20 - SMA50| / SMA50) لكن بمرشحات O(1) ومع تخلف
+    (hysteresis): دخول النظام فوق العتبة × (1 + hysteresis) والخروج منه
+    تحت العتبة × (1 - hysteresis) فلا يتذبذب النظام حول الحد.
+    """
+    
+    def __init__(self, volatility_window=99, fast=20, slow=50,
+                 volatility_threshold=0.03, trend_threshold=0.05, hysteresis=0.1):
+        self.fast = fast
+        self.volatility_threshold = volatility_threshold
+        self.trend_threshold = trend_threshold
+        self.hysteresis = hysteresis
+        self.volatility = StreamingVolatility(volatility_window)
+        self.fast_sma = StreamingSMA(fast)
+        self.slow_sma = StreamingSMA(slow)
+        self.last_timestamp = None
+        self.state = None
+    
+    def crossed(self, value, threshold, active):
+        """تجاوز العتبة مع التخلف: عتبة خروج أدنى إن كان النظام قائماً"""
+        if value != value:
+            return False
+        factor = 1 - self.hysteresis if active else 1 + self.hysteresis
+        return value > threshold * factor
+    
+    def update(self, close, timestamp):
+        volatility = self.volatility.update(close) * math.sqrt(365)
+        self.fast_sma.update(close)
+        slow = self.slow_sma.update(close)
+        trend_strength = abs(self.fast_sma.value - slow) / slow if self.fast_sma.count >= self.fast else 0.0
+        
+        current = self.state['regime'] if self.state else None
+        if current is None:
+            # أول تصنيف بدون تخلف (نفس عتبات التصنيف الكامل)
+            regime = ('HIGH_VOLATILITY' if volatility > self.volatility_threshold
+                      else 'TRENDING' if trend_strength > self.trend_threshold else 'SIDEWAYS')
+        elif self.crossed(volatility, self.volatility_threshold, current == 'HIGH_VOLATILITY'):
+            regime = 'HIGH_VOLATILITY'
+        elif self.crossed(trend_strength, self.trend_threshold, current == 'TRENDING'):
+            regime = 'TRENDING'
+        else:
+            regime = 'SIDEWAYS'
+        
+        changed = regime != current
+        # قاموس جديد في كل تحديث: القارئ يحصل على حالة كاملة دون قفل
+        self.state = {
+            'regime': regime,
+            'regime_code': MARKET_REGIMES.index(regime),
+            'since': timestamp if changed else self.state['since'],
+            'bars_in_regime': 1 if changed else self.state['bars_in_regime'] + 1,
+            'volatility': volatility,
+            'trend_strength': trend_strength
+        }
+        self.last_timestamp = timestamp
+        return self.state
+
+class RegimeEngine:
+    """أنظمة السوق لكل العملات على إطار واحد مع قراءة O(1) للنظام الحالي
+    
+    يُغذّى بنوافذ الدورة على إطاره (update) حيث تُضاف فقط الشموع المغلقة
+    التي لم تُرَ بعد، فيعمل بنفس الطريقة مع البث أو REST (البث على إطار
+    أساسي أصغر، والنوافذ الأكبر تُشتق منه).
+    """
+    
+    def __init__(self, interval='1h', **tracker_options):
+        self.interval = interval
+        self.tracker_options = tracker_options
+        self.trackers = {}
+        self.lock = threading.Lock()
+    
+    def tracker(self, symbol):
+        tracker = self.trackers.get(symbol)
+        if tracker is None:
+            tracker = RegimeTracker(**self.tracker_options)
+            self.trackers[symbol] = tracker
+        return tracker
+    
+    def update(self, symbol, window):
+        """إضافة الشموع الجديدة من نافذة مرتبة زمنياً (آخر شمعة جارية فلا تُضاف)"""
+        timestamps = np.asarray(window['timestamp'])
+        closes = np.asarray(window['close'])
+        with self.lock:
+            tracker = self.tracker(symbol)
+            first = 0 if tracker.last_timestamp is None else int(np.searchsorted(timestamps, tracker.last_timestamp, side='right'))
+            for position in range(first, len(timestamps) - 1):
+                tracker.update(closes[position], int(timestamps[position]))
+            return tracker.state
+    
+    def get(self, symbol):
+        """الحالة الحالية: النظام، منذ متى، عدد الشموع فيه، والمقاييس (أو None)"""
+        tracker = self.trackers.get(symbol)
+        return tracker.state if tracker is not None else None
+    
+    def regime(self, symbol):
+        state = self.get(symbol)
+        return state['regime'] if state is not None else None
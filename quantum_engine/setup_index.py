@@ -0,0 +1,140 @@
+import copy
+import threading
+
+import numpy as np
+
+from quantum_engine.feature_builder import FEATURE_SCHEMA
+
+class SetupIndex:
+    """بحث تشابه (k أقرب جيران) بين متجهات ميزات الصفقات السابقة ونتائجها
+    
+    المتجهات تُحفظ في مصفوفة float32 حلقية بسعة ثابتة، وتُطبّع عند
+    الاستعلام بمتوسط وانحراف كل ميزة (إحصاءات متزايدة تتجاهل NaN، والقيم
+    الناقصة تصبح المتوسط). الاستعلام يقيس مسافات كل عملات الدورة دفعة
+    واحدة بضرب مصفوفات على كتل من block_size سجل، فالذاكرة المؤقتة
+    محدودة بـ (عدد العملات × block_size) مهما كبر التاريخ.
+    """
+    
+    def __init__(self, capacity=10000, block_size=4096, dimensions=len(FEATURE_SCHEMA)):
+        self.capacity = capacity
+        self.block_size = block_size
+        self.dimensions = dimensions
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.outcomes = np.zeros(capacity, dtype=np.int8)
+        self.profits = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+        self.head = 0
+        
+        # إحصاءات التطبيع لكل ميزة (عدد القيم المعروفة، المتوسط، مجموع مربعات الانحراف)
+        self.counts = np.zeros(dimensions)
+        self.means = np.zeros(dimensions)
+        self.m2 = np.zeros(dimensions)
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return self.size
+    
+    def copy(self):
+        """نسخة مستقلة للنشر في لقطة المتعلم (لا تتأثر بإضافات لاحقة)"""
+        with self.lock:
+            clone = copy.copy(self)
+            for name in ('vectors', 'outcomes', 'profits', 'counts', 'means', 'm2'):
+                setattr(clone, name, getattr(self, name).copy())
+        clone.lock = threading.Lock()
+        return clone
+    
+    def add(self, features, outcomes, profits=None):
+        """إدراج صفقات محسومة: features (صفقات × ميزات)، outcomes (1 ربح / 0 خسارة)"""
+        features = np.asarray(features, dtype=np.float64).reshape(-1, self.dimensions)
+        outcomes = np.asarray(outcomes, dtype=np.int8).reshape(-1)
+        profits = np.full(len(features), np.nan) if profits is None else np.asarray(profits, dtype=np.float64)
+        
+        # صفقات بلا أي ميزة معروفة لا تصلح للمقارنة
+        usable = ~np.isnan(features).all(axis=1)
+        features, outcomes, profits = features[usable], outcomes[usable], profits[usable]
+        if len(features) == 0:
+            return 0
+        
+        with self.lock:
+            self.update_statistics(features)
+            positions = (self.head + np.arange(len(features))) % self.capacity
+            self.vectors[positions] = features
+            self.outcomes[positions] = outcomes
+            self.profits[positions] = profits
+            self.head = int((self.head + len(features)) % self.capacity)
+            self.size = min(self.size + len(features), self.capacity)
+        return len(features)
+    
+    def update_statistics(self, features):
+        """دمج متوسط وتباين الدفعة مع الإحصاءات السابقة (صيغة Chan المتوازية)"""
+        known = ~np.isnan(features)
+        batch_counts = known.sum(axis=0)
+        batch_sums = np.where(known, features, 0.0).sum(axis=0)
+        batch_means = np.divide(batch_sums, batch_counts, out=np.zeros(self.dimensions), where=batch_counts > 0)
+        batch_m2 = np.where(known, (features - batch_means) ** 2, 0.0).sum(axis=0)
+        
+        totals = self.counts + batch_counts
+        delta = batch_means - self.means
+        safe_totals = np.maximum(totals, 1)
+        self.means = self.means + delta * batch_counts / safe_totals
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.counts * batch_counts / safe_totals
+        self.counts = totals
+    
+    def normalize(self, features, inverse_std):
+        """تطبيع float32 مع تحويل القيم الناقصة إلى 0 (أي المتوسط)"""
+        normalized = (features - self.means.astype(np.float32)) * inverse_std
+        return np.nan_to_num(normalized, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+    
+    def query(self, features, k=20):
+        """(مواضع، مسافات) أقرب k جار لكل صف، مرتبة تصاعدياً بالمسافة"""
+        with self.lock:
+            return self.query_locked(features, k)
+    
+    def query_locked(self, features, k):
+        """query بدون أخذ القفل (المستدعي يملكه)"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.dimensions)
+        k = min(k, self.size)
+        if k == 0 or len(features) == 0:
+            return np.empty((len(features), 0), dtype=np.int64), np.empty((len(features), 0), dtype=np.float32)
+        
+        std = np.sqrt(np.divide(self.m2, self.counts, out=np.ones(self.dimensions), where=self.counts > 1))
+        inverse_std = np.where(std > 0, 1 / std, 1.0).astype(np.float32)
+        queries = self.normalize(features, inverse_std)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        
+        best_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        best_positions = np.full((len(queries), k), -1, dtype=np.int64)
+        for start in range(0, self.size, self.block_size):
+            block = self.normalize(self.vectors[start:min(start + self.block_size, self.size)], inverse_std)
+            # |q - b|² = |q|² + |b|² - 2 q·b لكل أزواج الكتلة دفعة واحدة
+            distances = query_norms[:, None] + np.einsum('ij,ij->i', block, block)[None, :] - 2 * queries @ block.T
+            
+            candidate_distances = np.concatenate((best_distances, distances), axis=1)
+            candidate_positions = np.concatenate(
+                (best_positions, np.broadcast_to(np.arange(start, start + len(block)), distances.shape)), axis=1
+            )
+            keep = np.argpartition(candidate_distances, k - 1, axis=1)[:, :k]
+            best_distances = np.take_along_axis(candidate_distances, keep, axis=1)
+            best_positions = np.take_along_axis(candidate_positions, keep, axis=1)
+        
+        order = np.argsort(best_distances, axis=1)
+        return np.take_along_axis(best_positions, order, axis=1), np.maximum(np.take_along_axis(best_distances, order, axis=1), 0)
+    
+    def neighbor_stats(self, features, k=20):
+        """لكل صف: نسبة فوز أقرب k صفقة سابقة، متوسط ربحها، ومتوسط المسافة"""
+        with self.lock:
+            positions, distances = self.query_locked(features, k)
+            outcomes = self.outcomes[positions]
+            profits = self.profits[positions]
+        if positions.shape[1] == 0:
+            return None
+        
+        known = ~np.isnan(profits)
+        known_counts = known.sum(axis=1)
+        profit_sums = np.where(known, profits, 0).sum(axis=1)
+        return {
+            'win_rate': outcomes.mean(axis=1),
+            'avg_profit': np.divide(profit_sums, known_counts, out=np.full(len(profits), np.nan), where=known_counts > 0),
+            'distance': np.sqrt(distances).mean(axis=1),
+            'neighbors': positions.shape[1]
+        }
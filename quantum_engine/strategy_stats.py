@@ -0,0 +1,182 @@
+import bisect
+import copy
+import heapq
+import threading
+from collections import deque
+
+import clock
+
+class StrategyStatistics:
+    """إحصاءات صفقات مفتاح واحد: عدادات متناقصة بالزمن ونافذة ثابتة لآخر window صفقة
+    
+    التناقص كسول كما في PatternSignatureTable: المفتاح يحفظ وقت آخر تحديث
+    ويُضرب في 0.5 ** (المدة / half_life) عند التحديث أو القراءة. نسب الفوز
+    والتوقع وعامل الربح لا تتغير بالتناقص (البسط والمقام يتناقصان معاً)،
+    أما العدد الفعلي فيتناقص فتنخفض درجة الاستراتيجية التي توقفت عن التداول.
+    """
+    
+    def __init__(self, half_life=7 * 86400, window=50):
+        self.half_life = half_life
+        self.updated = None
+        self.count = 0.0
+        self.wins = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.trades = 0
+        
+        self.window = deque(maxlen=window)
+        self.window_wins = 0
+        self.window_profit = 0.0
+        self.window_loss = 0.0
+        
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        
+        # الدرجة وقت آخر تحديث (مفتاح الترتيب المخزن)
+        self.ranked_score = 0.0
+    
+    def decay(self, now):
+        if self.updated is None:
+            return 1.0
+        return 0.5 ** (max(now - self.updated, 0.0) / self.half_life)
+    
+    def update(self, profit, now):
+        factor = self.decay(now)
+        self.count = self.count * factor + 1
+        self.wins = self.wins * factor + (profit > 0)
+        self.gross_profit = self.gross_profit * factor + max(profit, 0.0)
+        self.gross_loss = self.gross_loss * factor + max(-profit, 0.0)
+        self.updated = max(now, self.updated) if self.updated is not None else now
+        self.trades += 1
+        
+        if len(self.window) == self.window.maxlen:
+            self.remove_from_window(self.window[0])
+        self.window.append(profit)
+        self.window_wins += profit > 0
+        self.window_profit += max(profit, 0.0)
+        self.window_loss += max(-profit, 0.0)
+        
+        self.equity += profit
+        self.peak = max(self.peak, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+        
+        self.ranked_score = self.score(self.updated)
+    
+    def remove_from_window(self, profit):
+        self.window_wins -= profit > 0
+        self.window_profit -= max(profit, 0.0)
+        self.window_loss -= max(-profit, 0.0)
+    
+    @property
+    def win_rate(self):
+        return self.wins / self.count if self.count else 0.0
+    
+    @property
+    def expectancy(self):
+        """متوسط الربح المتناقص لكل صفقة"""
+        return (self.gross_profit - self.gross_loss) / self.count if self.count else 0.0
+    
+    @property
+    def profit_factor(self):
+        if self.gross_loss == 0:
+            return float('inf') if self.gross_profit > 0 else 0.0
+        return self.gross_profit / self.gross_loss
+    
+    def effective_trades(self, now):
+        return self.count * self.decay(now)
+    
+    def score(self, now):
+        """نفس معادلة الترتيب القديمة على القيم المتناقصة حتى now"""
+        return self.win_rate * self.expectancy * min(self.effective_trades(now) / 10, 1.0)
+    
+    def summary(self, now):
+        window_trades = len(self.window)
+        return {
+            'win_rate': self.win_rate,
+            'avg_profit': self.expectancy,
+            'expectancy': self.expectancy,
+            'profit_factor': self.profit_factor,
+            'total_trades': self.trades,
+            'effective_trades': self.effective_trades(now),
+            'window_win_rate': self.window_wins / window_trades if window_trades else 0.0,
+            'window_expectancy': (self.window_profit - self.window_loss) / window_trades if window_trades else 0.0,
+            'drawdown': self.peak - self.equity,
+            'max_drawdown': self.max_drawdown,
+            'score': self.score(now)
+        }
+
+class StrategyStatsStore:
+    """إحصاءات الاستراتيجيات لكل (استراتيجية، نظام، عملة) مع ترتيب محدّث تراكمياً
+    
+    كل صفقة تحدّث أربعة مستويات: الاستراتيجية كلها، ولكل نظام، ولكل عملة،
+    ولكل نظام وعملة معاً. كل مجموعة (نظام، عملة) تحفظ قائمة مرتبة بالدرجة
+    وقت آخر تحديث (إزالة وإدراج بالبحث الثنائي). التناقص بالزمن لا يرفع
+    أي درجة فوق max(الدرجة المخزنة، 0)، فالاستعلام يمر على القائمة بترتيبها
+    ويتوقف حين لا يمكن لما تبقى أن يدخل أفضل n.
+    """
+    
+    def __init__(self, half_life=7 * 86400, window=50):
+        self.half_life = half_life
+        self.window = window
+        self.statistics = {}
+        self.rankings = {}
+        self.lock = threading.Lock()
+    
+    def copy(self):
+        """نسخة مستقلة للنشر في لقطة المتعلم (لا تتأثر بصفقات لاحقة)"""
+        with self.lock:
+            clone = copy.copy(self)
+            clone.statistics = copy.deepcopy(self.statistics)
+            clone.rankings = {group: list(ranking) for group, ranking in self.rankings.items()}
+        clone.lock = threading.Lock()
+        return clone
+    
+    def record(self, strategy, profit, market_regime=None, symbol=None, timestamp=None):
+        if profit != profit:
+            return
+        now = clock.timestamp() if timestamp is None else timestamp
+        with self.lock:
+            for regime_key in {None, market_regime}:
+                for symbol_key in {None, symbol}:
+                    self.update_key((strategy, regime_key, symbol_key), profit, now)
+    
+    def update_key(self, key, profit, now):
+        statistics = self.statistics.get(key)
+        ranking = self.rankings.setdefault(key[1:], [])
+        if statistics is None:
+            statistics = StrategyStatistics(self.half_life, self.window)
+            self.statistics[key] = statistics
+        else:
+            ranking.pop(bisect.bisect_left(ranking, (-statistics.ranked_score, key[0])))
+        
+        statistics.update(profit, now)
+        bisect.insort(ranking, (-statistics.ranked_score, key[0]))
+    
+    def top(self, n=3, market_regime=None, symbol=None, timestamp=None):
+        """أفضل n استراتيجية في المجموعة (كل السوق، أو نظام، أو عملة، أو كلاهما) بالأداء حتى الآن"""
+        if n <= 0:
+            return []
+        now = clock.timestamp() if timestamp is None else timestamp
+        group = (market_regime, symbol)
+        with self.lock:
+            best = []  # كومة صغرى بحجم n من (الدرجة الحالية، الاستراتيجية)
+            for negative_score, strategy in self.rankings.get(group, []):
+                if len(best) == n and best[0][0] >= max(-negative_score, 0.0):
+                    break
+                candidate = (self.statistics[(strategy,) + group].score(now), strategy)
+                if len(best) < n:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+            
+            return [
+                {'strategy': strategy, **self.statistics[(strategy,) + group].summary(now)}
+                for _, strategy in sorted(best, key=lambda item: (-item[0], item[1]))
+            ]
+    
+    def get(self, strategy, market_regime=None, symbol=None, timestamp=None):
+        now = clock.timestamp() if timestamp is None else timestamp
+        with self.lock:
+            statistics = self.statistics.get((strategy, market_regime, symbol))
+            return statistics.summary(now) if statistics is not None else None
@@ -0,0 +1,333 @@
+import math
+from collections import deque
+
+# ===== مؤشرات تراكمية بتحديث O(1) لكل شمعة مغلقة =====
+
+class StreamingIndicator:
+    """أساس المؤشرات التراكمية: الحالة كلها في خصائص الكائن
+    
+    snapshot تعيد نسخة من الحالة و restore تعيدها، فيمكن تجربة الشمعة
+    الجارية غير المكتملة (peek) ثم الرجوع بدون إعادة حساب التاريخ.
+    """
+    
+    def snapshot(self):
+        return {
+            name: list(value) if isinstance(value, deque) else value
+            for name, value in self.__dict__.items()
+        }
+    
+    def restore(self, state):
+        for name, value in state.items():
+            current = self.__dict__.get(name)
+            if isinstance(current, deque):
+                current.clear()
+                current.extend(value)
+            else:
+                self.__dict__[name] = value
+    
+    def peek(self, *values):
+        """قيمة المؤشر لو أُضيفت هذه القيم، بدون تغيير الحالة"""
+        state = self.snapshot()
+        try:
+            return self.update(*values)
+        finally:
+            self.restore(state)
+
+class StreamingEMA(StreamingIndicator):
+    """متوسط أسي بنفس معادلة pandas ewm(span=span, adjust=True)
+    
+    نفس خطوات indicators.ewm_mean فتتطابق القيم مع الحساب الكامل.
+    """
+    
+    def __init__(self, span):
+        self.span = span
+        self.old_wt_factor = 1. - 1. / (1. + (span - 1) / 2)
+        self.weighted = math.nan
+        self.old_wt = 1.
+        self.observations = 0
+        self.count = 0
+    
+    @property
+    def value(self):
+        return self.weighted if self.observations else math.nan
+    
+    def update(self, value):
+        value = float(value)
+        is_observation = value == value
+        
+        if self.count == 0:
+            self.weighted = value
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = ((self.old_wt * self.weighted) + value) / (self.old_wt + 1.)
+                self.old_wt += 1.
+        elif is_observation:
+            self.weighted = value
+        
+        self.observations += is_observation
+        self.count += 1
+        return self.value
+
+class StreamingMACD(StreamingIndicator):
+    """MACD وخط الإشارة من ثلاث متوسطات أسية تراكمية
+    
+    قبل slow شمعة تكون القيمتان صفراً كما في indicators.macd.
+    """
+    
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.slow = slow
+        self.fast_ema = StreamingEMA(fast)
+        self.slow_ema = StreamingEMA(slow)
+        self.signal_ema = StreamingEMA(signal)
+        self.count = 0
+    
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'fast_ema': self.fast_ema.snapshot(),
+            'slow_ema': self.slow_ema.snapshot(),
+            'signal_ema': self.signal_ema.snapshot()
+        }
+    
+    def restore(self, state):
+        self.count = state['count']
+        self.fast_ema.restore(state['fast_ema'])
+        self.slow_ema.restore(state['slow_ema'])
+        self.signal_ema.restore(state['signal_ema'])
+    
+    @property
+    def value(self):
+        if self.count < self.slow:
+            return 0.0, 0.0
+        return self.fast_ema.value - self.slow_ema.value, self.signal_ema.value
+    
+    def update(self, price):
+        macd_line = self.fast_ema.update(price) - self.slow_ema.update(price)
+        self.signal_ema.update(macd_line)
+        self.count += 1
+        return self.value
+
+class StreamingRSI(StreamingIndicator):
+    """RSI بتنعيم Wilder: أول متوسط بسيط على period تغير ثم
+    avg = (avg * (period - 1) + x) / period لكل شمعة جديدة
+    """
+    
+    def __init__(self, period=14):
+        self.period = period
+        self.previous_close = None
+        self.deltas = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+    
+    @property
+    def value(self):
+        if self.deltas < self.period:
+            return 50.0
+        rs = self.avg_gain / (self.avg_loss + 1e-10)
+        return 100 - (100 / (1 + rs))
+    
+    def update(self, close):
+        close = float(close)
+        if self.previous_close is not None:
+            delta = close - self.previous_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            self.deltas += 1
+            
+            if self.deltas <= self.period:
+                # فترة البذر: مجموع ثم متوسط بسيط عند اكتمالها
+                self.avg_gain += gain
+                self.avg_loss += loss
+                if self.deltas == self.period:
+                    self.avg_gain /= self.period
+                    self.avg_loss /= self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        
+        self.previous_close = close
+        return self.value
+
+class StreamingStochastic(StreamingIndicator):
+    """Stochastic %K بأعلى وأدنى متحركين عبر طابورين رتيبين
+    
+    كل شمعة تدخل وتخرج من كل طابور مرة واحدة فالكلفة O(1) مطفأة.
+    """
+    
+    def __init__(self, period=14):
+        self.period = period
+        self.index = -1
+        self.highs = deque()  # (الموضع، القيمة) بقيم تنازلية
+        self.lows = deque()   # (الموضع، القيمة) بقيم تصاعدية
+        self.last_close = math.nan
+    
+    @property
+    def value(self):
+        if self.index + 1 < self.period:
+            return 50.0
+        highest = self.highs[0][1]
+        lowest = self.lows[0][1]
+        if highest == lowest:
+            return 50.0
+        return 100 * (self.last_close - lowest) / (highest - lowest)
+    
+    def update(self, high, low, close):
+        self.index += 1
+        oldest = self.index - self.period
+        
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((self.index, float(high)))
+        if self.highs[0][0] <= oldest:
+            self.highs.popleft()
+        
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((self.index, float(low)))
+        if self.lows[0][0] <= oldest:
+            self.lows.popleft()
+        
+        self.last_close = float(close)
+        return self.value
+
+class StreamingSMA(StreamingIndicator):
+    """متوسط آخر period قيمة بمجموع متحرك (أو كل القيم قبل اكتمال period)"""
+    
+    def __init__(self, period):
+        self.period = period
+        self.values = deque()
+        self.total = 0.0
+    
+    @property
+    def value(self):
+        return self.total / len(self.values) if self.values else math.nan
+    
+    @property
+    def count(self):
+        return len(self.values)
+    
+    def update(self, value):
+        value = float(value)
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.period:
+            self.total -= self.values.popleft()
+        return self.value
+
+class StreamingVolatility(StreamingIndicator):
+    """الانحراف المعياري للعوائد النسبية بخوارزمية Welford
+    
+    window=None: على كل التاريخ؛ وإلا على آخر window عائد (إضافة وحذف
+    من نفس المجاميع).
+    """
+    
+    def __init__(self, window=None):
+        self.window = window
+        self.previous_close = None
+        self.returns = deque()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    @property
+    def value(self):
+        if self.n < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1))
+    
+    def update(self, close):
+        close = float(close)
+        if self.previous_close is not None:
+            value = close / self.previous_close - 1
+            
+            self.n += 1
+            delta = value - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (value - self.mean)
+            
+            if self.window is not None:
+                self.returns.append(value)
+                if len(self.returns) > self.window:
+                    removed = self.returns.popleft()
+                    self.n -= 1
+                    delta = removed - self.mean
+                    self.mean -= delta / self.n
+                    self.m2 -= delta * (removed - self.mean)
+        
+        self.previous_close = close
+        return self.value
+
+# ===== مجموعة مؤشرات لكل عملة =====
+
+class StreamingIndicatorSet:
+    """كل المؤشرات التراكمية لعملة واحدة تُحدث معاً من شمعة
+    (timestamp, open, high, low, close, volume)
+    """
+    
+    def __init__(self, rsi_period=14, macd_periods=(12, 26, 9), stochastic_period=14, volatility_window=None):
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD(*macd_periods)
+        self.stochastic = StreamingStochastic(stochastic_period)
+        self.volatility = StreamingVolatility(volatility_window)
+        self.last_timestamp = None
+        self.bars = 0
+    
+    @property
+    def values(self):
+        macd, signal = self.macd.value
+        return {
+            'rsi': self.rsi.value,
+            'macd': macd,
+            'macd_signal': signal,
+            'stochastic': self.stochastic.value,
+            'volatility': self.volatility.value,
+            'bars': self.bars,
+            'timestamp': self.last_timestamp
+        }
+    
+    def update(self, candle):
+        """إضافة شمعة مغلقة وإرجاع القيم الحالية"""
+        timestamp, _, high, low, close, _ = candle
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.stochastic.update(high, low, close)
+        self.volatility.update(close)
+        self.last_timestamp = int(timestamp)
+        self.bars += 1
+        return self.values
+    
+    def seed(self, candles):
+        """تعبئة أولية من نافذة شموع تاريخية (تُتجاوز الشموع المضافة مسبقاً)"""
+        columns = [candles[column] for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume')]
+        for candle in zip(*columns):
+            if self.last_timestamp is None or candle[0] > self.last_timestamp:
+                self.update(candle)
+        return self.values
+    
+    def snapshot(self):
+        return {
+            'rsi': self.rsi.snapshot(),
+            'macd': self.macd.snapshot(),
+            'stochastic': self.stochastic.snapshot(),
+            'volatility': self.volatility.snapshot(),
+            'last_timestamp': self.last_timestamp,
+            'bars': self.bars
+        }
+    
+    def restore(self, state):
+        self.rsi.restore(state['rsi'])
+        self.macd.restore(state['macd'])
+        self.stochastic.restore(state['stochastic'])
+        self.volatility.restore(state['volatility'])
+        self.last_timestamp = state['last_timestamp']
+        self.bars = state['bars']
+    
+    def peek(self, candle):
+        """القيم لو أُغلقت الشمعة الجارية الآن، بدون تغيير الحالة"""
+        state = self.snapshot()
+        try:
+            return self.update(candle)
+        finally:
+            self.restore(state)
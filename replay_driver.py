@@ -0,0 +1,264 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import clock
+from clock import SimulatedClock, SystemClock
+from config import QuantumConfig
+from quantum_bot import AIONQuantumUltraMAX
+from market_scanner.candle_store import CandleStore, CANDLE_COLUMNS, interval_to_seconds
+from market_scanner.candle_resampler import resample_candles
+
+def load_candle_file(path):
+    """قراءة ملف OHLCV (CSV أو Parquet) إلى أعمدة المخزن"""
+    if path.endswith('.parquet'):
+        # يتطلب pyarrow أو fastparquet
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    
+    frame.columns = [str(column).lower() for column in frame.columns]
+    for alias in ('open_time', 'time', 'date', 'datetime'):
+        if 'timestamp' not in frame.columns and alias in frame.columns:
+            frame = frame.rename(columns={alias: 'timestamp'})
+    
+    timestamps = frame['timestamp']
+    if not pd.api.types.is_numeric_dtype(timestamps):
+        # تواريخ نصية → مللي ثانية
+        timestamps = (pd.to_datetime(timestamps) - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    
+    frame = frame.assign(timestamp=timestamps).sort_values('timestamp').drop_duplicates('timestamp', keep='last')
+    return {column: frame[column].to_numpy(dtype=dtype) for column, dtype in CANDLE_COLUMNS.items()}
+
+def load_replay_data(source, symbols=None, interval='5m'):
+    """شموع الإعادة لكل عملة من مجلد ملفات أو من مخزن شموع محلي
+    
+    الملفات المقبولة: {SYMBOL}_{interval}.parquet/.csv أو {SYMBOL}.parquet/.csv
+    """
+    store = CandleStore(source)
+    stored = {symbol for symbol, series_interval in store.symbols() if series_interval == interval}
+    
+    if symbols is None:
+        symbols = sorted(stored | {
+            name.split('.')[0].rsplit('_', 1)[0]
+            for name in os.listdir(source)
+            if name.endswith(('.csv', '.parquet'))
+        })
+    
+    candles = {}
+    for symbol in symbols:
+        if symbol in stored:
+            # نسخة في الذاكرة حتى لا تتأثر الإعادة بالكتابة على المخزن
+            candles[symbol] = {column: np.array(values) for column, values in store.get_window(symbol, interval).items()}
+            continue
+        
+        for name in (f"{symbol}_{interval}.parquet", f"{symbol}_{interval}.csv", f"{symbol}.parquet", f"{symbol}.csv"):
+            path = os.path.join(source, name)
+            if os.path.exists(path):
+                candles[symbol] = load_candle_file(path)
+                break
+        else:
+            print(f"⚠️ No replay data for {symbol} in {source}")
+    
+    return candles
+
+class ReplayExchange:
+    """بورصة إعادة تاريخية بنفس واجهة العميل الذي يستخدمه المنفذ
+    
+    لا تُعرض إلا الشموع المغلقة حتى وقت الساعة المحاكاة، فلا يرى البوت
+    أي بيانات من المستقبل.
+    """
+    
+    def __init__(self, candles, base_interval='5m'):
+        self.base_interval = base_interval
+        self.series = {(symbol, base_interval): series for symbol, series in candles.items()}
+        self.stats = {'requests': 0}
+    
+    def get_series(self, symbol, interval):
+        """السلسلة الكاملة للعملة والإطار (الأطر الأكبر تُشتق من الأساسية)"""
+        series = self.series.get((symbol, interval))
+        if series is None:
+            series = resample_candles(self.series[(symbol, self.base_interval)], interval, drop_leading_partial=True)
+            self.series[(symbol, interval)] = series
+        return series
+    
+    def visible_end(self, symbol, interval):
+        """عدد الشموع المغلقة حتى الوقت المحاكى"""
+        interval_ms = interval_to_seconds(interval) * 1000
+        now_ms = int(clock.timestamp() * 1000)
+        timestamps = self.get_series(symbol, interval)['timestamp']
+        return int(np.searchsorted(timestamps, now_ms - interval_ms, side='right'))
+    
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        self.stats['requests'] += 1
+        series = self.get_series(symbol, interval)
+        timestamps = series['timestamp']
+        end = self.visible_end(symbol, interval)
+        
+        if endTime is not None:
+            end = min(end, int(np.searchsorted(timestamps, endTime, side='right')))
+        if startTime is not None:
+            start = int(np.searchsorted(timestamps, startTime, side='left'))
+            end = min(end, start + limit)
+        else:
+            start = max(end - limit, 0)
+        
+        columns = [series[column][start:end] for column in CANDLE_COLUMNS]
+        return [list(row) for row in zip(*columns)]
+    
+    def get_symbol_ticker(self, symbol=None):
+        end = self.visible_end(symbol, self.base_interval)
+        price = self.get_series(symbol, self.base_interval)['close'][max(end - 1, 0)]
+        return {'symbol': symbol, 'price': str(price)}
+    
+    def ping(self):
+        return {}
+
+class ReplayDriver:
+    """تشغيل البوت بالكامل على بيانات تاريخية بساعة محاكاة بدون نوم
+    
+    كل دورة تقدم الساعة بفاصل الدورة وتستدعي execute_quantum_cycle،
+    فتُعاد أشهر من البيانات في دقائق مع قياس عدد الدورات في الثانية.
+    """
+    
+    def __init__(self, source, symbols=None, interval='5m', start=None, end=None,
+                 cycle_interval=None, initial_balance=50, seed=42):
+        self.candles = load_replay_data(source, symbols, interval)
+        if not self.candles:
+            raise ValueError(f"No replay data found in {source}")
+        
+        self.symbols = list(self.candles)
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.cycle_interval = cycle_interval or interval_to_seconds(interval)
+        self.initial_balance = initial_balance
+        self.seed = seed
+        self.exchange = ReplayExchange(self.candles, interval)
+    
+    def build_config(self, work_dir):
+        """إعدادات البوت للإعادة: بيانات من البورصة المحاكاة ومجلد مؤقت منفصل
+        
+        مخزن الشموع ومعرفة المتعلم كلاهما داخل work_dir، فلا تتأثر الإعادة
+        بالمعرفة الحية على القرص ولا تكتب فوقها.
+        """
+        config = QuantumConfig()
+        config.target_symbols = self.symbols
+        config.symbol_universe = 'fixed'
+        config.data_mode = 'rest'
+        config.base_interval = self.interval
+        config.candle_store_dir = os.path.join(work_dir, 'candles')
+        config.models_dir = os.path.join(work_dir, 'models')
+        config.simulation_seed = self.seed
+        config.exchange_client = self.exchange
+        # التعلم والمسح في نفس الخيط حتى تبقى نتائج الإعادة قابلة للتكرار (بلا مهل زمنية حقيقية)
+        config.learning_mode = 'inline'
+        config.scan_mode = 'sequential'
+        return config
+    
+    def time_range(self, warmup_bars):
+        """بداية ونهاية الإعادة (بعد فترة إحماء تكفي لملء نوافذ التحليل)"""
+        interval_ms = interval_to_seconds(self.interval) * 1000
+        first = max(int(series['timestamp'][0]) for series in self.candles.values())
+        last = min(int(series['timestamp'][-1]) for series in self.candles.values()) + interval_ms
+        
+        start_ms = first + warmup_bars * interval_ms
+        if self.start is not None:
+            start_ms = max(start_ms, int(pd.Timestamp(self.start).to_pydatetime().timestamp() * 1000))
+        if self.end is not None:
+            last = min(last, int(pd.Timestamp(self.end).to_pydatetime().timestamp() * 1000))
+        return start_ms / 1000, last / 1000
+    
+    def run(self, max_cycles=None):
+        """تشغيل الإعادة وإرجاع تقرير الأداء والسرعة"""
+        work_dir = tempfile.mkdtemp(prefix='replay_')
+        sim_clock = clock.set_clock(SimulatedClock(int(self.candles[self.symbols[0]]['timestamp'][0]) / 1000))
+        
+        bot = None
+        try:
+            bot = AIONQuantumUltraMAX(
+                initial_balance=self.initial_balance,
+                mode='paper_trading',
+                config=self.build_config(work_dir)
+            )
+            warmup_bars = bot.smart_executor.resampler.base_limit(bot.timeframe_limits)
+            start, end = self.time_range(warmup_bars)
+            if start >= end:
+                raise ValueError("Not enough replay data after the warm-up window")
+            
+            sim_clock.set(start)
+            print(f"⏪ Replaying {len(self.symbols)} symbols from {sim_clock.now()} to {datetime.fromtimestamp(end)}")
+            
+            cycles = 0
+            total_profit = 0.0
+            wall_start = time.perf_counter()
+            
+            while sim_clock.time() < end and (max_cycles is None or cycles < max_cycles):
+                executed_trades, cycle_profit = bot.execute_quantum_cycle()
+                bot.current_balance += cycle_profit
+                total_profit += cycle_profit
+                cycles += 1
+                
+                if bot.check_target_achievement():
+                    print("🎉 TARGET ACHIEVED during replay!")
+                    break
+                
+                sim_clock.advance(self.cycle_interval)
+            
+            wall_time = time.perf_counter() - wall_start
+            simulated_seconds = sim_clock.time() - start
+            
+            report = {
+                'cycles': cycles,
+                'simulated_days': simulated_seconds / 86400,
+                'wall_time': wall_time,
+                'cycles_per_second': cycles / wall_time if wall_time > 0 else 0.0,
+                'speedup': simulated_seconds / wall_time if wall_time > 0 else 0.0,
+                'total_profit': total_profit,
+                'final_balance': bot.current_balance,
+                'total_trades': len(bot.trade_history),
+                'exchange_requests': self.exchange.stats['requests']
+            }
+            
+            print(f"\n⏪ Replay complete: {cycles} cycles over {report['simulated_days']:.1f} days "
+                  f"in {wall_time:.1f}s ({report['cycles_per_second']:.1f} cycles/s, {report['speedup']:,.0f}x real time)")
+            print(f"💰 Final Balance: ${bot.current_balance:.2f} | Trades: {report['total_trades']}")
+            return report
+        
+        finally:
+            if bot is not None:
+                bot.shutdown()
+            clock.set_clock(SystemClock())
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay historical OHLCV data through the quantum bot')
+    parser.add_argument('source', help='Directory of CSV/Parquet files or a local candle store')
+    parser.add_argument('--symbols', nargs='*', help='Symbols to replay (default: everything in source)')
+    parser.add_argument('--interval', default='5m', help='Base candle interval of the data')
+    parser.add_argument('--start', help='Replay start date (e.g. 2024-01-01)')
+    parser.add_argument('--end', help='Replay end date')
+    parser.add_argument('--cycle-interval', type=int, help='Simulated seconds between cycles (default: one bar)')
+    parser.add_argument('--max-cycles', type=int, help='Stop after this many cycles')
+    parser.add_argument('--balance', type=float, default=50, help='Initial balance')
+    args = parser.parse_args()
+    
+    driver = ReplayDriver(
+        args.source,
+        symbols=args.symbols,
+        interval=args.interval,
+        start=args.start,
+        end=args.end,
+        cycle_interval=args.cycle_interval,
+        initial_balance=args.balance
+    )
+    driver.run(max_cycles=args.max_cycles)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+import clock
 
 class CapitalProtector:
     def __init__(self, initial_balance):
@@ -77,7 +79,7 @@ class CapitalProtector:
     
     def check_daily_loss_limits(self, potential_loss):
         """فحص حدود الخسارة اليومية"""
-        today = datetime.now().date()
+        today = clock.now().date()
         today_str = today.isoformat()
         
         if today_str not in self.daily_stats:
@@ -147,7 +149,7 @@ class CapitalProtector:
         score += consecutive_penalty
         
         # عامل الخسارة اليومية
-        today = datetime.now().date().isoformat()
+        today = clock.now().date().isoformat()
         if today in self.daily_stats:
             daily_loss_ratio = abs(self.daily_stats[today]['net_profit']) / (self.current_balance * 0.03)
             score += min(daily_loss_ratio, 1.0) * 0.3
@@ -156,7 +158,7 @@ class CapitalProtector:
     
     def update_after_trade(self, symbol, direction, amount, profit):
         """تحديث البيانات بعد الصفقة"""
-        today = datetime.now().date()
+        today = clock.now().date()
         today_str = today.isoformat()
         
         if today_str not in self.daily_stats:
@@ -185,7 +187,7 @@ class CapitalProtector:
         
         # تسجيل الصفقة
         trade_record = {
-            'timestamp': datetime.now(),
+            'timestamp': clock.now(),
             'symbol': symbol,
             'direction': direction,
             'amount': amount,
@@ -218,7 +220,7 @@ class CapitalProtector:
     
     def get_protection_status(self):
         """الحصول على حالة الحماية"""
-        today = datetime.now().date().isoformat()
+        today = clock.now().date().isoformat()
         daily_data = self.daily_stats.get(today, {})
         
         return {
@@ -0,0 +1,40 @@
+import numpy as np
+
+from quantum_engine.insight_store import InsightStore
+
+def test_mask_ignores_values_never_recorded():
+    store = InsightStore(capacity=10)
+    store.append({'strategy': None, 'outcome': 'WIN', 'profit': 1.0})
+    store.append({'strategy': 'trend', 'outcome': 'LOSS', 'profit': -1.0})
+    
+    assert not store.mask(strategy='never_seen').any()
+    assert store.win_rate(strategy='never_seen') == 0.0
+    assert store.mask(strategy='trend').tolist() == [False, True]
+    assert store.win_rate() == 0.5
+
+def test_strategy_stats_aggregates_by_strategy():
+    store = InsightStore(capacity=10)
+    store.extend([
+        {'strategy': 'trend', 'outcome': 'WIN', 'profit': 2.0},
+        {'strategy': 'trend', 'outcome': 'LOSS', 'profit': -1.0},
+        {'strategy': 'breakout', 'outcome': 'WIN', 'profit': 3.0},
+        {'strategy': None, 'outcome': 'WIN', 'profit': 5.0}
+    ])
+    
+    assert store.strategy_stats() == {
+        'trend': {'wins': 1, 'losses': 1, 'total_profit': 1.0},
+        'breakout': {'wins': 1, 'losses': 0, 'total_profit': 3.0}
+    }
+    assert store.win_rate(strategy='breakout') == 1.0
+
+def test_queries_cover_only_the_ring_window_after_wrap_around():
+    store = InsightStore(capacity=3)
+    store.extend([{'strategy': 'old', 'outcome': 'WIN', 'profit': 1.0}] * 2)
+    store.extend([{'strategy': 'new', 'outcome': 'LOSS', 'profit': -1.0}] * 3)
+    
+    assert len(store) == 3
+    assert store.total == 5
+    assert store.win_rate() == 0.0
+    assert store.win_rate(strategy='old') == 0.0
+    assert store.strategy_stats() == {'new': {'wins': 0, 'losses': 3, 'total_profit': -3.0}}
+    assert np.array_equal(store.view()['profit'], [-1.0, -1.0, -1.0])